@@ -0,0 +1,414 @@
+"""
+API Server Module
+Local Unix-socket API serving live usage data to other tools
+"""
+
+import json
+import os
+import queue
+import selectors
+import socket
+import sys
+import threading
+from collections import deque
+from datetime import date as date_cls, timedelta
+from pathlib import Path
+
+from metrics import metrics
+
+# A client is not read from while this much output is waiting for it,
+# and gets no pushes until it drains, so memory per client stays bounded
+MAX_CLIENT_BUFFER = 256 * 1024
+MAX_REQUEST_BYTES = 64 * 1024
+MAX_CLIENTS = 32
+
+# Methods that may scan the whole history; they run on the worker thread
+# so the selector thread keeps serving every other client meanwhile
+SLOW_METHODS = {'summary'}
+
+
+class _Client:
+    __slots__ = ('sock', 'inbuf', 'outbuf', 'subscribed', 'date', 'version', 'sent', 'events', 'busy')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.subscribed = False
+        self.date = None  # Date, version and seconds last pushed
+        self.version = None
+        self.sent = {}
+        self.events = 0
+        self.busy = False  # Waiting for a reply from the worker thread
+
+
+class ApiServer:
+    """Newline-delimited JSON over a Unix socket, one request per line.
+
+    Requests are {"id": ..., "method": ..., "params": {...}} and get
+    {"id": ..., "result": ...} or {"id": ..., "error": ...} back, in
+    order. A client may pipeline any number of requests without
+    waiting. Methods: today, top, summary, limits, subscribe and
+    unsubscribe. Subscribers get an {"event": "usage", ...} line with
+    the apps whose seconds changed after every tracker update.
+
+    Everything runs on one selector thread with non-blocking sockets,
+    except the slow range queries (SLOW_METHODS): those go to a worker
+    thread, which hands the reply back through the wakeup socket. A
+    client's later requests wait for it, so replies stay in order.
+    The tracker only calls notify(), which never blocks. A subscriber
+    that reads slower than it is updated is sent one coalesced delta
+    once its buffer drains instead of one per update.
+    """
+
+    def __init__(self, path, data_manager, blocker=None):
+        self.path = Path(path)
+        self.data_manager = data_manager
+        self.blocker = blocker
+        self.clients = {}
+        self.thread = None
+        self.worker = None
+        self._jobs = queue.Queue()
+        self._done = deque()  # (client, reply) from the worker
+        self._running = False
+        self._selector = None
+        self._listener = None
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._wake_read.setblocking(False)
+        self._wake_write.setblocking(False)
+
+    @staticmethod
+    def supported():
+        return hasattr(socket, 'AF_UNIX')
+
+    def start(self):
+        """Bind the socket and serve on a daemon thread, False if it is in use"""
+        if self.path.exists():
+            if self._socket_alive():
+                print(f"API socket {self.path} is in use by another tracker")
+                return False
+            self.path.unlink()  # Left over from a crash
+
+        try:
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Created owner-only, so it is never reachable by anyone else
+            old_umask = os.umask(0o177)
+            try:
+                listener.bind(str(self.path))
+            finally:
+                os.umask(old_umask)
+            listener.listen(8)
+            listener.setblocking(False)
+        except OSError as e:
+            print(f"Error starting API server: {e}")
+            return False
+
+        self._listener = listener
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(listener, selectors.EVENT_READ, 'listen')
+        self._selector.register(self._wake_read, selectors.EVENT_READ, 'wake')
+        self._running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+        return True
+
+    def _socket_alive(self):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.path))
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    def notify(self):
+        """Tell the server usage changed; safe to call from any thread"""
+        try:
+            self._wake_write.send(b'\0')
+        except OSError:
+            pass  # Pipe full, a wakeup is already pending
+
+    def stop(self):
+        """Stop serving, disconnect every client and remove the socket"""
+        if not self._running:
+            return
+        self._running = False
+        self.notify()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        try:
+            while self._running:
+                for key, events in self._selector.select():
+                    if key.data == 'listen':
+                        self._accept()
+                    elif key.data == 'wake':
+                        self._drain_wakeups()
+                        self._finish_jobs()
+                        for client in list(self.clients.values()):
+                            self._push(client)
+                            self._update_interest(client)
+                    else:
+                        client = key.data
+                        if events & selectors.EVENT_WRITE:
+                            self._flush(client)
+                        if events & selectors.EVENT_READ and client.sock in self.clients:
+                            self._read(client)
+        except Exception as e:
+            print(f"API server error: {e}")
+        finally:
+            self._jobs.put(None)
+            for client in list(self.clients.values()):
+                self._close(client)
+            self._selector.close()
+            self._listener.close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def _work(self):
+        """Worker thread: answer slow requests one at a time"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            client, request_id, method, params = job
+            self._done.append((client, self._call(request_id, method, client, params)))
+            self.notify()
+
+    def _finish_jobs(self):
+        """Send the worker's replies and resume those clients' requests"""
+        while self._done:
+            client, reply = self._done.popleft()
+            client.busy = False
+            if client.sock not in self.clients:
+                continue  # Went away while waiting
+            self._send(client, reply)
+            self._process(client)
+            self._update_interest(client)
+
+    def _drain_wakeups(self):
+        try:
+            while self._wake_read.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except OSError:
+            return
+        if len(self.clients) >= MAX_CLIENTS:
+            sock.close()
+            return
+        sock.setblocking(False)
+        client = _Client(sock)
+        self.clients[sock] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+
+    def _close(self, client):
+        self.clients.pop(client.sock, None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(client)
+            return
+        client.inbuf += data
+        self._process(client)
+        if b'\n' not in client.inbuf and len(client.inbuf) > MAX_REQUEST_BYTES:
+            self._close(client)
+            return
+        self._update_interest(client)
+
+    def _process(self, client):
+        """Answer pipelined requests until the output buffer is full or one goes to the worker"""
+        while len(client.outbuf) < MAX_CLIENT_BUFFER and not client.busy:
+            end = client.inbuf.find(b'\n')
+            if end < 0:
+                return
+            line = bytes(client.inbuf[:end])
+            del client.inbuf[:end + 1]
+            if line.strip():
+                reply = self._handle(client, line)
+                if reply is not None:
+                    self._send(client, reply)
+
+    def _flush(self, client):
+        try:
+            sent = client.sock.send(client.outbuf)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._close(client)
+            return
+        del client.outbuf[:sent]
+        if len(client.outbuf) < MAX_CLIENT_BUFFER:
+            # Room again: resume pipelined requests and catch up pushes
+            self._process(client)
+            self._push(client)
+        self._update_interest(client)
+
+    def _update_interest(self, client):
+        if client.sock not in self.clients:
+            return
+        events = 0
+        if len(client.outbuf) < MAX_CLIENT_BUFFER and not client.busy:
+            events |= selectors.EVENT_READ
+        if client.outbuf:
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(client.sock, events, client)
+
+    def _send(self, client, message):
+        client.outbuf += json.dumps(message, default=float).encode() + b'\n'
+
+    def _push(self, client):
+        """Send a subscriber the apps that changed since its last push"""
+        snapshot = self.data_manager.snapshot
+        if (not client.subscribed or snapshot is None or snapshot.version == client.version
+                or len(client.outbuf) >= MAX_CLIENT_BUFFER):
+            return
+
+        reset = snapshot.date != client.date
+        if reset:
+            apps = dict(snapshot.seconds)
+        else:
+            sent = client.sent
+            apps = {app_name: seconds for app_name, seconds in snapshot.seconds.items()
+                    if sent.get(app_name) != seconds}
+        # Published snapshots never change, so keeping a reference is safe
+        client.date, client.version, client.sent = snapshot.date, snapshot.version, snapshot.seconds
+        client.events += 1
+        self._send(client, {
+            'event': 'usage',
+            'version': snapshot.version,
+            'date': snapshot.date,
+            'total_seconds': snapshot.total_seconds,
+            'reset': reset,
+            'apps': apps
+        })
+
+    def _handle(self, client, line):
+        """The reply to one request line, None if it went to the worker"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get('id')
+            method = getattr(self, f"_method_{request.get('method')}", None)
+            if method is None:
+                raise ValueError(f"unknown method: {request.get('method')}")
+            params = request.get('params') or {}
+        except Exception as e:
+            return {'id': request_id, 'error': str(e)}
+        if request.get('method') in SLOW_METHODS:
+            client.busy = True
+            self._jobs.put((client, request_id, method, params))
+            return None
+        return self._call(request_id, method, client, params)
+
+    def _call(self, request_id, method, client, params):
+        try:
+            with metrics.timer('api.request'):
+                return {'id': request_id, 'result': method(client, **params)}
+        except Exception as e:
+            return {'id': request_id, 'error': str(e)}
+
+    def _method_today(self, client):
+        today = date_cls.today().isoformat()
+        return {'date': today, 'total_seconds': self.data_manager.get_total_seconds(today)}
+
+    def _method_top(self, client, limit=10, date=None):
+        date = date or date_cls.today().isoformat()
+        return {'date': date, 'apps': self.data_manager.get_top_apps(date, int(limit))}
+
+    def _method_summary(self, client, days=7, start=None, end=None, top_n=10):
+        """Range summary; start/end (YYYY-MM-DD) win over the last N days. Runs on the worker thread"""
+        if start is None:
+            today = date_cls.today()
+            start = (today - timedelta(days=int(days) - 1)).isoformat()
+            end = end or today.isoformat()
+        return self.data_manager.query_engine.summary(start, end, int(top_n))
+
+    def _method_limits(self, client):
+        if self.blocker is None:
+            raise ValueError("no blocker in this process")
+        today = date_cls.today().isoformat()
+        limited = {}
+        for app_name, limit_seconds in list(self.blocker.limited_apps.items()):
+            used = self.data_manager.get_app_seconds(today, app_name)
+            limited[app_name] = {
+                'limit_seconds': limit_seconds,
+                'used_seconds': used,
+                'remaining_seconds': max(limit_seconds - used, 0)
+            }
+        return {'blocked': sorted(self.blocker.blocked_apps), 'limited': limited}
+
+    def _method_metrics(self, client):
+        return metrics.snapshot()
+
+    def _method_subscribe(self, client):
+        """Subscribe to usage events; the result is the current full state"""
+        client.subscribed = True
+        snapshot = self.data_manager.snapshot
+        if snapshot is None:
+            client.date, client.version, client.sent = date_cls.today().isoformat(), None, {}
+            return {'version': None, 'date': client.date, 'total_seconds': 0, 'apps': {}}
+        client.date, client.version, client.sent = snapshot.date, snapshot.version, snapshot.seconds
+        return {'version': snapshot.version, 'date': snapshot.date,
+                'total_seconds': snapshot.total_seconds, 'apps': dict(snapshot.seconds)}
+
+    def _method_unsubscribe(self, client):
+        client.subscribed = False
+        return True
+
+
+def request(path, method, params=None):
+    """Send one request to a running tracker and return its result"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(path))
+        sock.sendall(json.dumps({'id': 1, 'method': method, 'params': params or {}}).encode() + b'\n')
+        reply = sock.makefile('rb').readline()
+    response = json.loads(reply)
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+    return response['result']
+
+
+if __name__ == "__main__":
+    # python api_server.py METHOD [JSON_PARAMS], e.g. for a status bar:
+    #   python api_server.py top '{"limit": 3}'
+    socket_path = Path.home() / ".screen_time_tracker" / "api.sock"
+    method = sys.argv[1] if len(sys.argv) > 1 else 'today'
+    params = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+    try:
+        if method == 'subscribe':
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(str(socket_path))
+                sock.sendall(b'{"id": 1, "method": "subscribe"}\n')
+                for line in sock.makefile('r'):
+                    print(line, end='', flush=True)
+        else:
+            print(json.dumps(request(socket_path, method, params), indent=2, default=float))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Request failed: {e}")
+        sys.exit(1)
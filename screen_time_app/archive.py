@@ -0,0 +1,204 @@
+"""
+Archive Module
+Columnar, memory-mapped archive of finished days for fast long-range statistics
+"""
+
+import json
+import os
+import threading
+from datetime import date as date_cls, timedelta
+from pathlib import Path
+
+import numpy as np
+
+
+class UsageArchive:
+    """Finished days stored as an interned app table plus a day x app matrix.
+
+    seconds.npy holds a dense float32 matrix with one row per calendar day
+    starting at start_ordinal and one column per app id. It is opened with
+    mmap_mode, so queries only touch the pages they reduce over.
+
+    The per-day usage data stays authoritative: the archive is a copy of
+    it, and edits to archived days are written through with replace_day.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(exist_ok=True)
+        self.meta_file = self.archive_dir / "meta.json"
+        self.matrix_file = self.archive_dir / "seconds.npy"
+
+        self.apps = []
+        self.app_ids = {}
+        self.start_ordinal = None
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()  # Serializes rewrites against readers
+        self._load()
+
+    def _load(self):
+        """Load the app table and map the seconds matrix"""
+        if not (self.meta_file.exists() and self.matrix_file.exists()):
+            return
+        try:
+            with open(self.meta_file, 'r') as f:
+                meta = json.load(f)
+            self.apps = meta['apps']
+            self.app_ids = {app: i for i, app in enumerate(self.apps)}
+            self.start_ordinal = meta['start_ordinal']
+            self.matrix = np.load(self.matrix_file, mmap_mode='r')
+        except Exception as e:
+            print(f"Error loading archive: {e}")
+            self.apps = []
+            self.app_ids = {}
+            self.start_ordinal = None
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def num_days(self):
+        return self.matrix.shape[0]
+
+    @property
+    def last_date(self):
+        """Last archived date as YYYY-MM-DD, or None if the archive is empty"""
+        if self.start_ordinal is None or self.num_days == 0:
+            return None
+        return date_cls.fromordinal(self.start_ordinal + self.num_days - 1).isoformat()
+
+    def _write(self, matrix, start_ordinal, apps):
+        """Atomically replace the matrix and app table"""
+        tmp_matrix = self.archive_dir / "seconds.tmp.npy"
+        out = np.lib.format.open_memmap(tmp_matrix, mode='w+', dtype=np.float32, shape=matrix.shape)
+        out[:] = matrix
+        out.flush()
+        del out
+
+        # Release our mapping of the old file before replacing it
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        os.replace(tmp_matrix, self.matrix_file)
+
+        tmp_meta = self.meta_file.with_name(self.meta_file.name + ".tmp")
+        with open(tmp_meta, 'w') as f:
+            json.dump({'start_ordinal': start_ordinal, 'apps': apps}, f)
+        os.replace(tmp_meta, self.meta_file)
+        self._load()
+
+    def export(self, data, before_date, cancel=None):
+        """Append days from data that are older than before_date and not yet archived
+
+        Once the cancel event is set nothing more is loaded or written.
+        """
+        with self._lock:
+            return self._export(data, before_date, cancel)
+
+    def _export(self, data, before_date, cancel):
+        last_date = self.last_date or ''
+        if last_date and date_cls.fromisoformat(last_date) + timedelta(days=1) >= date_cls.fromisoformat(before_date):
+            return 0  # Already archived up to the day before
+        dates = sorted(date for date in data if last_date < date < before_date)
+        if not dates:
+            return 0
+
+        apps = list(self.apps)
+        app_ids = dict(self.app_ids)
+        ordinals = [date_cls.fromisoformat(date).toordinal() for date in dates]
+        start_ordinal = self.start_ordinal if self.num_days else ordinals[0]
+
+        days = []
+        for date in dates:
+            if cancel is not None and cancel.is_set():
+                return 0
+            days.append(data[date])
+        for daily_data in days:
+            for app_name in daily_data:
+                if app_name not in app_ids:
+                    app_ids[app_name] = len(apps)
+                    apps.append(app_name)
+
+        matrix = np.zeros((ordinals[-1] - start_ordinal + 1, len(apps)), dtype=np.float32)
+        matrix[:self.matrix.shape[0], :self.matrix.shape[1]] = self.matrix
+        for ordinal, daily_data in zip(ordinals, days):
+            row = ordinal - start_ordinal
+            for app_name, app_data in daily_data.items():
+                matrix[row, app_ids[app_name]] = app_data.get('total_seconds', 0)
+
+        self._write(matrix, start_ordinal, apps)
+        return len(dates)
+
+    def replace_day(self, date, daily_data):
+        """Rewrite the row of an archived day whose data changed"""
+        with self._lock:
+            if self.start_ordinal is None:
+                return
+            row = date_cls.fromisoformat(date).toordinal() - self.start_ordinal
+            if not 0 <= row < self.num_days:
+                return
+            apps = list(self.apps)
+            app_ids = dict(self.app_ids)
+            for app_name in daily_data:
+                if app_name not in app_ids:
+                    app_ids[app_name] = len(apps)
+                    apps.append(app_name)
+            matrix = np.zeros((self.num_days, len(apps)), dtype=np.float32)
+            matrix[:, :self.matrix.shape[1]] = self.matrix
+            matrix[row] = 0
+            for app_name, app_data in daily_data.items():
+                matrix[row, app_ids[app_name]] = app_data.get('total_seconds', 0)
+            self._write(matrix, self.start_ordinal, apps)
+
+    def drop_before(self, cutoff_date):
+        """Remove archived days older than cutoff_date"""
+        with self._lock:
+            if self.start_ordinal is None:
+                return
+            cutoff = date_cls.fromisoformat(cutoff_date).toordinal()
+            rows = cutoff - self.start_ordinal
+            if rows <= 0:
+                return
+            matrix = np.array(self.matrix[rows:])
+            self._write(matrix, max(cutoff, self.start_ordinal), self.apps)
+
+    def rows(self, start_date=None, end_date=None):
+        """Matrix rows covering a date range (inclusive) and the day ordinal of the first one"""
+        with self._lock:
+            matrix = self.matrix
+            start_ordinal = self.start_ordinal
+        if start_ordinal is None:
+            return matrix[0:0], 0
+        first = 0
+        last = matrix.shape[0]
+        if start_date:
+            first = max(date_cls.fromisoformat(start_date).toordinal() - start_ordinal, 0)
+        if end_date:
+            last = min(date_cls.fromisoformat(end_date).toordinal() - start_ordinal + 1, last)
+        return matrix[first:max(first, last)], start_ordinal + first
+
+    def daily_totals(self, start_date=None, end_date=None):
+        """Get {date: total_seconds} for archived days with any usage"""
+        if self.start_ordinal is None:
+            return {}
+        rows, base = self.rows(start_date, end_date)
+        totals = rows.sum(axis=1, dtype=np.float64)
+        nonzero = np.flatnonzero(totals)
+        return {date_cls.fromordinal(base + int(i)).isoformat(): float(totals[i]) for i in nonzero}
+
+    def app_totals(self, start_date=None, end_date=None):
+        """Get {app: total_seconds} summed over a date range"""
+        if self.start_ordinal is None:
+            return {}
+        rows, _ = self.rows(start_date, end_date)
+        totals = rows.sum(axis=0, dtype=np.float64)
+        return {self.apps[i]: float(totals[i]) for i in np.flatnonzero(totals)}
+
+    def top_apps(self, start_date=None, end_date=None, limit=10):
+        """Get top apps summed over a date range"""
+        if self.start_ordinal is None:
+            return []
+        rows, _ = self.rows(start_date, end_date)
+        totals = rows.sum(axis=0, dtype=np.float64)
+        limit = min(limit, len(totals))
+        if limit == 0:
+            return []
+        top = np.argpartition(-totals, limit - 1)[:limit]
+        top = top[np.argsort(-totals[top])]
+        return [(self.apps[i], float(totals[i])) for i in top if totals[i] > 0]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Pattern blocker rules: compiled matcher against checking rule by rule
+
+Generates rule sets of 10 to 5000 rules of the kinds an IT team would
+distribute (exact names, "*game*" and "tool-*" globs, regexes with
+alternations, executable path and command line globs), then reports:
+
+  compile    building the RuleMatcher
+  match      average time to match one process, compiled and with a
+             loop over every rule's own regex
+  tick       a steady-state AppBlocker tick over a 10k process table
+             with 1% churn, where only new and just-started processes get matched
+
+Usage: python benchmarks/bench_blocker_patterns.py [rule counts...]
+"""
+
+import fnmatch
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import psutil
+
+import process_cache
+import process_scanner
+from blocker import AppBlocker
+from rule_matcher import RuleMatcher
+from synthetic import FakeProcessTable
+
+PROCESSES = 10000
+
+
+def make_rules(count, seed=5):
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        kind = rng.randrange(6)
+        if kind == 0:
+            rules.append({'pattern': f"vendor-app-{i}", 'syntax': 'literal'})
+        elif kind == 1:
+            rules.append({'pattern': f"*game{i}*"})
+        elif kind == 2:
+            rules.append({'pattern': f"tool{i}-*", 'action': 'limit', 'limit_seconds': 3600})
+        elif kind == 3:
+            rules.append({'pattern': f"^(chat|mail|meet)-client-{i}(-helper)?$", 'syntax': 'regex',
+                          'label': f"Chat clients {i}"})
+        elif kind == 4:
+            rules.append({'pattern': f"/opt/vendor{i}/*", 'field': 'exe'})
+        else:
+            rules.append({'pattern': f"*--profile=corp{i} *", 'field': 'cmdline'})
+    # A few that match processes in the table
+    rules.append({'pattern': "*proc-1?", 'label': "Blocked processes"})
+    rules.append({'pattern': "proc-2*", 'action': 'limit', 'limit_seconds': 10 ** 9})
+    return rules
+
+
+def naive_matcher(rules):
+    """Every rule as its own regex, tried one after another"""
+    compiled = []
+    for rule in rules:
+        syntax = rule.get('syntax', 'glob')
+        if syntax == 'glob':
+            regex, method = re.compile(fnmatch.translate(rule['pattern']), re.I), 'match'
+        elif syntax == 'regex':
+            regex, method = re.compile(rule['pattern'], re.I), 'search'
+        else:
+            regex, method = re.compile(re.escape(rule['pattern']) + r'\Z', re.I), 'match'
+        compiled.append((rule.get('field', 'name'), getattr(regex, method)))
+
+    def match(values):
+        return {i for i, (field, test) in enumerate(compiled) if test(values.get(field) or '')}
+    return match
+
+
+class FakeDataManager:
+    def __init__(self, rules):
+        self.rules = rules
+        self.config = {}
+
+    def get_blocker_rules(self):
+        return {'blocked': [], 'limited': {}}
+
+    def get_blocker_patterns(self):
+        return self.rules
+
+    def get_daily_data(self, date):
+        return {}
+
+    def get_app_seconds(self, date, app_name):
+        return 0
+
+
+def bench(count, samples):
+    rules = make_rules(count)
+
+    start = time.perf_counter()
+    matcher = RuleMatcher(rules)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    naive = naive_matcher(rules)
+    for name, match in (("compiled", matcher.match), ("rule by rule", naive)):
+        start = time.perf_counter()
+        results = [match(values) for values in samples]
+        per_process = (time.perf_counter() - start) / len(samples) * 1e6
+        if name == "compiled":
+            expected = results
+        else:
+            assert results == expected, "compiled matcher disagrees with the rule-by-rule loop"
+        print(f"  {count:>5d} rules  {name:12s} {per_process:9.1f} us per process")
+
+    table = FakeProcessTable(PROCESSES)
+    process_scanner.psutil = process_cache.psutil = process_scanner.time = table
+    app_blocker = AppBlocker(FakeDataManager(rules))
+    app_blocker._show_notification = lambda title, message: None
+    app_blocker.check_and_block()
+    times = []
+    for _ in range(20):
+        table.churn(0.01)
+        start = time.perf_counter()
+        app_blocker.check_and_block()
+        times.append(time.perf_counter() - start)
+    process_scanner.psutil = process_cache.psutil = psutil
+    process_scanner.time = time
+    print(f"  {count:>5d} rules  compile {compile_ms:8.1f} ms   tick ({PROCESSES} procs, 1% churn) "
+          f"{sum(times) / len(times) * 1000:7.2f} ms   blocked so far {len(table.terminated)}")
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000]
+    table = FakeProcessTable(2000, names=[f"app-{i}" for i in range(300)])
+    samples = []
+    for pid in list(table.table)[:2000]:
+        process = table.Process(pid)
+        samples.append({'name': process.name(), 'exe': process.exe(), 'cmdline': ' '.join(process.cmdline())})
+    for count in counts:
+        bench(count, samples)
+
+
+if __name__ == "__main__":
+    main()
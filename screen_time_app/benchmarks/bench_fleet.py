@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Fleet merge benchmark and check on synthetic host exports
+
+Writes gzip exports for a few hundred synthetic hosts, merges them into
+a FleetStore and checks the merged and per-host totals against the
+generated data. Then re-imports everything under tracemalloc (totals
+must not change), imports a stale export (must be skipped) and a newer
+export with an edited day (must replace it). Reports import throughput,
+peak memory and summary query times.
+
+Usage: python benchmarks/bench_fleet.py [hosts] [days]
+"""
+
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleet import EXPORT_FORMAT, EXPORT_VERSION, FleetStore
+
+APPS = [f"app-{i}" for i in range(40)]
+APPS_PER_DAY = 12
+
+
+def write_export(path, host_id, host_name, exported_at, days, seed, edit=None):
+    """Write one synthetic export, returns {(date, app): seconds} of what it contains"""
+    rng = random.Random(seed)
+    today = date(2026, 6, 30)
+    contents = {}
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({'format': EXPORT_FORMAT, 'version': EXPORT_VERSION, 'host_id': host_id,
+                            'host_name': host_name, 'exported_at': exported_at}) + '\n')
+        for i in range(days):
+            day = (today - timedelta(days=i)).isoformat()
+            for app in rng.sample(APPS, APPS_PER_DAY):
+                seconds = float(rng.randint(1, 7200))
+                if edit and day == edit:
+                    seconds += 1000
+                contents[(day, app)] = seconds
+                f.write(json.dumps({'date': day, 'app': app, 'seconds': seconds}) + '\n')
+    return contents
+
+
+def expected_totals(hosts):
+    merged, per_host = defaultdict(float), {}
+    for host_id, contents in hosts.items():
+        per_host[host_id] = sum(contents.values())
+        for (day, app), seconds in contents.items():
+            merged[app] += seconds
+    return merged, per_host
+
+
+def check(fleet, hosts, label):
+    merged, per_host = expected_totals(hosts)
+    apps = fleet.get_grouped_totals(group_by='app')
+    by_host = fleet.get_grouped_totals(group_by='host_id')
+    ok = (all(abs(apps.get(app, 0) - seconds) < 1e-6 for app, seconds in merged.items())
+          and all(abs(by_host.get(host_id, 0) - seconds) < 1e-6 for host_id, seconds in per_host.items())
+          and len(by_host) == len(hosts))
+    print(f"  {label:34s} {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    n_hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        hosts, paths = {}, []
+        start = time.perf_counter()
+        for i in range(n_hosts):
+            host_id = f"{i:032x}"
+            path = tmp / f"host-{i}.jsonl.gz"
+            # A few hosts share a hostname, as they do in real fleets
+            hosts[host_id] = write_export(path, host_id, f"ws-{i % (n_hosts - 5)}",
+                                          "2026-06-30T18:00:00", days, seed=i)
+            paths.append(path)
+        rows = sum(len(contents) for contents in hosts.values())
+        print(f"{n_hosts} hosts x {days} days: {rows} rows written in {time.perf_counter() - start:.1f} s")
+
+        fleet = FleetStore(tmp / "fleet.db")
+        start = time.perf_counter()
+        for path in paths:
+            fleet.import_file(path)
+        elapsed = time.perf_counter() - start
+        print(f"  merged in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+        ok = check(fleet, hosts, "merged and per-host totals")
+
+        # Traced separately, tracemalloc slows the import down a lot
+        tracemalloc.start()
+        for path in paths:
+            fleet.import_file(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  re-import of every export: peak Python memory {peak / 1024 / 1024:.1f} MB")
+        ok &= check(fleet, hosts, "totals after re-import")
+
+        # A stale export of host 0 must not undo anything
+        host_id = f"{0:032x}"
+        write_export(tmp / "stale.jsonl.gz", host_id, "ws-0", "2026-06-01T00:00:00", days, seed=999)
+        skipped = fleet.import_file(tmp / "stale.jsonl.gz") is None
+        ok &= check(fleet, hosts, "stale export skipped") and skipped
+
+        # A newer export with one edited day replaces that host's data
+        hosts[host_id] = write_export(tmp / "newer.jsonl.gz", host_id, "ws-0", "2026-07-01T09:00:00",
+                                      days, seed=0, edit="2026-06-30")
+        fleet.import_file(tmp / "newer.jsonl.gz")
+        ok &= check(fleet, hosts, "newer export replaces")
+
+        start = time.perf_counter()
+        fleet.summary("2026-06-01", "2026-06-30")
+        merged_time = time.perf_counter() - start
+        start = time.perf_counter()
+        fleet.summary("2026-06-01", "2026-06-30", host_id=host_id)
+        host_time = time.perf_counter() - start
+        print(f"  30-day summary: merged {merged_time * 1000:.0f} ms, one host {host_time * 1000:.0f} ms")
+        fleet.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
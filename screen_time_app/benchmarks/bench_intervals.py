@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Interval store size and scan speed over a year of dense tracking
+
+Feeds a synthetic year (10 tracked hours a day, focus moving every
+few seconds to minutes, a tick every 5 s, short idle gaps) through
+IntervalStore.add the way DataManager.add_usage does, then reports
+bytes on disk, bytes per span, add() cost, how closely the per-day
+totals derived from the intervals match the seconds that were added,
+and the time of hourly, heatmap, session and switch scans.
+
+Usage: python benchmarks/bench_intervals.py [days]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intervals import IntervalStore
+
+APPS = [f"app-{i}" for i in range(30)]
+TICK = 5
+
+
+def feed(store, days, seed=3):
+    """Track a synthetic day at a time, returns ({date: {app: seconds}}, adds)"""
+    rng = random.Random(seed)
+    expected = defaultdict(lambda: defaultdict(float))
+    adds = 0
+    first = date(2026, 1, 1)
+    for i in range(days):
+        day = first + timedelta(days=i)
+        day_str = day.isoformat()
+        now = datetime.combine(day, datetime.min.time()) + timedelta(hours=8)
+        stop = now + timedelta(hours=10)
+        # Each app has a handful of window titles that recur
+        titles = {app: [f"{app} - document {rng.randint(1, 40)}" for _ in range(4)] for app in APPS}
+        while now < stop:
+            app = rng.choice(APPS[:8]) if rng.random() < 0.8 else rng.choice(APPS)
+            title = rng.choice(titles[app])
+            visit = rng.expovariate(1 / 25) if rng.random() < 0.7 else rng.uniform(60, 1500)
+            end = now + timedelta(seconds=visit)
+            while now < end:
+                step = min(TICK, (end - now).total_seconds())
+                now += timedelta(seconds=step)
+                store.add(day_str, now, step, app, title)
+                expected[day_str][app] += step
+                adds += 1
+            if rng.random() < 0.05:
+                now += timedelta(seconds=rng.uniform(60, 900))  # Away, nothing counted
+    store.flush()
+    return expected, adds
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"  {label:36s} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = IntervalStore(Path(tmp) / "intervals")
+        start = time.perf_counter()
+        expected, adds = feed(store, days)
+        elapsed = time.perf_counter() - start
+        store.close()
+
+        size = sum(path.stat().st_size for path in store.directory.glob("*.seg"))
+        store = IntervalStore(store.directory)
+        spans = sum(len(store.segment(d)) for d in store.dates())
+        print(f"{days} days, {adds} ticks recorded as {spans} spans "
+              f"({elapsed / adds * 1e6:.1f} us per add)")
+        print(f"  on disk: {size / 1024 / 1024:.2f} MB, {size / spans:.1f} bytes per span")
+
+        error = max(abs(store.totals(day).get(app, 0) - seconds)
+                    for day, apps in expected.items() for app, seconds in apps.items())
+        print(f"  largest per-day total difference: {error * 1000:.1f} ms")
+
+        store = IntervalStore(store.directory)  # Cold cache
+        last = store.dates()[-1]
+        month = (datetime.strptime(last, "%Y-%m-%d") - timedelta(days=29)).strftime("%Y-%m-%d")
+        store.cache_size = days
+        timed("hourly, whole range (cold)", lambda: store.hourly())
+        timed("hourly, whole range (cached)", lambda: store.hourly())
+        timed("heatmap, last 30 days", lambda: store.heatmap(month, last))
+        longest = timed("longest session, whole range", lambda: store.longest_session())
+        timed("switches per day, whole range", lambda: store.switches())
+        print(f"  longest session: {longest[2]} for {longest[1] / 60:.0f} min on {longest[0]:%Y-%m-%d %H:%M}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Statistics query benchmark: the old per-view summary loops vs QueryEngine
+
+Builds 30, 365 and 1825 days of synthetic history in a temporary data
+directory and times the 7-day, 30-day and all-time summaries the
+Statistics tab shows. The engine is timed once per JSON-backend source:
+rollups, archive-backed frame and a frame built from raw partitions.
+
+Usage: python benchmarks/bench_queries.py [days...]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+APPS_PER_DAY = 25
+
+
+def legacy_period_summary(data_manager, days, top_n=10):
+    """The loop get_weekly_summary and StatisticsFrame used to run"""
+    summary = {'total_seconds': 0, 'top_apps': defaultdict(int), 'days': []}
+    for i in range(days):
+        date_str = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
+        daily_data = data_manager.get_daily_data(date_str)
+        daily_total = sum(app.get('total_seconds', 0) for app in daily_data.values())
+        summary['days'].append({'date': date_str, 'total_seconds': daily_total})
+        for app_name, app_data in daily_data.items():
+            summary['top_apps'][app_name] += app_data.get('total_seconds', 0)
+        summary['total_seconds'] += daily_total
+    summary['daily_average'] = summary['total_seconds'] / days
+    summary['top_apps'] = sorted(summary['top_apps'].items(), key=lambda x: x[1], reverse=True)[:top_n]
+    return summary
+
+
+def legacy_all_time_summary(data_manager, top_n=10):
+    """The all-time loop StatisticsFrame used to run"""
+    summary = {'total_seconds': 0, 'top_apps': defaultdict(int), 'days': []}
+    for date_str, daily_data in data_manager.data.items():
+        daily_total = sum(app.get('total_seconds', 0) for app in daily_data.values())
+        summary['days'].append({'date': date_str, 'total_seconds': daily_total})
+        for app_name, app_data in daily_data.items():
+            summary['top_apps'][app_name] += app_data.get('total_seconds', 0)
+        summary['total_seconds'] += daily_total
+    summary['daily_average'] = summary['total_seconds'] / (len(summary['days']) or 1)
+    summary['top_apps'] = sorted(summary['top_apps'].items(), key=lambda x: x[1], reverse=True)[:top_n]
+    return summary
+
+
+def make_data_manager(home, days, seed=42):
+    """DataManager over synthetic history, with every partition resident"""
+    os.environ['HOME'] = str(home)
+    data_dir = Path(home) / ".screen_time_tracker"
+    data_dir.mkdir()
+    with open(data_dir / "config.json", 'w') as f:
+        json.dump({'journal_enabled': False, 'partition_cache_size': 100}, f)
+
+    from data_manager import DataManager
+    data_manager = DataManager()
+    rng = random.Random(seed)
+    apps = [f"app-{i:03d}" for i in range(APPS_PER_DAY * 4)]
+    today = date.today()
+    for i in range(days):
+        data_manager.data[(today - timedelta(days=i)).isoformat()] = {
+            app: {'total_seconds': rng.randrange(1, 3600), 'last_active': None, 'title': ''}
+            for app in rng.sample(apps, APPS_PER_DAY)
+        }
+    data_manager.save()
+    return data_manager
+
+
+def best_of(func, repeat=5):
+    """Best wall time of a few runs, in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def bench(days):
+    with tempfile.TemporaryDirectory() as home:
+        data_manager = make_data_manager(home, days)
+        rollups, archive = data_manager.rollups, data_manager.archive
+
+        views = {
+            '7 days': (lambda: legacy_period_summary(data_manager, 7),
+                       lambda: data_manager.get_period_summary(7)),
+            '30 days': (lambda: legacy_period_summary(data_manager, 30),
+                        lambda: data_manager.get_period_summary(30)),
+            'all time': (lambda: legacy_all_time_summary(data_manager),
+                         lambda: data_manager.get_all_time_summary()),
+        }
+        sources = {
+            'rollups': (rollups, archive),
+            'archive': (None, archive),
+            'frame': (None, None),
+        }
+
+        print(f"{days:>5d} days of history")
+        for view, (legacy, engine) in views.items():
+            line = f"  {view:9s} legacy {best_of(legacy):8.2f} ms"
+            for source, (data_manager.rollups, data_manager.archive) in sources.items():
+                if source != 'frame' and data_manager.rollups is None and data_manager.archive is None:
+                    continue
+                engine()  # First call folds or archives the history
+                line += f"   {source} {best_of(engine):8.2f} ms"
+            print(line)
+        data_manager.rollups, data_manager.archive = rollups, archive
+        data_manager.close()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [30, 365, 1825]
+    for days in sizes:
+        bench(days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: plain usage dicts vs compact UsageRecords
+
+Usage: python benchmarks/bench_records.py [days] [apps_per_day]
+"""
+
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from records import compact_day, date_to_ordinal
+
+
+def make_history(days, apps_per_day, seed=42):
+    """Synthetic history serialized the way usage files store it"""
+    rng = random.Random(seed)
+    apps = [f"app-{i:04d}" for i in range(apps_per_day * 4)]
+    start = date.today() - timedelta(days=days)
+    history = {}
+    for i in range(days):
+        day = start + timedelta(days=i)
+        history[day.isoformat()] = {
+            app: {
+                'total_seconds': rng.random() * 3600,
+                'last_active': datetime.combine(day, datetime.min.time()).replace(
+                    hour=rng.randrange(24), minute=rng.randrange(60)).isoformat(),
+                'title': f"{app} - window {rng.randrange(5)}"
+            }
+            for app in rng.sample(apps, apps_per_day)
+        }
+    return json.dumps(history)
+
+
+def measure(build, serialized):
+    """Bytes retained by the structure build() creates from parsed JSON"""
+    gc.collect()
+    tracemalloc.start()
+    data = build(json.loads(serialized))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 1825
+    apps_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    serialized = make_history(days, apps_per_day)
+
+    plain = measure(lambda loaded: loaded, serialized)
+    compact = measure(
+        lambda loaded: {date_to_ordinal(d): compact_day(daily) for d, daily in loaded.items()},
+        serialized
+    )
+
+    entries = days * apps_per_day
+    print(f"{days} days x {apps_per_day} apps = {entries} entries")
+    print(f"plain dicts:   {plain / 1e6:8.1f} MB  ({plain / entries:6.0f} B/entry)")
+    print(f"UsageRecords:  {compact / 1e6:8.1f} MB  ({compact / entries:6.0f} B/entry)")
+    print(f"reduction:     {(1 - compact / plain) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
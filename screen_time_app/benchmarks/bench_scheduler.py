@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tracking loop wakeups and attribution accuracy, old loop vs TrackingScheduler
+
+Replays a synthetic 8-hour day of focus switches (many short visits,
+some long stretches of work) on a virtual clock through the real
+TimeTracker, once per loop strategy, and reports wakeups per hour and
+how far the per-app totals end up from the true focus time. Then measures the
+CPU time the old 0.1 s wait loop and a single scheduler wait burn while
+idle.
+
+Usage: python benchmarks/bench_scheduler.py [hours]
+"""
+
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scheduler import TrackingScheduler
+from tracker import TimeTracker
+
+INTERVAL = 5
+HEARTBEAT = 30
+OLD_HEARTBEAT = 15
+
+
+class FakeDataManager:
+    def __init__(self):
+        self.charged = {}
+        self.config = {'idle_threshold_seconds': 0}
+
+    def add_usage(self, date, app_name, seconds, last_active, title):
+        self.charged[app_name] = self.charged.get(app_name, 0) + seconds
+
+
+def make_day(hours, seed=11):
+    """[(start_second, app)] focus sessions covering the day"""
+    rng = random.Random(seed)
+    apps = [f"app-{i}" for i in range(12)]
+    sessions, t = [], 0.0
+    while t < hours * 3600:
+        sessions.append((t, rng.choice(apps)))
+        # Mostly quick visits, sometimes a long stretch of focused work
+        t += rng.expovariate(1 / 20) if rng.random() < 0.7 else rng.uniform(120, 1200)
+    return sessions
+
+
+def truth(sessions, end):
+    totals = {}
+    for (start, app), (stop, _) in zip(sessions, sessions[1:] + [(end, None)]):
+        totals[app] = totals.get(app, 0) + min(stop, end) - start
+    return totals
+
+
+def simulate(sessions, end, polling, adaptive, wake_every=None):
+    """Run the tracking loop on a virtual clock, returns (wakeups, misattributed, tracked)"""
+    data_manager = FakeDataManager()
+    tracker = TimeTracker(data_manager)
+    tracker.get_active_window = lambda: tracker.current_window  # Nothing to poll here
+    base = datetime(2026, 1, 5, 9)
+    tracker.last_update = base
+    scheduler = TrackingScheduler(INTERVAL, INTERVAL if polling else HEARTBEAT)
+
+    def at(t):
+        return base + timedelta(seconds=t)
+
+    def window(i):
+        return {'name': sessions[i][1], 'title': '', 'pid': 0}
+
+    t, current, wakeups, focus_changed = 0.0, 0, 0, True
+    tracker.update(at(0), window(0))
+    while t < end:
+        if polling:
+            # Poll, then sleep; a switch is only noticed at the next tick
+            while current + 1 < len(sessions) and sessions[current + 1][0] <= t:
+                current += 1
+            previous_app = tracker.current_app
+            tracker.update(at(t), window(current))
+            focus_changed = tracker.current_app != previous_app
+            interval = scheduler.next_interval(focus_changed) if adaptive else INTERVAL
+            # The old loop woke every 0.1 s but only ticked every 5 s
+            wakeups += round(interval / wake_every) if wake_every else 1
+            t = min(t + interval, end)
+            continue
+
+        # Event mode: sleep until the next switch or tick
+        interval = scheduler.next_interval(focus_changed) if adaptive else OLD_HEARTBEAT
+        deadline = min(t + interval, end)
+        wakeups += 1
+        if current + 1 < len(sessions) and sessions[current + 1][0] <= deadline:
+            current += 1
+            t = sessions[current][0]
+            tracker.update(at(t), window(current))
+            focus_changed = True
+        else:
+            t = deadline
+            focus_changed = False
+        tracker.update(at(t))
+
+    tracker.update(at(end))
+    expected = truth(sessions, end)
+    error = sum(abs(data_manager.charged.get(app, 0) - seconds) for app, seconds in expected.items()) / 2
+    return wakeups, error, sum(expected.values())
+
+
+def idle_cpu(seconds):
+    """CPU time of the old wait loop and of one scheduler wait"""
+    start = time.process_time()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        threading.Event().wait(0.1)
+    old = time.process_time() - start
+
+    start = time.process_time()
+    TrackingScheduler(seconds).wait(seconds)
+    new = time.process_time() - start
+    return old, new
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    sessions = make_day(hours)
+    end = hours * 3600
+    print(f"{len(sessions)} focus sessions over {hours:g} hours")
+
+    runs = [
+        ("old polling (50 x 0.1 s)", dict(polling=True, adaptive=False, wake_every=0.1)),
+        ("new polling", dict(polling=True, adaptive=True)),
+        (f"old events ({OLD_HEARTBEAT} s heartbeat)", dict(polling=False, adaptive=False)),
+        ("new events (adaptive)", dict(polling=False, adaptive=True)),
+    ]
+    for name, options in runs:
+        wakeups, error, total = simulate(sessions, end, **options)
+        print(f"  {name:28s} {wakeups / hours:8.0f} wakeups/h   "
+              f"misattributed {error / total * 100:5.2f}% of tracked time")
+
+    old, new = idle_cpu(3)
+    print(f"  idle CPU over 3 s: old loop {old * 1000:.1f} ms, scheduler wait {new * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Cold start: import time and time to first paint of the GUI
+
+Each run is a fresh interpreter with HOME pointing at a synthetic
+history. The child reports, from its first line of code:
+
+  import       importing main.py
+  first_paint  ScreenTimeApp built and the window drawn (root.update())
+  tracking     the tracking service created and started
+
+plus which heavy modules were already loaded at first paint, since
+they are meant to arrive only after it. Without a display only the
+import is measured. suite.py runs this too, so the figures are kept
+with the other results and checked by --compare.
+
+Usage: python benchmarks/bench_startup.py [--days 365] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent
+
+# Modules the first paint should not wait for
+HEAVY_MODULES = ('psutil', 'Xlib', 'numpy', 'sqlite3', 'service', 'blocker', 'api_server', 'query')
+
+
+def child():
+    """Runs in the measured interpreter, prints its timings as JSON"""
+    start = time.perf_counter()
+    sys.path.insert(0, str(APP_DIR))
+    import main
+    timings = {'import': (time.perf_counter() - start) * 1000}
+
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        timings['display'] = False
+        print(json.dumps(timings))
+        return
+
+    app = main.ScreenTimeApp(root)
+    root.update()
+    timings['first_paint'] = (time.perf_counter() - start) * 1000
+    timings['loaded_at_paint'] = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    deadline = time.monotonic() + 10
+    while app.service is None and time.monotonic() < deadline:
+        root.update()
+        time.sleep(0.001)
+    timings['tracking'] = (time.perf_counter() - start) * 1000
+    timings['display'] = True
+
+    app.service.close()
+    root.destroy()
+    print(json.dumps(timings))
+
+
+def summarize(times):
+    return {
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'max_ms': max(times),
+        'repeat': len(times)
+    }
+
+
+def measure_startup(days=365, repeat=5):
+    """Start the app repeat times (after one warm-up), results in suite.py's format"""
+    sys.path.insert(0, str(APP_DIR))
+    from synthetic import SyntheticHistory
+
+    home = Path(tempfile.mkdtemp(prefix="screen-time-startup-"))
+    try:
+        SyntheticHistory(days).write(home / ".screen_time_tracker")
+        env = dict(os.environ, HOME=str(home))
+        runs = []
+        for i in range(repeat + 1):
+            output = subprocess.check_output([sys.executable, __file__, '--child'], env=env, cwd=APP_DIR)
+            if i:
+                runs.append(json.loads(output.decode().strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    results = []
+    for stage in ('import', 'first_paint', 'tracking'):
+        times = [run[stage] for run in runs if stage in run]
+        if not times:
+            continue
+        result = {'case': f'startup.{stage}', 'size': days, 'unit': 'days'}
+        result.update(summarize(times))
+        if stage == 'first_paint':
+            result['loaded_at_paint'] = runs[-1]['loaded_at_paint']
+        results.append(result)
+    return results
+
+
+def main():
+    if '--child' in sys.argv:
+        child()
+        return
+
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = measure_startup(args.days, args.repeat)
+    for result in results:
+        print(f"  {result['case']:22s} {args.days:>5d} days   median {result['median_ms']:8.1f} ms"
+              f"   best {result['min_ms']:8.1f} ms")
+        if result.get('loaded_at_paint'):
+            print(f"    loaded before first paint: {', '.join(result['loaded_at_paint'])}")
+    if len(results) == 1:
+        print("  (no display: first paint not measured)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Per-lookup latency of the Linux active-window backends: xdotool vs persistent X11
+
+Needs an X server. Without a desktop, run it under Xvfb:
+    xvfb-run -a python benchmarks/bench_window_lookup.py [iterations]
+
+The script plays window manager itself: it maps a window, sets its
+_NET_WM_PID/_NET_WM_NAME and points the root _NET_ACTIVE_WINDOW at it.
+"""
+
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Xlib import Xatom, display
+
+from tracker import TimeTracker
+from x11_window import X11ActiveWindow
+
+
+def fake_focused_window(disp):
+    """Create a window and advertise it as active the way an EWMH WM would"""
+    root = disp.screen().root
+    window = root.create_window(0, 0, 200, 100, 0, disp.screen().root_depth)
+    window.map()
+
+    net_active = disp.intern_atom('_NET_ACTIVE_WINDOW')
+    net_supported = disp.intern_atom('_NET_SUPPORTED')
+    utf8 = disp.intern_atom('UTF8_STRING')
+
+    window.change_property(disp.intern_atom('_NET_WM_PID'), Xatom.CARDINAL, 32, [os.getpid()])
+    window.change_property(disp.intern_atom('_NET_WM_NAME'), utf8, 8, "Benchmark window".encode())
+    window.set_wm_name("Benchmark window")
+    root.change_property(net_supported, Xatom.ATOM, 32, [net_active])
+    root.change_property(net_active, Xatom.WINDOW, 32, [window.id])
+    disp.sync()
+    return window
+
+
+def time_lookups(lookup, iterations):
+    """Latencies in milliseconds for iterations calls of lookup()"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = lookup()
+        samples.append((time.perf_counter() - start) * 1000)
+        if result is None:
+            raise RuntimeError(f"{lookup.__name__} found no active window")
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:10s} mean {statistics.mean(samples):8.3f} ms   "
+          f"median {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    disp = display.Display()
+    fake_focused_window(disp)
+
+    tracker = TimeTracker(data_manager=None)
+    tracker.x11 = X11ActiveWindow()
+
+    xdotool = time_lookups(tracker._get_active_window_xdotool, iterations)
+    x11 = time_lookups(tracker._get_active_window_linux, iterations)
+
+    print(f"{iterations} lookups each")
+    report("xdotool", xdotool)
+    report("x11", x11)
+    print(f"speedup    {statistics.mean(xdotool) / statistics.mean(x11):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
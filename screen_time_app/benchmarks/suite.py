@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the app's hot paths, with machine-readable results
+
+Generates deterministic synthetic histories (benchmarks/synthetic.py)
+and times, at several sizes:
+
+  data_manager.load          DataManager() on a history (days)
+  data_manager.load_history  reading every stored day (days)
+  data_manager.save          saving after a month of days changed (days)
+  summary.weekly             DataManager.get_weekly_summary (days)
+  statistics.30_days         StatisticsFrame 30-day report (days)
+  statistics.all_time        StatisticsFrame all-time report (days)
+  dashboard.update_display   DashboardFrame refresh (apps used today)
+  blocker.check_and_block    one blocker tick, 1% process churn (processes)
+  startup.*                  cold start of the GUI (days), see bench_startup.py
+
+Results go to a JSON file (benchmarks/results/ by default) with the
+git commit and platform. --compare prints the change in each case's
+fastest run between two result files and exits with 1 if any case got
+slower than --threshold times.
+
+Without a display, DashboardFrame runs against stand-in widgets, so it
+measures the data path only; the result records which was used.
+
+Usage:
+  python benchmarks/suite.py [--days 30,365,1825] [--apps 25,200,1000]
+                             [--processes 1000,10000,50000] [--startup-days 365]
+                             [--repeat 5] [--output FILE]
+  python benchmarks/suite.py --compare BASELINE.json CURRENT.json [--threshold 1.2]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import process_cache
+import process_scanner
+from bench_startup import measure_startup
+from synthetic import FakeProcessTable, SyntheticHistory
+
+# Benchmarks never touch the real ~/.screen_time_tracker
+BENCH_HOME = Path(tempfile.mkdtemp(prefix="screen-time-bench-"))
+
+
+def measure(func, repeat, setup=None):
+    """Wall times of repeat runs after one warm-up, in milliseconds"""
+    times = []
+    for i in range(repeat + 1):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        if i:
+            times.append(elapsed)
+    return {
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'max_ms': max(times),
+        'repeat': repeat
+    }
+
+
+def fresh_home():
+    """Point HOME at a new empty directory, returns the data directory"""
+    home = Path(tempfile.mkdtemp(prefix="home-", dir=BENCH_HOME))
+    os.environ['HOME'] = str(home)
+    return home / ".screen_time_tracker"
+
+
+class StubWidget:
+    """Accepts the calls DashboardFrame makes on labels and the progress bar"""
+
+    def config(self, **options):
+        pass
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class StubTree:
+    def __init__(self):
+        self.items = {}
+
+    def get_children(self):
+        return list(self.items)
+
+    def delete(self, item):
+        del self.items[item]
+
+    def insert(self, parent, index, values):
+        item = len(self.items)
+        self.items[item] = values
+        return item
+
+
+class Report:
+    """Stand-in StatisticsFrame: the report code without the widgets"""
+
+    def __init__(self, data_manager):
+        from ui_components import StatisticsFrame
+        self.data_manager = data_manager
+        self._frame = StatisticsFrame
+
+    def _format_time(self, seconds):
+        return self._frame._format_time(self, seconds)
+
+    def build(self, summary, period_name):
+        return self._frame._build_report(self, summary, period_name)
+
+
+def bench_history(days, repeat, results):
+    from data_manager import DataManager
+
+    data_dir = fresh_home()
+    SyntheticHistory(days).write(data_dir)
+
+    def run(case, func, setup=None):
+        result = {'case': case, 'size': days, 'unit': 'days'}
+        result.update(measure(func, repeat, setup))
+        results.append(result)
+        print(f"  {case:28s} {days:>7d} days   median {result['median_ms']:9.2f} ms")
+
+    def load():
+        DataManager().close()
+
+    run('data_manager.load', load)
+
+    def load_history():
+        data_manager = DataManager()
+        for date_str in data_manager.get_dates():
+            data_manager.get_daily_data(date_str)
+        data_manager.close()
+
+    run('data_manager.load_history', load_history)
+
+    data_manager = DataManager()
+    recent = data_manager.get_dates()[-30:]
+
+    def touch_month():
+        for date_str in recent:
+            data_manager.data.mark_dirty(date_str)
+
+    run('data_manager.save', data_manager.save, setup=touch_month)
+
+    run('summary.weekly', data_manager.get_weekly_summary)
+
+    report = Report(data_manager)
+    run('statistics.30_days', lambda: report.build(data_manager.get_period_summary(30), "30 Days"))
+    run('statistics.all_time', lambda: report.build(data_manager.get_all_time_summary(), "All Time"))
+    data_manager.close()
+
+
+def bench_dashboard(apps, repeat, results):
+    from data_manager import DataManager
+    from ui_components import DashboardFrame
+
+    fresh_home()
+    data_manager = DataManager()
+    today = date.today().isoformat()
+    history = SyntheticHistory(1, apps=apps * 2, apps_per_day=apps)
+    for app_name, app_data in history.day(today).items():
+        data_manager.add_usage(today, app_name, app_data['total_seconds'],
+                               app_data['last_active'], app_data['title'])
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        frame = DashboardFrame(root, data_manager)
+        widgets = 'tk'
+
+        def update():
+            frame.update_display()
+            root.update_idletasks()
+    except Exception:
+        # No display: same method, stand-in widgets
+        root = None
+        frame = DashboardFrame.__new__(DashboardFrame)
+        frame.data_manager = data_manager
+        frame.total_label = frame.progress_label = StubWidget()
+        frame.progress_bar = StubWidget()
+        frame.apps_tree = StubTree()
+        widgets = 'stub'
+        update = frame.update_display
+
+    result = {'case': 'dashboard.update_display', 'size': apps, 'unit': 'apps', 'widgets': widgets}
+    result.update(measure(update, repeat * 4))
+    results.append(result)
+    print(f"  {'dashboard.update_display':28s} {apps:>7d} apps   median {result['median_ms']:9.2f} ms  ({widgets} widgets)")
+
+    if root is not None:
+        root.destroy()
+    data_manager.close()
+
+
+def bench_blocker(processes, repeat, results):
+    from blocker import AppBlocker
+    from data_manager import DataManager
+
+    fresh_home()
+    data_manager = DataManager()
+    history = SyntheticHistory(1)
+    names = history.apps[:50] + [f"system-{i}" for i in range(200)]
+    table = FakeProcessTable(processes, names=names)
+    saved_modules = process_scanner.psutil, process_cache.psutil, process_scanner.time
+    process_scanner.psutil = process_cache.psutil = process_scanner.time = table
+    try:
+        data_manager.save_blocker_rules({
+            'blocked': history.apps[10:13],
+            'limited': {app_name: 3600 for app_name in history.apps[:10]}
+        })
+        app_blocker = AppBlocker(data_manager)
+        app_blocker._show_notification = lambda title, message: None
+
+        result = {'case': 'blocker.check_and_block', 'size': processes, 'unit': 'processes'}
+        result.update(measure(app_blocker.check_and_block, repeat * 4, setup=lambda: table.churn(0.01)))
+        results.append(result)
+        print(f"  {'blocker.check_and_block':28s} {processes:>7d} procs  median {result['median_ms']:9.2f} ms")
+    finally:
+        process_scanner.psutil, process_cache.psutil, process_scanner.time = saved_modules
+        data_manager.close()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(baseline_file, current_file, threshold):
+    """Print per-case changes, returns the number of regressions"""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    with open(current_file) as f:
+        current = json.load(f)
+    before = {(r['case'], r['size']): r for r in baseline['results']}
+
+    # The fastest run is the least disturbed by the rest of the machine
+    print(f"{baseline['meta'].get('commit')} -> {current['meta'].get('commit')}  (best of N, ms)")
+    regressions = 0
+    for result in current['results']:
+        old = before.get((result['case'], result['size']))
+        if old is None:
+            continue
+        ratio = result['min_ms'] / old['min_ms'] if old['min_ms'] else float('inf')
+        mark = ""
+        if ratio > threshold:
+            mark = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 / threshold:
+            mark = "faster"
+        print(f"  {result['case']:28s} {result['size']:>7d} {result['unit']:9s} "
+              f"{old['min_ms']:9.2f} -> {result['min_ms']:9.2f}  x{ratio:5.2f}  {mark}")
+    return regressions
+
+
+def sizes(text):
+    return [int(size) for size in text.split(',') if size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen time benchmark suite")
+    parser.add_argument('--days', type=sizes, default=[30, 365, 1825])
+    parser.add_argument('--apps', type=sizes, default=[25, 200, 1000])
+    parser.add_argument('--processes', type=sizes, default=[1000, 10000, 50000])
+    parser.add_argument('--startup-days', type=sizes, default=[365])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'))
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = []
+    try:
+        for days in args.days:
+            bench_history(days, args.repeat, results)
+        for apps in args.apps:
+            bench_dashboard(apps, args.repeat, results)
+        for processes in args.processes:
+            bench_blocker(processes, args.repeat, results)
+        for days in args.startup_days:
+            for result in measure_startup(days, args.repeat):
+                results.append(result)
+                print(f"  {result['case']:28s} {days:>7d} days   median {result['median_ms']:9.2f} ms")
+    finally:
+        shutil.rmtree(BENCH_HOME, ignore_errors=True)
+
+    commit = git_commit()
+    output = Path(args.output) if args.output else (
+        BENCH_DIR / "results" / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'unknown'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'machine': platform.machine()
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
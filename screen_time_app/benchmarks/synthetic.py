@@ -0,0 +1,205 @@
+"""
+Deterministic synthetic usage histories and process tables for benchmarks
+
+SyntheticHistory generates realistic usage: a few apps take most of
+the time (Zipf-distributed), the set of apps used differs from day to
+day, and window titles churn. Every day is generated from its own seed,
+so any single day (or range) comes out the same whatever else is
+generated. FakeProcessTable stands in for psutil with a synthetic
+process table the blocker can scan.
+"""
+
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import psutil
+
+
+class SyntheticHistory:
+    """days of history ending at end_date, over a pool of apps distinct apps.
+
+    Each day uses about apps_per_day apps, drawn with Zipf weights
+    (rank ** -zipf_s) so the same handful dominate, and splits a daily
+    total of around screen_hours by the same weights with some noise.
+    Each app has a few recurring window titles; with probability
+    title_churn a day's title is a new one instead.
+    """
+
+    def __init__(self, days, apps=200, apps_per_day=25, zipf_s=1.1, title_churn=0.2,
+                 screen_hours=6, end_date=None, seed=42):
+        self.days = days
+        self.apps = [f"app-{i:04d}" for i in range(apps)]
+        self.apps_per_day = min(apps_per_day, apps)
+        self.weights = [1 / rank ** zipf_s for rank in range(1, apps + 1)]
+        self.title_churn = title_churn
+        self.screen_hours = screen_hours
+        self.end_date = end_date or date.today()
+        self.seed = seed
+
+    def dates(self):
+        """Every date of the history, oldest first"""
+        return [(self.end_date - timedelta(days=i)).isoformat() for i in range(self.days - 1, -1, -1)]
+
+    def day(self, date_str):
+        """{app: app_data} for one day, the same on every call"""
+        day = datetime.strptime(date_str, "%Y-%m-%d")
+        rng = random.Random(f"{self.seed}:{date_str}")
+
+        used = {}
+        while len(used) < self.apps_per_day:
+            index = rng.choices(range(len(self.apps)), self.weights)[0]
+            used[index] = self.weights[index] * rng.uniform(0.5, 1.5)
+
+        total = max(rng.gauss(self.screen_hours, self.screen_hours / 3), 0.5) * 3600
+        scale = total / sum(used.values())
+        daily_data = {}
+        for index, weight in used.items():
+            app = self.apps[index]
+            if rng.random() < self.title_churn:
+                title = f"{app} - {rng.getrandbits(32):08x}"
+            else:
+                title = f"{app} - window {rng.randrange(4)}"
+            last_active = day + timedelta(seconds=rng.randrange(8 * 3600, 23 * 3600))
+            daily_data[app] = {
+                'total_seconds': round(weight * scale, 3),
+                'last_active': last_active.isoformat(),
+                'title': title
+            }
+        return daily_data
+
+    def items(self):
+        """Yield (date, daily_data) oldest first"""
+        for date_str in self.dates():
+            yield date_str, self.day(date_str)
+
+    def write(self, data_dir, config=None):
+        """Store the history as the app's month partitions under data_dir"""
+        from partitions import PartitionedUsage
+
+        data_dir = Path(data_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        with open(data_dir / "config.json", 'w') as f:
+            json.dump(config or {}, f)
+        partitions = PartitionedUsage(data_dir / "usage", max_cold=1)
+        for date_str, daily_data in self.items():
+            partitions[date_str] = daily_data
+            if date_str.endswith("-28"):
+                partitions.save()  # Keep memory flat for long histories
+        partitions.save()
+        return data_dir
+
+
+class FakeProcessTable:
+    """Just enough of the psutil API for the blocker and scanner.
+
+    Process names are drawn from names (Zipf-weighted, so a few names
+    have many processes, like browser renderers) or default to generic
+    proc-N names. read_cost seconds are spent on every per-process
+    read, to stand in for opening /proc/<pid>. It also stands in for
+    the time module of process_scanner: each churn() is one tick of
+    tick_seconds on its clock, so process ages look like they would
+    between real blocker ticks.
+    """
+
+    NoSuchProcess = psutil.NoSuchProcess
+    AccessDenied = psutil.AccessDenied
+    ZombieProcess = psutil.ZombieProcess
+
+    def __init__(self, size, names=None, read_cost=0, seed=7, tick_seconds=5):
+        self.rng = random.Random(seed)
+        self.names = names
+        self.weights = [1 / rank for rank in range(1, len(names) + 1)] if names else None
+        self.read_cost = read_cost
+        self.table = {}
+        self.next_pid = 1000
+        self.reads = 0
+        self.terminated = []
+        self.tick_seconds = tick_seconds
+        self.clock = time.time()
+        # The initial table is long-running processes; churn adds new ones
+        for _ in range(size):
+            self.spawn(create_time=self.clock - 3600)
+
+    def _random_name(self):
+        if self.names:
+            return self.rng.choices(self.names, self.weights)[0]
+        return f"proc-{self.rng.randrange(len(self.table) // 4 + 1)}"
+
+    def spawn(self, name=None, create_time=None):
+        self.next_pid += 1
+        self.table[self.next_pid] = (create_time or self.clock, name or self._random_name())
+        return self.next_pid
+
+    def churn(self, fraction):
+        """Replace a fraction of the processes with new ones, one tick later"""
+        self.clock += self.tick_seconds
+        for pid in self.rng.sample(list(self.table), int(len(self.table) * fraction)):
+            del self.table[pid]
+            self.spawn()
+
+    def _read(self, pid):
+        self.reads += 1
+        if self.read_cost:
+            deadline = time.perf_counter() + self.read_cost
+            while time.perf_counter() < deadline:
+                pass
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        return self.table[pid]
+
+    def time(self):
+        return self.clock
+
+    def pids(self):
+        return list(self.table)
+
+    def process_iter(self, attrs):
+        for pid in list(self.table):
+            try:
+                _, name = self._read(pid)
+            except psutil.NoSuchProcess:
+                continue
+            yield FakeProcess(self, pid, {'name': name, 'pid': pid})
+
+    def Process(self, pid):
+        return FakeProcess(self, pid)
+
+
+class FakeProcess:
+    def __init__(self, table, pid, info=None):
+        self.table = table
+        self.pid = pid
+        self.info = info
+
+    def oneshot(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def create_time(self):
+        return self.table._read(self.pid)[0]
+
+    def name(self):
+        return self.table._read(self.pid)[1]
+
+    def ppid(self):
+        return 1
+
+    def exe(self):
+        name = self.table._read(self.pid)[1]
+        return f"/usr/lib/{name}/{name}"
+
+    def cmdline(self):
+        name = self.table._read(self.pid)[1]
+        return [f"/usr/lib/{name}/{name}", f"--user-data-dir=/home/user/.config/{name}", f"--instance={self.pid}"]
+
+    def terminate(self):
+        self.table.terminated.append(self.pid)
+        self.table.table.pop(self.pid, None)
@@ -3,20 +3,53 @@ App Blocker Module
 Blocks or limits access to specific applications
 """
 
-import psutil
+import os
 import platform
-import subprocess
 from datetime import datetime
-from tkinter import messagebox
+
+import psutil
+
+from metrics import metrics
+from notifications import NotificationDispatcher
+from process_scanner import ProcessScanner
+from rule_matcher import RuleMatcher
+
+# Never terminated by a pattern rule, whatever it matches: the display
+# server, the desktop shell and the session around them. A blocked or
+# limited app named explicitly is still enforced.
+PROTECTED_NAMES = {
+    'systemd', 'init', 'dbus-daemon', 'Xorg', 'X', 'Xwayland', 'gnome-shell', 'gnome-session-binary',
+    'kwin_x11', 'kwin_wayland', 'plasmashell', 'ksmserver', 'mutter', 'sway', 'weston',
+    'System', 'csrss.exe', 'wininit.exe', 'winlogon.exe', 'dwm.exe', 'explorer.exe',
+    'launchd', 'WindowServer', 'loginwindow'
+}
 
 
 class AppBlocker:
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, process_cache=None):
         self.data_manager = data_manager
         self.system = platform.system()
         self.blocked_apps = set()
         self.limited_apps = {}  # {app_name: limit_seconds}
         self.warning_shown = {}  # Track if warning already shown
+        self.scanner = ProcessScanner(process_cache)
+        # Notifications are shown on their own thread, never on the tick
+        self.notifier = NotificationDispatcher(
+            self.system,
+            enabled=lambda: self.data_manager.config.get('notifications_enabled', True),
+            coalesce_seconds=self.data_manager.config.get('notification_coalesce_seconds', 10))
+        self.matcher = None  # Pattern rules, see rule_matcher.py
+        self._rule_apps = {}  # {limit rule_id: app names it matched today}
+        self._rule_apps_date = None
+        self._tracked_apps = set()  # Names tracked today already matched against the rules
+        self._spared = set()  # (pid, create_time) of protected processes a rule matched, reported once
+
+        # The tracker and everything it runs under (terminal, session)
+        self._protected_pids = {os.getpid()}
+        try:
+            self._protected_pids.update(parent.pid for parent in psutil.Process().parents())
+        except psutil.Error:
+            pass
         self.load_rules()
 
     def load_rules(self):
@@ -25,6 +58,14 @@ class AppBlocker:
         self.blocked_apps = set(rules.get('blocked', []))
         self.limited_apps = rules.get('limited', {})
 
+        # Pattern rules come from files (possibly thousands of them) and
+        # are compiled into one matcher the scanner runs on new processes
+        patterns = self.data_manager.get_blocker_patterns()
+        self.matcher = RuleMatcher(patterns) if patterns else None
+        self.scanner.set_matcher(self.matcher)
+        self._rule_apps = {}
+        self._tracked_apps = set()
+
     def save_rules(self):
         """Save blocking and limiting rules"""
         rules = {
@@ -55,37 +96,127 @@ class AppBlocker:
 
     def check_and_block(self):
         """Check for blocked/limited apps and take action"""
+        with metrics.timer('blocker.check_and_block'):
+            self._check_and_block()
+
+    def _check_and_block(self):
+        if not self.blocked_apps and not self.limited_apps and self.matcher is None:
+            # Nothing to enforce; the cache would go stale while idle
+            self.scanner.clear()
+            return
+
+        with metrics.timer('blocker.scan'):
+            self.scanner.scan()
+        if self._spared:
+            self._spared = {key for key in self._spared if self.scanner.create_time_of(key[0]) == key[1]}
         today = datetime.now().strftime("%Y-%m-%d")
 
-        # Check blocked apps
-        for proc in psutil.process_iter(['name', 'pid']):
-            try:
-                app_name = proc.info['name']
-
-                # Block completely blocked apps
-                if app_name in self.blocked_apps:
-                    self._block_process(proc, app_name, "This app is blocked")
-
-                # Check limited apps
-                elif app_name in self.limited_apps:
-                    app_data = self.data_manager.get_app_data(today, app_name)
-                    used_seconds = app_data.get('total_seconds', 0)
-                    limit_seconds = self.limited_apps[app_name]
-
-                    if used_seconds >= limit_seconds:
-                        self._block_process(proc, app_name, f"Time limit reached ({self._format_time(limit_seconds)})")
-                    elif used_seconds >= limit_seconds * 0.9:  # 90% of limit
-                        # Show warning at 90%
-                        if app_name not in self.warning_shown:
-                            remaining = limit_seconds - used_seconds
-                            self._show_warning(app_name, remaining)
-                            self.warning_shown[app_name] = True
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-
-    def _block_process(self, process, app_name, reason):
+        # Block completely blocked apps
+        for app_name in list(self.blocked_apps):
+            for pid in self.scanner.pids_for(app_name):
+                self._block_process(pid, app_name, "This app is blocked")
+
+        # Check limited apps
+        for app_name, limit_seconds in list(self.limited_apps.items()):
+            if app_name in self.blocked_apps:
+                continue
+            pids = self.scanner.pids_for(app_name)
+            if not pids:
+                continue
+
+            used_seconds = self.data_manager.get_app_seconds(today, app_name)
+
+            if used_seconds >= limit_seconds:
+                for pid in pids:
+                    self._block_process(pid, app_name, f"Time limit reached ({self._format_time(limit_seconds)})")
+            elif used_seconds >= limit_seconds * 0.9:  # 90% of limit
+                # Show warning at 90%
+                if app_name not in self.warning_shown:
+                    remaining = limit_seconds - used_seconds
+                    self._show_warning(app_name, remaining)
+                    self.warning_shown[app_name] = True
+
+        if self.matcher is not None:
+            self._enforce_pattern_rules(today)
+
+    def _enforce_pattern_rules(self, today):
+        """Block or limit the processes pattern rules matched"""
+        if self._rule_apps_date != today:
+            self._rule_apps = {}
+            self._tracked_apps = set()
+            self._rule_apps_date = today
+
+        matched_rules = self.scanner.matched_rules()
+        if any(self.matcher.rules[rule_id].action == 'limit' for rule_id in matched_rules):
+            self._match_tracked_apps(today)
+
+        for rule_id, pids in matched_rules.items():
+            rule = self.matcher.rules[rule_id]
+            if rule.action == 'block':
+                for pid in pids:
+                    self._block_process(pid, self.scanner.name_of(pid), f"Blocked by rule {rule.label}",
+                                        by_pattern=True)
+                continue
+
+            # A limit covers the day's use of every app the rule matched
+            apps = self._rule_apps.setdefault(rule_id, set())
+            apps.update(name for name in map(self.scanner.name_of, pids) if name)
+            used_seconds = self._rule_usage(today, apps)
+
+            if used_seconds >= rule.limit_seconds:
+                for pid in pids:
+                    self._block_process(pid, self.scanner.name_of(pid),
+                                        f"Time limit reached for {rule.label} ({self._format_time(rule.limit_seconds)})",
+                                        by_pattern=True)
+            elif used_seconds >= rule.limit_seconds * 0.9:
+                if rule.label not in self.warning_shown:
+                    self._show_warning(rule.label, rule.limit_seconds - used_seconds)
+                    self.warning_shown[rule.label] = True
+
+    def _match_tracked_apps(self, today):
+        """Add the apps tracked today to the limit rules their names match
+
+        Apps that are no longer running (or ran before a restart or a
+        rules reload) still count towards a limit. Rules on exe or
+        cmdline only know the apps seen running since.
+        """
+        for app_name in list(self.data_manager.get_daily_data(today)):
+            if app_name in self._tracked_apps:
+                continue
+            self._tracked_apps.add(app_name)
+            for rule_id in self.matcher.match({'name': app_name}, fields=('name',)):
+                if self.matcher.rules[rule_id].action == 'limit':
+                    self._rule_apps.setdefault(rule_id, set()).add(app_name)
+
+    def _rule_usage(self, today, apps):
+        return sum(self.data_manager.get_app_seconds(today, app_name) for app_name in apps)
+
+    def seconds_until_limit(self, app_name):
+        """Seconds of use left before a limited app gets blocked, None if it has no limit"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        remaining = []
+        limit_seconds = self.limited_apps.get(app_name)
+        if limit_seconds is not None and app_name not in self.blocked_apps:
+            remaining.append(limit_seconds - self.data_manager.get_app_seconds(today, app_name))
+        for rule_id, apps in list(self._rule_apps.items()):
+            if app_name in apps:
+                remaining.append(self.matcher.rules[rule_id].limit_seconds - self._rule_usage(today, apps))
+        if not remaining:
+            return None
+        return max(min(remaining), 0)
+
+    def _block_process(self, pid, app_name, reason, by_pattern=False):
         """Block/kill a process"""
+        process = self.scanner.get_process(pid)
+        if process is None:
+            return
+        if self._is_protected(pid, process, app_name if by_pattern else None):
+            key = (pid, self.scanner.create_time_of(pid))
+            if key not in self._spared:
+                self._spared.add(key)
+                print(f"Not blocking {app_name} (pid {pid}): protected system or tracker process")
+            return
+
         try:
             # Show notification
             if self.system == "Windows":
@@ -93,11 +224,12 @@ class AppBlocker:
                 try:
                     import win32gui
                     import win32con
+                    import win32process
 
                     def enum_windows_callback(hwnd, results):
                         if win32gui.IsWindowVisible(hwnd):
-                            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                            if pid == process.info['pid']:
+                            _, window_pid = win32process.GetWindowThreadProcessId(hwnd)
+                            if window_pid == pid:
                                 win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
                                 win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
                         return True
@@ -108,6 +240,7 @@ class AppBlocker:
 
             # Try to terminate the process
             process.terminate()
+            metrics.count('processes_blocked')
 
             # Show system notification
             self._show_notification(f"{app_name} blocked", reason)
@@ -115,19 +248,24 @@ class AppBlocker:
         except Exception as e:
             print(f"Could not block {app_name}: {e}")
 
+    def _is_protected(self, pid, process, app_name=None):
+        """True for processes a broad rule must never take down
+
+        PROTECTED_NAMES are only checked when app_name is given.
+        """
+        if pid <= 1 or pid in self._protected_pids or app_name in PROTECTED_NAMES:
+            return True
+        if self.system == "Linux":
+            try:
+                # Kernel threads: kthreadd and its children
+                return pid == 2 or process.ppid() == 2
+            except psutil.Error:
+                return True
+        return False
+
     def _show_notification(self, title, message):
-        """Show a system notification"""
-        try:
-            if self.system == "Windows":
-                from win10toast import ToastNotifier
-                toaster = ToastNotifier()
-                toaster.show_toast(title, message, duration=5, threaded=True)
-            elif self.system == "Linux":
-                subprocess.run(['notify-send', title, message])
-            elif self.system == "Darwin":
-                subprocess.run(['osascript', '-e', f'display notification "{message}" with title "{title}"'])
-        except Exception as e:
-            print(f"Notification error: {e}")
+        """Queue a system notification; repeats (one per process of an app) are merged"""
+        self.notifier.notify(title, message)
 
     def _show_warning(self, app_name, remaining_seconds):
         """Show warning when approaching time limit"""
@@ -150,6 +288,10 @@ class AppBlocker:
         """Get time limit for an app"""
         return self.limited_apps.get(app_name)
 
+    def close(self):
+        """Show queued notifications and stop the notification thread"""
+        self.notifier.close()
+
     def get_all_rules(self):
         """Get all blocking rules"""
         return {
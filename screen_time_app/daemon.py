@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Screen Time Tracker - headless daemon
+Runs tracking, app blocking and persistence without any GUI.
+
+SIGTERM and SIGINT stop tracking and flush all data to disk.
+SIGHUP reloads config.json and the blocker rules.
+"""
+
+import signal
+import sys
+import time
+
+from service import TrackingService
+
+
+def wait_for_signals(service):
+    """Block in the main thread until asked to stop, reloading on SIGHUP"""
+    if hasattr(signal, 'sigwait'):
+        signals = {signal.SIGTERM, signal.SIGINT, signal.SIGHUP}
+        while True:
+            if signal.sigwait(signals) != signal.SIGHUP:
+                return
+            service.reload()
+            print("Configuration reloaded", flush=True)
+
+    # No sigwait (Windows): handlers only set a flag the loop polls
+    stop_requested = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: stop_requested.append(signum))
+    while not stop_requested:
+        time.sleep(1)
+
+
+def main():
+    # Signals are taken synchronously by the main thread. They are blocked
+    # before any thread starts, so every thread inherits the mask and a
+    # signal can never interrupt the tracking loop mid-write.
+    if hasattr(signal, 'pthread_sigmask'):
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM, signal.SIGINT, signal.SIGHUP})
+
+    service = TrackingService()
+    service.start()
+    print("Screen time daemon started", flush=True)
+    try:
+        wait_for_signals(service)
+    finally:
+        service.close()
+        print("Screen time daemon stopped, data saved", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
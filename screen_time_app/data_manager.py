@@ -5,44 +5,234 @@ Handles all data storage and retrieval
 
 import json
 import os
+import threading
 from pathlib import Path
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import date as date_cls, datetime, timedelta
+
+from intervals import IntervalStore
+from journal import UsageJournal
+from live_totals import LiveTotals
+from metrics import metrics
+from partitions import PartitionedUsage
+from records import UsageRecord, intern_name
+from rollups import UsageRollups
 
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, read_only=False):
         self.data_dir = Path.home() / ".screen_time_tracker"
         self.data_dir.mkdir(exist_ok=True)
 
         self.data_file = self.data_dir / "usage_data.json"
+        self.partition_dir = self.data_dir / "usage"
+        self.archive_dir = self.data_dir / "archive"
         self.config_file = self.data_dir / "config.json"
         self.blocker_file = self.data_dir / "blocker_rules.json"
+        self.patterns_file = self.data_dir / "blocker_patterns.json"
+        self.journal_file = self.data_dir / "usage_journal.log"
+        self.db_file = self.data_dir / "screen_time.db"
+        self.rollups_file = self.data_dir / "rollups.json"
+        self.fleet_file = self.data_dir / "fleet.db"
+        self.interval_dir = self.data_dir / "intervals"
+        self.host_id_file = self.data_dir / "host_id"
 
-        self.data = self.load_data()
+        # A read-only DataManager (fleet.py, run while a tracker may be
+        # running) reads the journal without opening it, and never
+        # compacts, saves or migrates anything the tracker owns
+        self.read_only = read_only
+
+        # The SQLite backend is used once the JSON files have been
+        # migrated into screen_time.db (see sqlite_store.py)
+        self.db = None
+        if self.db_file.exists():
+            from sqlite_store import SqliteStore
+            self.db = SqliteStore(self.db_file)
+
+        # Concurrency model: usage data only changes inside DataManager
+        # methods holding _lock, and the tracker thread is the one steady
+        # writer. The tracked day's dict is updated in place and copied
+        # for readers, and its records are replaced, never changed, so a
+        # copy stays consistent while it is read. Finished days are never
+        # mutated, edits replace the whole day (copy-on-write). After every
+        # change to the tracked day a LiveSnapshot is published in
+        # self.snapshot, which the dashboard, blocker and statistics read
+        # without locking.
+        self._lock = threading.RLock()
+        self.live = None  # LiveTotals for the day being tracked
+        self.snapshot = None  # Latest LiveSnapshot of self.live
+        self._version = 0
         self.config = self.load_config()
+        self.data = self.load_data()
+
+        # Every focus span, for hourly and session statistics; the
+        # totals above stay the source of truth for usage
+        self.intervals = None
+        if self.config.get('intervals_enabled', True) and not read_only:
+            self.intervals = IntervalStore(self.interval_dir)
+
+        # Journal mode: every tick is appended to the log and a background
+        # compactor folds the log into the usage partitions on a schedule
+        self.journal = None
+        self.compactor_thread = None
+        if self.db is None and self.config.get('journal_enabled', True):
+            journal = UsageJournal(self.journal_file, self.config.get('journal_fsync', False))
+            journal.replay(self.data)
+            if not read_only:
+                self.journal = journal
+                self.journal.open()
+                self.start_compactor()
+
+        # Finished days are mirrored into a columnar archive so long-range
+        # statistics are NumPy reductions instead of Python loops. It is
+        # opened on first use, since importing NumPy dominates startup.
+        self._archive = False
+
+        # Finished days are also summed into week and month rollups, so
+        # period statistics only read raw usage for the ragged edges
+        self.rollups = None
+        self._rollup_lock = threading.Lock()
+        if self.db is None and self.config.get('rollups_enabled', True) and not read_only:
+            self.rollups = UsageRollups(self.rollups_file)
+
+        # Every statistics view goes through one range-query engine
+        self._query_engine = None
+        self._fleet = None
+
+    @property
+    def archive(self):
+        """UsageArchive, or None without NumPy or with archive_enabled off"""
+        with self._lock:
+            if self._archive is False:
+                self._archive = None
+                if self.db is None and self.config.get('archive_enabled', True) and not self.read_only:
+                    try:
+                        from archive import UsageArchive
+                        self._archive = UsageArchive(self.archive_dir)
+                    except ImportError:  # NumPy is optional
+                        pass
+            return self._archive
+
+    @archive.setter
+    def archive(self, archive):
+        self._archive = archive
+
+    @property
+    def query_engine(self):
+        """QueryEngine, imported on the first statistics request"""
+        if self._query_engine is None:
+            from query import QueryEngine
+            self._query_engine = QueryEngine(self)
+        return self._query_engine
+
+    @property
+    def fleet(self):
+        """FleetStore of merged host exports, None until fleet.db exists"""
+        if self._fleet is None and self.fleet_file.exists():
+            from fleet import FleetStore
+            self._fleet = FleetStore(self.fleet_file)
+        return self._fleet
+
+    @property
+    def metrics_file(self):
+        """Where the tracker keeps metrics, from the metrics_file setting; None if off"""
+        path = self.config.get('metrics_file')
+        if not path:
+            return None
+        return self.data_dir / Path(path).expanduser()
 
     def load_data(self):
-        """Load usage data from file"""
-        if self.data_file.exists():
+        """Open month-partitioned usage data, history loads on demand"""
+        if self.db:
+            return {}
+
+        data = PartitionedUsage(self.partition_dir, self.config.get('partition_cache_size', 3))
+
+        # One-time split of the old single-file layout into partitions
+        if self.data_file.exists() and not data:
             try:
                 with open(self.data_file, 'r') as f:
-                    return json.load(f)
+                    legacy = json.load(f)
+                for date, daily_data in legacy.items():
+                    data[date] = daily_data
+                if not self.read_only and data.save():
+                    os.replace(self.data_file, self.data_file.with_name(self.data_file.name + ".migrated"))
             except Exception as e:
                 print(f"Error loading data: {e}")
-                return {}
-        return {}
+
+        return data
 
     def save(self):
         """Save usage data to file"""
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving data: {e}")
+        if self.db or self.read_only:
+            # Every update is already committed, or the data is not ours to write
+            return
+        with metrics.timer('save'):
+            if self.journal:
+                self.compact()
+                return
+
+            # Only partitions changed since the last save are rewritten
+            with self._lock:
+                changed = self.data.take_dirty()
+            if not self.data.write(changed):
+                metrics.count('save.errors')
+
+    def compact(self):
+        """Fold the journal into the usage partitions"""
+        with metrics.timer('journal.compact'):
+            with self._lock:
+                self.journal.rotate()
+                changed = self.data.take_dirty()
+                self.journal.open()
+
+            # The rotated segment is only dropped once the partitions holding
+            # its records are safely on disk
+            if self.data.write(changed):
+                self.journal.discard_rotated()
+            else:
+                metrics.count('journal.compact.errors')
+
+    def start_compactor(self):
+        """Start the background journal compactor"""
+        interval = self.config.get('journal_compact_interval', 300)
+        max_bytes = self.config.get('journal_max_bytes', 1024 * 1024)
+        self._compactor_stop = threading.Event()
+
+        def run():
+            elapsed = 0
+            while not self._compactor_stop.wait(5):
+                elapsed += 5
+                pending = self.journal.bytes_written
+                if pending and (elapsed >= interval or pending >= max_bytes):
+                    elapsed = 0
+                    try:
+                        self.compact()
+                    except Exception as e:
+                        print(f"Journal compaction error: {e}")
+
+        self.compactor_thread = threading.Thread(target=run, daemon=True)
+        self.compactor_thread.start()
+
+    def close(self):
+        """Stop background work and flush everything to disk"""
+        if self.compactor_thread:
+            self._compactor_stop.set()
+            self.compactor_thread.join()
+            self.compactor_thread = None
+        self.save()
+        if self.journal:
+            self.journal.close()
+        if self.db:
+            self.db.close()
+        if self._fleet:
+            self._fleet.close()
+        if self.intervals:
+            self.intervals.close()
 
     def load_config(self):
         """Load configuration"""
+        if self.db:
+            return self.db.load_config() or self._default_config()
         if self.config_file.exists():
             try:
                 with open(self.config_file, 'r') as f:
@@ -54,6 +244,11 @@ class DataManager:
 
     def save_config(self):
         """Save configuration"""
+        if self.read_only:
+            return
+        if self.db:
+            self.db.save_config(self.config)
+            return
         try:
             with open(self.config_file, 'w') as f:
                 json.dump(self.config, f, indent=2)
@@ -65,84 +260,209 @@ class DataManager:
         return {
             'daily_goal_seconds': 14400,  # 4 hours
             'notifications_enabled': True,
+            'notification_coalesce_seconds': 10,
             'auto_start': False,
             'theme': 'light',
-            'tracking_interval': 5
+            'tracking_interval': 5,
+            'journal_enabled': True,
+            'journal_fsync': False,
+            'journal_compact_interval': 300,
+            'journal_max_bytes': 1024 * 1024,
+            'partition_cache_size': 3,
+            'archive_enabled': True,
+            'focus_heartbeat_interval': 30,
+            'rollups_enabled': True,
+            'idle_threshold_seconds': 300,
+            'idle_heartbeat_interval': 5,
+            'api_enabled': True,
+            'intervals_enabled': True,
+            'metrics_file': None,
+            'blocker_pattern_files': [],
+            'metrics_write_interval': 60
         }
 
     def get_app_data(self, date, app_name):
         """Get data for a specific app on a specific date"""
-        if date not in self.data:
-            self.data[date] = {}
-        if app_name not in self.data[date]:
-            self.data[date][app_name] = {
-                'total_seconds': 0,
-                'last_active': None,
-                'title': ''
-            }
-        return self.data[date][app_name]
+        if self.db:
+            return self.db.get_app_data(date, app_name)
+        with self._lock:
+            if date not in self.data:
+                self.data[date] = {}
+            daily_data = self.data[date]
+            app_data = daily_data.get(app_name)
+            if app_data is None:
+                app_data = daily_data[intern_name(app_name)] = UsageRecord()
+                self.data.mark_dirty(date)
+            return app_data
 
     def update_app_data(self, date, app_name, app_data):
         """Update data for a specific app"""
-        if date not in self.data:
-            self.data[date] = {}
-        self.data[date][app_name] = app_data
+        with self._lock:
+            if self.live and self.live.date == date:
+                self.live = None  # Rebuilt on next use
+                self._publish()
+            if self.db:
+                self.db.update_app_data(date, app_name, app_data)
+                return
+
+            # Replace the day instead of editing it, readers may hold it
+            old_daily_data = self.data.get(date, {})
+            daily_data = dict(old_daily_data)
+            daily_data[app_name] = UsageRecord.from_dict(app_data)
+            self.data[date] = daily_data
+            if self.rollups and date <= self.rollups.through:
+                # An already folded day was edited
+                with self._rollup_lock:
+                    self.rollups.replace_day(date, old_daily_data, daily_data)
+                    self.rollups.save()
+            archive = self.archive
+            if archive and date <= (archive.last_date or ''):
+                archive.replace_day(date, daily_data)
+            if self.journal:
+                self.journal.append(date, app_name, 0, app_data)
+
+    def add_usage(self, date, app_name, seconds, last_active, title, span_end=None):
+        """Add tracked time to an app and journal the delta
+
+        The seconds are recorded as a focus span ending at span_end
+        (a datetime), by default at last_active.
+        """
+        with self._lock:
+            live = self._live_totals(date)
+            if self.db:
+                app_data = self.db.add_usage(date, app_name, seconds, last_active, title)
+            else:
+                if date not in self.data:
+                    self.data[date] = {}
+                daily_data = self.data[date]
+                # A new record replaces the old one, which readers may hold
+                old_data = daily_data.get(app_name)
+                total_seconds = old_data.get('total_seconds', 0) if old_data is not None else 0
+                app_data = UsageRecord(total_seconds + seconds, last_active, title)
+                daily_data[intern_name(app_name)] = app_data
+                self.data.mark_dirty(date)
+                if self.journal:
+                    self.journal.append(date, app_name, seconds, app_data)
+            live.add(app_name, seconds)
+            self._publish()
+        # The interval store locks on its own, its writes stay off _lock
+        if self.intervals:
+            self.intervals.add(date, span_end or datetime.fromisoformat(last_active), seconds, app_name, title)
+        return app_data
+
+    def _publish(self):
+        """Publish a new snapshot of the tracked day (caller holds _lock)"""
+        self._version += 1
+        self.snapshot = self.live.snapshot(self._version) if self.live else None
+
+    def _live_totals(self, date):
+        """Running totals for the tracked day, rebuilt when the day changes"""
+        if self.live is None or self.live.date != date:
+            if self.rollups and self.live is not None and self.live.date < date:
+                # The tracked day just ended, fold it in off the tracking thread
+                threading.Thread(target=self.refresh_rollups, daemon=True).start()
+            self.live = LiveTotals(date, self.get_daily_data(date))
+        return self.live
+
+    def get_total_seconds(self, date):
+        """Get total tracked seconds for a date"""
+        snapshot = self.snapshot
+        if snapshot and snapshot.date == date:
+            return snapshot.total_seconds
+        with self._lock:
+            if self.live and self.live.date == date:
+                return self.live.total_seconds
+            daily_data = self.get_daily_data(date)
+            return sum(app.get('total_seconds', 0) for app in daily_data.values())
+
+    def get_app_seconds(self, date, app_name):
+        """Get tracked seconds for one app on a date"""
+        snapshot = self.snapshot
+        if snapshot and snapshot.date == date:
+            return snapshot.get(app_name)
+        with self._lock:
+            if self.live and self.live.date == date:
+                return self.live.get(app_name)
+            app_data = self.get_daily_data(date).get(app_name)
+            return app_data.get('total_seconds', 0) if app_data else 0
 
     def get_daily_data(self, date):
         """Get all data for a specific date"""
+        if self.db:
+            return self.db.get_daily_data(date)
+        live = self.live
+        if live is not None and live.date == date:
+            # The tracked day changes under the writer, hand out a copy
+            with self._lock:
+                return dict(self.data.get(date, {}))
         return self.data.get(date, {})
 
+    def get_dates(self, start_date=None, end_date=None):
+        """Get the sorted dates with data in a range"""
+        if self.db:
+            return self.db.get_dates(start_date, end_date)
+        start_date = start_date or ''
+        end_date = end_date or '9999-12-31'
+        return [date for date in self.data if start_date <= date <= end_date]
+
     def get_date_range_data(self, start_date, end_date):
         """Get data for a date range"""
+        if self.db:
+            stored = self.db.get_date_range_data(start_date, end_date)
         result = {}
         current = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
 
         while current <= end:
             date_str = current.strftime("%Y-%m-%d")
-            result[date_str] = self.get_daily_data(date_str)
+            result[date_str] = stored.get(date_str, {}) if self.db else self.get_daily_data(date_str)
             current += timedelta(days=1)
 
         return result
 
     def get_top_apps(self, date, limit=10):
         """Get top apps by usage for a specific date"""
+        snapshot = self.snapshot
+        if snapshot and snapshot.date == date:
+            return snapshot.top(limit)
+        with self._lock:
+            if self.live and self.live.date == date:
+                return self.live.top(limit)
+        if self.db:
+            return self.db.get_top_apps(date, limit)
         daily_data = self.get_daily_data(date)
         apps = [(app, data.get('total_seconds', 0)) for app, data in daily_data.items()]
         apps.sort(key=lambda x: x[1], reverse=True)
         return apps[:limit]
 
-    def get_weekly_summary(self):
+    def get_weekly_summary(self, cancel=None):
         """Get summary for the last 7 days"""
-        summary = {
-            'total_seconds': 0,
-            'daily_average': 0,
-            'top_apps': defaultdict(int),
-            'days': []
-        }
-
-        for i in range(7):
-            date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            daily_data = self.get_daily_data(date)
-
-            daily_total = sum(app.get('total_seconds', 0) for app in daily_data.values())
-            summary['days'].append({
-                'date': date,
-                'total_seconds': daily_total
-            })
+        return self.get_period_summary(7, top_n=5, cancel=cancel)
 
-            for app_name, app_data in daily_data.items():
-                summary['top_apps'][app_name] += app_data.get('total_seconds', 0)
+    def get_period_summary(self, days, top_n=10, cancel=None):
+        """Get summary for the last N days"""
+        today = date_cls.today()
+        start_date = (today - timedelta(days=days - 1)).isoformat()
+        return self.query_engine.summary(start_date, today.isoformat(), top_n, cancel)
 
-            summary['total_seconds'] += daily_total
+    def get_all_time_summary(self, top_n=10, cancel=None):
+        """Get summary over every day with data"""
+        return self.query_engine.summary(top_n=top_n, cancel=cancel)
 
-        summary['daily_average'] = summary['total_seconds'] / 7
-        summary['top_apps'] = sorted(summary['top_apps'].items(), key=lambda x: x[1], reverse=True)[:5]
+    def query(self, start_date=None, end_date=None, group_by='app', top_n=None, apps=None, exclude=None):
+        """Usage totals for a range grouped by day, week or app (see QueryEngine.query)"""
+        return self.query_engine.query(start_date, end_date, group_by, top_n, apps, exclude)
 
-        return summary
+    def refresh_rollups(self, cancel=None):
+        """Fold every finished day into the rollups"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self._rollup_lock:
+            self.rollups.refresh(self.data, today, cancel)
 
     def get_blocker_rules(self):
         """Load blocker rules"""
+        if self.db:
+            return self.db.get_blocker_rules()
         if self.blocker_file.exists():
             try:
                 with open(self.blocker_file, 'r') as f:
@@ -152,8 +472,30 @@ class DataManager:
                 return {'blocked': [], 'limited': {}}
         return {'blocked': [], 'limited': {}}
 
+    def get_blocker_patterns(self):
+        """Pattern blocker rules from blocker_patterns.json and the blocker_pattern_files"""
+        paths = [self.patterns_file]
+        paths += [self.data_dir / Path(path).expanduser() for path in self.config.get('blocker_pattern_files', [])]
+        rules = []
+        for path in paths:
+            if not path.exists():
+                if path != self.patterns_file:
+                    print(f"Blocker pattern file not found: {path}")
+                continue
+            try:
+                with open(path, 'r') as f:
+                    loaded = json.load(f)
+                # Either a list of rules or {"rules": [...]}
+                rules.extend(loaded.get('rules', []) if isinstance(loaded, dict) else loaded)
+            except Exception as e:
+                print(f"Error loading blocker patterns from {path}: {e}")
+        return rules
+
     def save_blocker_rules(self, rules):
         """Save blocker rules"""
+        if self.db:
+            self.db.save_blocker_rules(rules)
+            return
         try:
             with open(self.blocker_file, 'w') as f:
                 json.dump(rules, f, indent=2)
@@ -163,10 +505,27 @@ class DataManager:
     def cleanup_old_data(self, days=30):
         """Remove data older than N days"""
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        dates_to_remove = [date for date in self.data.keys() if date < cutoff_date]
+        if self.intervals:
+            self.intervals.delete_before(cutoff_date)
+        if self.db:
+            self.db.delete_before(cutoff_date)
+            return
+
+        with self._lock:
+            dates_to_remove = [date for date in self.data.keys() if date < cutoff_date]
+
+            for date in dates_to_remove:
+                if self.rollups:
+                    with self._rollup_lock:
+                        self.rollups.replace_day(date, self.data[date], None)
+                del self.data[date]
+
+        if self.rollups and dates_to_remove:
+            with self._rollup_lock:
+                self.rollups.save()
 
-        for date in dates_to_remove:
-            del self.data[date]
+        if self.archive:
+            self.archive.drop_before(cutoff_date)
 
         if dates_to_remove:
             self.save()
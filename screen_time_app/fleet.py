@@ -0,0 +1,275 @@
+"""
+Fleet Module
+Host-tagged usage exports and a merge engine for reports across machines
+"""
+
+import gzip
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import uuid
+from datetime import date as date_cls, datetime
+from pathlib import Path
+
+from records import date_to_ordinal, ordinal_to_date
+
+EXPORT_FORMAT = 'screen-time-export'
+EXPORT_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    host_id TEXT PRIMARY KEY,
+    host_name TEXT NOT NULL,
+    exported_at TEXT NOT NULL,
+    imported_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS usage (
+    host_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    app TEXT NOT NULL,
+    total_seconds REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (host_id, date, app)
+) WITHOUT ROWID;
+"""
+
+
+def host_identity(data_manager):
+    """(host_id, host_name) of this machine, creating the id on first use.
+
+    Hostnames repeat across a fleet (and change), so hosts are told
+    apart by a random id kept in its own host_id file. Not config.json:
+    a running GUI rewrites that from its own copy on every settings save.
+    """
+    path = data_manager.host_id_file
+    try:
+        host_id = path.read_text(encoding='utf-8').strip()
+    except OSError:
+        host_id = ''
+    if not host_id:
+        # Ids created before they moved out of config.json are kept
+        host_id = data_manager.config.get('host_id') or uuid.uuid4().hex
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(host_id + '\n', encoding='utf-8')
+        os.replace(tmp_path, path)
+    return host_id, socket.gethostname()
+
+
+def _open(path, mode):
+    """Open an export, gzip-compressed if the name ends in .gz"""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def export_lines(data_manager, start_date=None, end_date=None):
+    """Yield this host's usage as export lines: a header, then one line per (date, app)"""
+    host_id, host_name = host_identity(data_manager)
+    yield json.dumps({
+        'format': EXPORT_FORMAT,
+        'version': EXPORT_VERSION,
+        'host_id': host_id,
+        'host_name': host_name,
+        'exported_at': datetime.now().isoformat()
+    })
+    for date in data_manager.get_dates(start_date, end_date):
+        for app_name, app_data in data_manager.get_daily_data(date).items():
+            yield json.dumps({'date': date, 'app': app_name,
+                              'seconds': app_data.get('total_seconds', 0)})
+
+
+def export_usage(data_manager, path, start_date=None, end_date=None):
+    """Write a host-tagged export file (JSON Lines, .gz to compress), returns rows written"""
+    path = Path(path)
+    tmp_path = path.with_name('.tmp-' + path.name)
+    rows = -1
+    with _open(tmp_path, 'w') as f:
+        for line in export_lines(data_manager, start_date, end_date):
+            f.write(line + '\n')
+            rows += 1
+    os.replace(tmp_path, path)
+    return rows
+
+
+class FleetStore:
+    """Usage of many hosts merged into one SQLite database.
+
+    Every row is keyed by (host_id, date, app). Importing an export
+    first clears that host's rows for each date it contains and then
+    inserts the export's rows, so importing the same or a newer export
+    again replaces instead of double counting, and an older export of
+    a host is skipped. Imports stream line by line in batches, so
+    memory stays flat however large the export. Merged views sum
+    every host's seconds.
+
+    Rows are clustered by host, so an import only rewrites that host's
+    pages. There is deliberately no (date, app) index: every import
+    would dirty all of it, and a merged range scan stays cheap.
+    """
+
+    def __init__(self, db_file, batch_size=5000):
+        self.db_file = Path(db_file)
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
+
+    # Import
+
+    def import_file(self, path):
+        """Merge one export file, returns rows imported (None if stale)"""
+        with _open(path, 'r') as f:
+            return self.import_lines(f)
+
+    def import_lines(self, lines):
+        """Merge an export given as an iterable of lines, returns rows imported (None if stale)"""
+        lines = iter(lines)
+        header = json.loads(next(lines, 'null'))
+        if not isinstance(header, dict) or header.get('format') != EXPORT_FORMAT:
+            raise ValueError("not a screen time export")
+        if header.get('version') != EXPORT_VERSION:
+            raise ValueError(f"unsupported export version {header.get('version')}")
+        host_id = header['host_id']
+        exported_at = header['exported_at']
+
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT exported_at FROM hosts WHERE host_id = ?", (host_id,)
+            ).fetchone()
+            if row and row[0] > exported_at:
+                return None  # Older than what is merged already
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO hosts (host_id, host_name, exported_at, imported_at) "
+                "VALUES (?, ?, ?, ?)",
+                (host_id, header.get('host_name') or host_id, exported_at, datetime.now().isoformat())
+            )
+
+            cleared = set()
+            batch = []
+            count = 0
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                date = record['date']
+                if date not in cleared:
+                    # This export is now the truth for the host on that day
+                    self.conn.execute(
+                        "DELETE FROM usage WHERE host_id = ? AND date = ?", (host_id, date))
+                    cleared.add(date)
+                batch.append((host_id, date, record['app'], record['seconds']))
+                count += 1
+                if len(batch) >= self.batch_size:
+                    self._insert(batch)
+            self._insert(batch)
+        return count
+
+    def _insert(self, batch):
+        """Write and empty a batch of rows (caller holds _lock in a transaction)"""
+        if batch:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO usage (host_id, date, app, total_seconds) VALUES (?, ?, ?, ?)",
+                batch
+            )
+            batch.clear()
+
+    def remove_host(self, host_id):
+        """Drop a host and all of its usage"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM usage WHERE host_id = ?", (host_id,))
+            self.conn.execute("DELETE FROM hosts WHERE host_id = ?", (host_id,))
+
+    # Queries
+
+    def hosts(self):
+        """[(host_id, host_name, exported_at)] sorted by name"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT host_id, host_name, exported_at FROM hosts ORDER BY host_name, host_id"
+            ).fetchall()
+
+    def get_grouped_totals(self, start_date=None, end_date=None, group_by='date', host_id=None):
+        """Get {date, app or host_id: total_seconds} for a range, all hosts or one"""
+        if group_by not in ('date', 'app', 'host_id'):
+            raise ValueError(f"Cannot group usage by {group_by}")
+        sql = f"SELECT {group_by}, SUM(total_seconds) FROM usage WHERE date BETWEEN ? AND ?"
+        params = [start_date or '', end_date or '9999-12-31']
+        if host_id is not None:
+            sql += " AND host_id = ?"
+            params.append(host_id)
+        with self._lock:
+            rows = self.conn.execute(sql + f" GROUP BY {group_by}", params).fetchall()
+        return dict(rows)
+
+    def summary(self, start_date=None, end_date=None, top_n=10, host_id=None):
+        """Same report as QueryEngine.summary, merged over hosts or for one host"""
+        daily_totals = self.get_grouped_totals(start_date, end_date, 'date', host_id)
+        app_totals = self.get_grouped_totals(start_date, end_date, 'app', host_id)
+        total_seconds = sum(daily_totals.values())
+
+        if start_date is None:
+            dates = sorted(daily_totals, reverse=True)
+        else:
+            end_date = end_date or date_cls.today().isoformat()
+            dates = [ordinal_to_date(ordinal) for ordinal in
+                     range(date_to_ordinal(end_date), date_to_ordinal(start_date) - 1, -1)]
+
+        return {
+            'total_seconds': total_seconds,
+            'daily_average': total_seconds / (len(dates) or 1),
+            'top_apps': sorted(app_totals.items(), key=lambda x: x[1], reverse=True)[:top_n],
+            'days': [{'date': date, 'total_seconds': daily_totals.get(date, 0)} for date in dates]
+        }
+
+
+if __name__ == "__main__":
+    # python fleet.py export FILE        write this host's export
+    # python fleet.py import FILE...     merge exports (and this host) into fleet.db
+    # python fleet.py hosts              list merged hosts
+    from data_manager import DataManager
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'hosts'
+    # Usually run while the GUI or daemon is tracking, so leave its
+    # journal and usage files alone
+    data_manager = DataManager(read_only=True)
+    try:
+        if command == 'export' and len(sys.argv) == 3:
+            count = export_usage(data_manager, sys.argv[2])
+            print(f"Exported {count} usage rows to {sys.argv[2]}")
+        elif command == 'import':
+            fleet = FleetStore(data_manager.fleet_file)
+            count = fleet.import_lines(export_lines(data_manager))
+            print(f"Merged {count} usage rows from this host")
+            for path in sys.argv[2:]:
+                count = fleet.import_file(path)
+                if count is None:
+                    print(f"Skipped {path}, its host has newer data merged already")
+                else:
+                    print(f"Merged {count} usage rows from {path}")
+            fleet.close()
+        elif command == 'hosts':
+            fleet = FleetStore(data_manager.fleet_file)
+            for host_id, host_name, exported_at in fleet.hosts():
+                print(f"{host_name:30s} {host_id}  exported {exported_at}")
+            fleet.close()
+        else:
+            print(__doc__.strip())
+            print("Usage: python fleet.py export FILE | import [FILE...] | hosts")
+            sys.exit(2)
+    except Exception as e:
+        print(f"Fleet {command} failed: {e}")
+        sys.exit(1)
+    finally:
+        data_manager.close()
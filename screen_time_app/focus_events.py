@@ -0,0 +1,108 @@
+"""
+Focus Events Module
+Event-driven focus tracking from X11 PropertyNotify on _NET_ACTIVE_WINDOW
+"""
+
+import os
+import platform
+import select
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class FocusEventSource:
+    """Reports focus switches with their exact timestamps.
+
+    A background thread blocks in select() on a dedicated X connection
+    (and a stop pipe), so it costs nothing while focus is stable. Each
+    _NET_ACTIVE_WINDOW change is resolved to a window dict right away,
+    so several switches between two ticks are still attributed exactly.
+    """
+
+    def __init__(self, resolve_window):
+        from Xlib import X
+        from x11_window import X11ActiveWindow
+
+        self.X = X
+        self.resolve_window = resolve_window
+        self.x11 = X11ActiveWindow()
+        self.x11.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.x11.display.flush()
+
+        self.wake = threading.Event()
+        self._events = deque()
+        self._events_lock = threading.Lock()
+        self._stop_read, self._stop_write = os.pipe()
+        self._running = True
+        self._last_window_id = self.x11.get_active_window_id()
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """Wait for PropertyNotify events and queue focus switches"""
+        disp = self.x11.display
+        try:
+            while self._running:
+                # Events may already be buffered from the last read
+                if not disp.pending_events():
+                    readable, _, _ = select.select([disp, self._stop_read], [], [])
+                    if self._stop_read in readable:
+                        break
+
+                while disp.pending_events():
+                    event = disp.next_event()
+                    if event.type != self.X.PropertyNotify or event.atom != self.x11.NET_ACTIVE_WINDOW:
+                        continue
+
+                    switch_time = datetime.now()
+                    window_id = self.x11.get_active_window_id()
+                    if window_id == self._last_window_id:
+                        continue
+                    self._last_window_id = window_id
+
+                    x11_window = self.x11.get_active_window()
+                    window = self.resolve_window(x11_window) if x11_window else None
+                    with self._events_lock:
+                        self._events.append((switch_time, window))
+                    self.wake.set()
+        except Exception as e:
+            print(f"Focus event error: {e}")
+        finally:
+            self._running = False
+            self.wake.set()
+
+    @property
+    def running(self):
+        return self._running
+
+    def wait(self, timeout):
+        """Block until a focus switch or timeout, returns [(switch_time, window)]"""
+        self.wake.wait(timeout)
+        self.wake.clear()
+        with self._events_lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def stop(self):
+        """Stop the event thread and wake any waiter"""
+        self._running = False
+        os.write(self._stop_write, b'x')
+        self.wake.set()
+        self.thread.join(timeout=1)
+        self.x11.close()
+        os.close(self._stop_read)
+        os.close(self._stop_write)
+
+
+def create_focus_source(tracker):
+    """Start a FocusEventSource if this platform supports it, else None"""
+    if platform.system() != "Linux":
+        return None
+    try:
+        return FocusEventSource(tracker.window_from_x11)
+    except Exception:
+        # No python-xlib or no X server: keep polling
+        return None
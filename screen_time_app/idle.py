@@ -0,0 +1,95 @@
+"""
+Idle Module
+Detects when nobody is at the machine: no recent input or a locked session
+"""
+
+import ctypes
+import os
+import platform
+import subprocess
+import time
+
+
+def windows_idle_seconds():
+    """Seconds since the last keyboard or mouse input on Windows"""
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(info)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+def macos_idle_seconds():
+    """Seconds since the last keyboard or mouse input on macOS"""
+    import Quartz
+    return Quartz.CGEventSourceSecondsSinceLastEventType(
+        Quartz.kCGEventSourceStateCombinedSessionState, Quartz.kCGAnyInputEventType)
+
+
+def logind_locked():
+    """LockedHint of the current logind session, None if it cannot be read"""
+    session = os.environ.get('XDG_SESSION_ID', 'self')
+    try:
+        output = subprocess.check_output(
+            ['loginctl', 'show-session', session, '-p', 'LockedHint', '--value'],
+            stderr=subprocess.DEVNULL, timeout=2
+        ).decode().strip()
+    except Exception:
+        return None
+    if output not in ('yes', 'no'):
+        return None
+    return output == 'yes'
+
+
+class IdleDetector:
+    """Tells the tracker when the user is away.
+
+    Away means no keyboard or mouse input for threshold seconds, or a
+    locked session. Input idle time comes from input_idle, a callable
+    returning seconds (None if unknown). The logind lock state costs a
+    loginctl call, so it is only checked once input has been idle for
+    lock_check_after seconds, and at most that often.
+    """
+
+    def __init__(self, threshold=300, input_idle=None, lock_check_after=30):
+        self.threshold = threshold
+        self.input_idle = input_idle
+        self.lock_check_after = lock_check_after
+        self.idle_seconds = 0
+        self.locked = False
+        self.use_logind = platform.system() == "Linux"
+        self._next_lock_check = 0
+
+    @property
+    def away(self):
+        return self.locked or self.idle_seconds >= self.threshold
+
+    def check(self):
+        """Refresh idle and lock state, returns how many recent seconds not to count"""
+        was_away = self.away
+
+        idle_seconds = None
+        if self.input_idle:
+            try:
+                idle_seconds = self.input_idle()
+            except Exception:
+                idle_seconds = None
+        self.idle_seconds = idle_seconds or 0
+
+        if idle_seconds is not None and idle_seconds < self.lock_check_after:
+            self.locked = False  # Someone is typing, so not locked
+        elif self.use_logind and time.monotonic() >= self._next_lock_check:
+            self._next_lock_check = time.monotonic() + self.lock_check_after
+            locked = self.locked = logind_locked()
+            if locked is None:
+                # No logind session to ask
+                self.use_logind = False
+                self.locked = False
+
+        if self.locked or was_away:
+            # Locked, or just back: the interval was spent away
+            return float('inf')
+        return max(self.idle_seconds - self.threshold, 0)
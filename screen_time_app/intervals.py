@@ -0,0 +1,398 @@
+"""
+Intervals Module
+Compact append-only record of every focus span, for "when" statistics
+"""
+
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _varint_tail(data, pos, value):
+    """Finish a varint whose first byte (value, continuation bit set) is already read"""
+    value &= 0x7F
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+@lru_cache(maxsize=64)
+def _day_start(date):
+    """Epoch seconds of a day's local midnight"""
+    return datetime.strptime(date, "%Y-%m-%d").timestamp()
+
+
+def _day_is_regular(date):
+    """Whether date and the days either side of it are 24 hours long (no clock change)"""
+    day = datetime.strptime(date, "%Y-%m-%d")
+    before = (day - timedelta(days=1)).strftime("%Y-%m-%d")
+    after = (day + timedelta(days=1)).strftime("%Y-%m-%d")
+    return _day_start(after) - _day_start(before) == 2 * 86400
+
+
+class Segment:
+    """Decoded spans of one day, as parallel columns.
+
+    starts and durations are milliseconds of elapsed time from that day's
+    local midnight (a span that began the evening before starts below
+    zero), so a day with a clock change still counts every hour once.
+    apps and titles index into strings.
+    """
+
+    __slots__ = ('date', 'starts', 'durations', 'apps', 'titles', 'strings', 'size')
+
+    def __init__(self, date):
+        self.date = date
+        self.starts = array('q')
+        self.durations = array('q')
+        self.apps = array('l')
+        self.titles = array('l')
+        self.strings = []
+        self.size = 0  # Bytes of complete records decoded
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def decode(cls, date, data):
+        """Decode a segment, stopping at a torn record at the end"""
+        segment = cls(date)
+        strings = segment.strings
+        starts, durations, apps, titles = segment.starts, segment.durations, segment.apps, segment.titles
+        pos = end = complete = 0
+        try:
+            while pos < len(data):
+                tag = data[pos]
+                pos += 1
+                if tag & 0x80:
+                    tag, pos = _varint_tail(data, pos, tag)
+
+                if tag & 1:
+                    # New string: the length, then UTF-8 bytes
+                    length = tag >> 1
+                    if pos + length > len(data):
+                        break
+                    strings.append(data[pos:pos + length].decode('utf-8'))
+                    pos += length
+                else:
+                    # Span: gap since the previous span ended, duration, app, title
+                    start = end + _unzigzag(tag >> 1)
+                    duration = data[pos]
+                    pos += 1
+                    if duration & 0x80:
+                        duration, pos = _varint_tail(data, pos, duration)
+                    app = data[pos]
+                    pos += 1
+                    if app & 0x80:
+                        app, pos = _varint_tail(data, pos, app)
+                    title = data[pos]
+                    pos += 1
+                    if title & 0x80:
+                        title, pos = _varint_tail(data, pos, title)
+                    if app >= len(strings) or title >= len(strings):
+                        break  # Corrupt
+                    end = start + duration
+                    starts.append(start)
+                    durations.append(duration)
+                    apps.append(app)
+                    titles.append(title)
+                complete = pos
+        except (IndexError, UnicodeDecodeError):
+            pass  # Torn record at the end
+        segment.size = complete
+        return segment
+
+
+class IntervalStore:
+    """Every focus span as (start, duration, app, title) in daily segments.
+
+    Each day is one append-only file of varint records. A span stores
+    its start as the gap since the previous span ended (zero while
+    focus moves straight from app to app) and its duration in
+    milliseconds. App and title are ids into strings defined in the
+    same segment the first time they appear. A typical span is five or
+    six bytes.
+
+    add() extends the span in progress while the same window keeps
+    focus without a gap, and writes it when focus moves on or after
+    flush_seconds, so a crash loses at most that much detail; totals
+    are kept by DataManager regardless. Decoded segments of finished
+    days are cached, since they never change.
+    """
+
+    def __init__(self, directory, flush_seconds=60, cache_size=31):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_ms = flush_seconds * 1000
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pending = None  # [date, start, end, app, title] of the span in progress
+        self._file = None
+        self._file_date = None
+        self._ids = {}
+        self._end = 0  # End of the last span written to the open segment
+
+    def _path(self, date):
+        return self.directory / f"{date}.seg"
+
+    # Writing
+
+    def add(self, date, end_time, seconds, app_name, title=''):
+        """Record seconds of focus on a window ending at end_time, credited to date
+
+        A naive end_time is taken as local time.
+        """
+        title = title or ''
+        end = round((end_time.timestamp() - _day_start(date)) * 1000)
+        start = end - round(seconds * 1000)
+        with self._lock:
+            pending = self._pending
+            if (pending and pending[0] == date and pending[3] == app_name and pending[4] == title
+                    and abs(start - pending[2]) <= 1 and end - pending[1] <= self.flush_ms):
+                pending[2] = end
+                return
+            if pending:
+                self._write(*pending)
+            self._pending = [date, start, end, app_name, title]
+
+    def flush(self):
+        """Write the span in progress"""
+        with self._lock:
+            if self._pending:
+                self._write(*self._pending)
+                self._pending = None
+
+    def close(self):
+        """Write the span in progress and close the open segment"""
+        self.flush()
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+                self._file_date = None
+
+    def _open_segment(self, date):
+        """Open a day's segment for appending, picking up where it ends (caller holds _lock)"""
+        if self._file:
+            self._file.close()
+        path = self._path(date)
+        segment = Segment.decode(date, path.read_bytes()) if path.exists() else Segment(date)
+        self._file = open(path, 'ab')
+        if self._file.tell() > segment.size:
+            self._file.truncate(segment.size)  # Drop a record torn by a crash
+        self._file_date = date
+        self._ids = {name: i for i, name in enumerate(segment.strings)}
+        self._end = segment.starts[-1] + segment.durations[-1] if len(segment) else 0
+
+    def _write(self, date, start, end, app_name, title):
+        """Append one span to its day's segment (caller holds _lock)"""
+        try:
+            if self._file_date != date:
+                self._open_segment(date)
+            out = bytearray()
+            ids = self._ids
+            for name in (app_name, title):
+                if name not in ids:
+                    encoded = name.encode('utf-8')
+                    _put_varint(out, (len(encoded) << 1) | 1)
+                    out += encoded
+                    ids[name] = len(ids)
+            _put_varint(out, _zigzag(start - self._end) << 1)
+            _put_varint(out, end - start)
+            _put_varint(out, ids[app_name])
+            _put_varint(out, ids[title])
+            self._file.write(out)
+            self._file.flush()
+            self._end = end
+        except OSError as e:
+            print(f"Error writing intervals: {e}")
+
+    # Reading
+
+    def dates(self, start_date=None, end_date=None):
+        """Sorted dates with a segment in a range"""
+        start_date = start_date or ''
+        end_date = end_date or '9999-12-31'
+        return sorted(path.stem for path in self.directory.glob("*.seg")
+                      if start_date <= path.stem <= end_date)
+
+    def segment(self, date):
+        """Decoded Segment of a day, including the span in progress"""
+        path = self._path(date)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        with self._lock:
+            pending = list(self._pending) if self._pending and self._pending[0] == date else None
+            cached_size, cached = self._cache.get(date, (None, None))
+            if cached is not None:
+                self._cache.move_to_end(date)
+        if cached_size != size:
+            # Decoded without the lock, the file is only ever appended to
+            cached = Segment.decode(date, path.read_bytes()[:size]) if size else Segment(date)
+            with self._lock:
+                self._cache[date] = (size, cached)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if pending is None:
+            return cached
+
+        # Copy before adding the unwritten span, the cached one stays on disk terms
+        segment = Segment(date)
+        segment.starts, segment.durations = array('q', cached.starts), array('q', cached.durations)
+        segment.apps, segment.titles = array('l', cached.apps), array('l', cached.titles)
+        segment.strings = list(cached.strings)
+        for name in pending[3:]:
+            if name not in segment.strings:
+                segment.strings.append(name)
+        segment.starts.append(pending[1])
+        segment.durations.append(pending[2] - pending[1])
+        segment.apps.append(segment.strings.index(pending[3]))
+        segment.titles.append(segment.strings.index(pending[4]))
+        return segment
+
+    def spans(self, start_date=None, end_date=None):
+        """Yield (start datetime, seconds, app, title) for every span in a range"""
+        for date in self._range_dates(start_date, end_date):
+            segment = self.segment(date)
+            base = _day_start(date)
+            strings = segment.strings
+            for start, duration, app, title in zip(segment.starts, segment.durations,
+                                                   segment.apps, segment.titles):
+                yield datetime.fromtimestamp(base + start / 1000), duration / 1000, strings[app], strings[title]
+
+    def _range_dates(self, start_date, end_date):
+        dates = self.dates(start_date, end_date)
+        with self._lock:
+            pending_date = self._pending[0] if self._pending else None
+        if pending_date and pending_date not in dates and (start_date or '') <= pending_date <= (end_date or '9999-12-31'):
+            dates = sorted(dates + [pending_date])
+        return dates
+
+    def delete_before(self, cutoff_date):
+        """Remove segments of days before a date"""
+        for date in self.dates(end_date=cutoff_date):
+            if date < cutoff_date:
+                with self._lock:
+                    if self._file_date == date:
+                        self._file.close()
+                        self._file = None
+                        self._file_date = None
+                    self._cache.pop(date, None)
+                try:
+                    os.remove(self._path(date))
+                except OSError:
+                    pass
+
+    # Analytics
+
+    def totals(self, date):
+        """{app: seconds} for a day, matching the tracked totals"""
+        segment = self.segment(date)
+        totals = [0] * len(segment.strings)
+        for app, duration in zip(segment.apps, segment.durations):
+            totals[app] += duration
+        return {segment.strings[app]: total / 1000
+                for app, total in enumerate(totals) if total}
+
+    def hourly(self, start_date=None, end_date=None, app_name=None):
+        """Seconds of use per hour of the day [0..23], summed over a range"""
+        return [sum(row) for row in zip(*self.heatmap(start_date, end_date, app_name))]
+
+    def heatmap(self, start_date=None, end_date=None, app_name=None):
+        """Seconds of use per weekday (Monday first) and hour, a 7 x 24 list"""
+        grid = [[0.0] * 24 for _ in range(7)]
+        hour_ms = 3600 * 1000
+        for date in self._range_dates(start_date, end_date):
+            segment = self.segment(date)
+            app_id = None
+            if app_name is not None:
+                if app_name not in segment.strings:
+                    continue
+                app_id = segment.strings.index(app_name)
+            weekday = datetime.strptime(date, "%Y-%m-%d").weekday()
+            regular = _day_is_regular(date)
+            base_ms = round(_day_start(date) * 1000)
+            for start, duration, app in zip(segment.starts, segment.durations, segment.apps):
+                if app_id is not None and app != app_id:
+                    continue
+                end = start + duration
+                while start < end:
+                    # Split spans at hour boundaries (and midnight)
+                    if regular:
+                        hour = start // hour_ms
+                        day, hour = weekday + hour // 24, hour % 24
+                        stop = min(end, start + hour_ms - start % hour_ms)
+                    else:
+                        # Elapsed time and the wall clock differ, ask the calendar
+                        local = datetime.fromtimestamp((base_ms + start) / 1000)
+                        day, hour = local.weekday(), local.hour
+                        into_hour = (local.minute * 60 + local.second) * 1000 + local.microsecond // 1000
+                        stop = min(end, start + hour_ms - into_hour)
+                    grid[day % 7][hour] += (stop - start) / 1000
+                    start = stop
+        return grid
+
+    def sessions(self, start_date=None, end_date=None, max_gap=0):
+        """Focus sessions as [(start datetime, seconds, app)].
+
+        Back-to-back spans of the same app (any titles) with at most
+        max_gap seconds between them form one session.
+        """
+        sessions = []
+        gap_ms = max_gap * 1000
+        for date in self._range_dates(start_date, end_date):
+            segment = self.segment(date)
+            strings = segment.strings
+            base = _day_start(date)
+            current = None  # [start, end, app] in ms of this day
+            for start, duration, app in zip(segment.starts, segment.durations, segment.apps):
+                if current and app == current[2] and start - current[1] <= gap_ms:
+                    current[1] = start + duration
+                    continue
+                if current:
+                    sessions.append((datetime.fromtimestamp(base + current[0] / 1000),
+                                     (current[1] - current[0]) / 1000, strings[current[2]]))
+                current = [start, start + duration, app]
+            if current:
+                sessions.append((datetime.fromtimestamp(base + current[0] / 1000),
+                                 (current[1] - current[0]) / 1000, strings[current[2]]))
+        return sessions
+
+    def longest_session(self, start_date=None, end_date=None, max_gap=0):
+        """The longest focus session (start datetime, seconds, app), None without data"""
+        return max(self.sessions(start_date, end_date, max_gap), key=lambda s: s[1], default=None)
+
+    def switches(self, start_date=None, end_date=None):
+        """{date: number of times focus moved to a different app}"""
+        counts = {}
+        for date in self._range_dates(start_date, end_date):
+            apps = self.segment(date).apps
+            counts[date] = sum(1 for previous, app in zip(apps, apps[1:]) if app != previous)
+        return counts
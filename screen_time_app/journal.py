@@ -0,0 +1,104 @@
+"""
+Journal Module
+Append-only log of usage updates between full snapshots
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+class UsageJournal:
+    """Append-only journal of per-tick usage records.
+
+    Every record carries the tick's delta *and* the resulting running
+    total for that (date, app). Replay applies the totals, so it is
+    idempotent: replaying a segment that was already folded into the
+    snapshot cannot double count.
+    """
+
+    def __init__(self, path, fsync=False):
+        self.path = Path(path)
+        self.rotated_path = self.path.with_name(self.path.name + ".compacting")
+        self.fsync = fsync
+        self.bytes_written = 0
+        self._file = None
+
+    def open(self):
+        """Open the active segment for appending"""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self.bytes_written = self._file.tell()
+
+    def close(self):
+        """Close the active segment"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, date, app_name, seconds, app_data):
+        """Append one usage record and flush it to the OS"""
+        record = {
+            'date': date,
+            'app': app_name,
+            'seconds': seconds,
+            'total_seconds': app_data.get('total_seconds', 0),
+            'last_active': app_data.get('last_active'),
+            'title': app_data.get('title', '')
+        }
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+
+        self.open()
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.bytes_written += len(line)
+
+    def replay(self, data):
+        """Apply all journal segments on top of a loaded snapshot"""
+        count = 0
+        for path in (self.rotated_path, self.path):
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        date = record['date']
+                        app_name = record['app']
+                    except (ValueError, KeyError, TypeError):
+                        # Torn last line from a crash mid-write
+                        continue
+
+                    day = data.get(date, {})
+                    day[app_name] = {
+                        'total_seconds': record.get('total_seconds', 0),
+                        'last_active': record.get('last_active'),
+                        'title': record.get('title', '')
+                    }
+                    data[date] = day
+                    count += 1
+        return count
+
+    def rotate(self):
+        """Move the active segment aside so it can be folded into a snapshot"""
+        self.close()
+        if self.path.exists():
+            if self.rotated_path.exists():
+                # An earlier compaction never finished, keep both segments
+                import shutil
+                with open(self.rotated_path, 'a', encoding='utf-8') as dst, \
+                        open(self.path, 'r', encoding='utf-8') as src:
+                    shutil.copyfileobj(src, dst)
+                self.path.unlink()
+            else:
+                os.replace(self.path, self.rotated_path)
+        self.bytes_written = 0
+
+    def discard_rotated(self):
+        """Drop the rotated segment once the snapshot holding it is on disk"""
+        try:
+            self.rotated_path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,83 @@
+"""
+Live Totals Module
+Running total and app ranking for the day being tracked
+"""
+
+from types import MappingProxyType
+
+
+class LiveSnapshot:
+    """Immutable view of LiveTotals at one point in time.
+
+    Published by the writer after every change and read without any
+    locking: a reader holding a snapshot never sees it change.
+    """
+
+    __slots__ = ('version', 'date', 'total_seconds', 'seconds', 'ranked')
+
+    def __init__(self, version, date, total_seconds, seconds, ranked):
+        self.version = version
+        self.date = date
+        self.total_seconds = total_seconds
+        self.seconds = MappingProxyType(seconds)
+        self.ranked = ranked
+
+    def get(self, app_name):
+        """Seconds used by an app that day"""
+        return self.seconds.get(app_name, 0)
+
+    def top(self, limit=10):
+        """Top apps as [(app_name, seconds)]"""
+        return [(app_name, self.seconds[app_name]) for app_name in self.ranked[:limit]]
+
+
+class LiveTotals:
+    """Per-day running total plus apps kept sorted by seconds.
+
+    Usage only ever grows during a day, so after an app's seconds go up
+    it just moves towards the front of the ranking. That is usually zero
+    or one swap. Reading the total is O(1) and reading the top K apps is
+    O(K), however many apps were used.
+    """
+
+    def __init__(self, date, daily_data):
+        self.date = date
+        self.seconds = {app_name: app_data.get('total_seconds', 0)
+                        for app_name, app_data in daily_data.items()}
+        self.total_seconds = sum(self.seconds.values())
+        self._ranked = sorted(self.seconds, key=self.seconds.get, reverse=True)
+        self._position = {app_name: i for i, app_name in enumerate(self._ranked)}
+
+    def add(self, app_name, seconds):
+        """Add tracked seconds to an app and restore the ranking"""
+        self.total_seconds += seconds
+        if app_name not in self.seconds:
+            self.seconds[app_name] = 0
+            self._position[app_name] = len(self._ranked)
+            self._ranked.append(app_name)
+        self.seconds[app_name] += seconds
+        self._bubble_up(app_name)
+
+    def _bubble_up(self, app_name):
+        ranked = self._ranked
+        position = self._position
+        app_seconds = self.seconds[app_name]
+        i = position[app_name]
+        while i > 0 and self.seconds[ranked[i - 1]] < app_seconds:
+            ranked[i] = ranked[i - 1]
+            position[ranked[i]] = i
+            i -= 1
+        ranked[i] = app_name
+        position[app_name] = i
+
+    def get(self, app_name):
+        """Seconds used by an app today"""
+        return self.seconds.get(app_name, 0)
+
+    def top(self, limit=10):
+        """Top apps as [(app_name, seconds)]"""
+        return [(app_name, self.seconds[app_name]) for app_name in self._ranked[:limit]]
+
+    def snapshot(self, version):
+        """Copy the current state into a LiveSnapshot"""
+        return LiveSnapshot(version, self.date, self.total_seconds, dict(self.seconds), tuple(self._ranked))
@@ -8,14 +8,9 @@ Inspired by Stayfree and Freedom apps.
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
-import sys
-from datetime import datetime, timedelta
-from pathlib import Path
 
-from tracker import TimeTracker
-from blocker import AppBlocker
 from data_manager import DataManager
-from ui_components import DashboardFrame, StatisticsFrame, BlockerFrame, SettingsFrame
+from ui_components import DashboardFrame, StatisticsFrame, BlockerFrame, SettingsFrame, DiagnosticsFrame
 
 
 class ScreenTimeApp:
@@ -25,18 +20,20 @@ class ScreenTimeApp:
         self.root.geometry("900x650")
         self.root.minsize(800, 600)
 
-        # Initialize components
+        # Only what the dashboard needs is loaded before the first paint;
+        # the tracking service (psutil, blocker rules, the API socket,
+        # X11) is built on a worker thread once the window is on screen
         self.data_manager = DataManager()
-        self.tracker = TimeTracker(self.data_manager)
-        self.blocker = AppBlocker(self.data_manager)
+        self.service = None
+        self.tracker = None
+        self.blocker = None
+        self.start_thread = None
 
         # Set up UI
         self.setup_ui()
 
         # Start tracking
-        self.tracking_thread = None
-        self.is_tracking = True
-        self.start_tracking()
+        self.dashboard_frame.bind("<Map>", lambda event: self.root.after_idle(self.start_tracking))
 
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -65,22 +62,30 @@ class ScreenTimeApp:
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Create frames for each tab
-        self.dashboard_frame = DashboardFrame(self.notebook, self.data_manager, self.tracker)
-        self.statistics_frame = StatisticsFrame(self.notebook, self.data_manager)
-        self.blocker_frame = BlockerFrame(self.notebook, self.blocker, self.data_manager)
-        self.settings_frame = SettingsFrame(self.notebook, self.data_manager)
-
-        # Add tabs
+        # The dashboard is built now, every other tab the first time it is
+        # selected (statistics and limits are queried on construction)
+        self.dashboard_frame = DashboardFrame(self.notebook, self.data_manager)
         self.notebook.add(self.dashboard_frame, text="  Dashboard  ")
-        self.notebook.add(self.statistics_frame, text="  Statistics  ")
-        self.notebook.add(self.blocker_frame, text="  Blocker  ")
-        self.notebook.add(self.settings_frame, text="  Settings  ")
+
+        self.statistics_frame = None
+        self.blocker_frame = None
+        self.settings_frame = None
+        self.diagnostics_frame = None
+        self._tabs = {}  # Tab widget name -> (placeholder, attribute, builder)
+        for attribute, text, builder in (
+                ('statistics_frame', "  Statistics  ", lambda parent: StatisticsFrame(parent, self.data_manager)),
+                ('blocker_frame', "  Blocker  ", self._build_blocker_frame),
+                ('settings_frame', "  Settings  ", lambda parent: SettingsFrame(parent, self.data_manager)),
+                ('diagnostics_frame', "  Diagnostics  ", lambda parent: DiagnosticsFrame(parent, self.data_manager))):
+            placeholder = ttk.Frame(self.notebook)
+            self.notebook.add(placeholder, text=text)
+            self._tabs[str(placeholder)] = (placeholder, attribute, builder)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # Status bar
         self.status_bar = tk.Label(
             self.root,
-            text="Tracking active",
+            text="Starting tracking...",
             bd=1,
             relief=tk.SUNKEN,
             anchor=tk.W,
@@ -88,35 +93,70 @@ class ScreenTimeApp:
         )
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-    def start_tracking(self):
-        """Start the tracking thread"""
-        def track():
-            while self.is_tracking:
-                try:
-                    self.tracker.update()
-                    self.blocker.check_and_block()
-
-                    # Update UI every 5 seconds
-                    if hasattr(self, 'dashboard_frame'):
-                        self.root.after(0, self.dashboard_frame.update_display)
+    def _on_tab_changed(self, event):
+        """Build a tab the first time it is selected"""
+        entry = self._tabs.get(self.notebook.select())
+        if entry is None:
+            return
+        placeholder, attribute, builder = entry
+        if attribute == 'blocker_frame' and self.blocker is None:
+            # The blocker belongs to the service; built once it is up
+            self.start_tracking()
+            return
+        del self._tabs[self.notebook.select()]
+        frame = builder(placeholder)
+        frame.pack(fill=tk.BOTH, expand=True)
+        setattr(self, attribute, frame)
+
+    def _build_blocker_frame(self, parent):
+        return BlockerFrame(parent, self.blocker, self.data_manager)
 
-                except Exception as e:
-                    print(f"Tracking error: {e}")
-
-                # Wait 5 seconds before next update
-                for _ in range(50):  # 50 * 0.1 = 5 seconds
-                    if not self.is_tracking:
-                        break
-                    threading.Event().wait(0.1)
-
-        self.tracking_thread = threading.Thread(target=track, daemon=True)
-        self.tracking_thread.start()
+    def start_tracking(self):
+        """Create and start the tracking service on a worker thread"""
+        if self.start_thread is not None:
+            return
+        self.start_thread = threading.Thread(target=self._create_service, daemon=True)
+        self.start_thread.start()
+
+    def _create_service(self):
+        """Worker thread: build the service off the Tk thread, then report back"""
+        try:
+            # Imported here, it pulls in psutil and the platform modules
+            from service import TrackingService
+
+            # The tracking loop is the same one the headless daemon runs,
+            # the window is just a client of it
+            service = TrackingService(self.data_manager, on_tick=self._on_tick)
+            service.start()
+        except Exception as e:
+            print(f"Error starting tracking: {e}")
+            message = f"Tracking failed to start: {e}"
+            self.root.after(0, lambda: self.status_bar.config(text=message))
+            return
+        self.tracker = service.tracker
+        self.blocker = service.blocker
+        self.service = service
+        self.root.after(0, self._on_tracking_started)
+
+    def _on_tracking_started(self):
+        self.status_bar.config(text="Tracking active")
+        # The Blocker tab may have been selected while the service started
+        self._on_tab_changed(None)
+
+    def _on_tick(self):
+        """Refresh the dashboard after every tick"""
+        if hasattr(self, 'dashboard_frame'):
+            self.root.after(0, self.dashboard_frame.update_display)
 
     def on_closing(self):
         """Handle window closing"""
         if messagebox.askokcancel("Quit", "Do you want to quit? Tracking will stop."):
-            self.is_tracking = False
-            self.tracker.save_data()
+            if self.start_thread is not None:
+                self.start_thread.join()  # Let a starting service finish, then close it
+            if self.service:
+                self.service.close()
+            else:
+                self.data_manager.close()
             self.root.destroy()
 
 
@@ -0,0 +1,233 @@
+"""
+Metrics Module
+Latency histograms and counters for the stages of the tracking loop
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+# Log-scale buckets, four per doubling: bucket 0 holds anything under
+# 1 us, bucket i (i >= 1) holds [2 ** ((i - 1) / 4), 2 ** (i / 4)) us.
+# The last bucket also takes everything from about a minute up.
+BUCKETS_PER_OCTAVE = 4
+BUCKET_COUNT = 26 * BUCKETS_PER_OCTAVE + 1
+
+
+def _bucket(seconds):
+    micros = seconds * 1e6
+    if micros < 1:
+        return 0
+    return min(int(math.log2(micros) * BUCKETS_PER_OCTAVE) + 1, BUCKET_COUNT - 1)
+
+
+def _bucket_upper(index):
+    """Upper bound of a bucket in seconds"""
+    return 2 ** (index / BUCKETS_PER_OCTAVE) / 1e6
+
+
+class Histogram:
+    """Counts of durations in log-scale buckets, with count, total and max.
+
+    Percentiles are read off the buckets, so they are accurate to
+    within a bucket (about 19%), which is plenty to tell where time
+    goes and cheap enough to record on every call.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[_bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Duration in seconds that fraction of the recorded ones stay under"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper(i), self.max)
+        return self.max
+
+    def summary(self, elapsed=None):
+        """{count, per_minute, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, total_ms}"""
+        return {
+            'count': self.count,
+            'per_minute': round(self.count / elapsed * 60, 2) if elapsed else None,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'total_ms': round(self.total * 1000, 3)
+        }
+
+
+class Stage:
+    """Latencies of one stage: since start, and over a rolling window.
+
+    The window is a ring of slices; a slice is cleared when it comes
+    round again, so old samples age out a slice at a time.
+    """
+
+    __slots__ = ('all', 'slices', 'epochs')
+
+    def __init__(self, slice_count):
+        self.all = Histogram()
+        self.slices = [Histogram() for _ in range(slice_count)]
+        self.epochs = [-1] * slice_count
+
+    def add(self, seconds, epoch):
+        slot = epoch % len(self.slices)
+        if self.epochs[slot] != epoch:
+            self.slices[slot] = Histogram()
+            self.epochs[slot] = epoch
+        self.slices[slot].add(seconds)
+        self.all.add(seconds)
+
+    def recent(self, epoch):
+        """Histogram of the slices still inside the window"""
+        merged = Histogram()
+        oldest = epoch - len(self.slices)
+        for slice_epoch, histogram in zip(self.epochs, self.slices):
+            if slice_epoch > oldest:
+                merged.merge(histogram)
+        return merged
+
+
+class _Timer:
+    """Context manager that records the time spent in its block"""
+
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.error(self.stage, exc)
+        return False
+
+
+class Metrics:
+    """Named stage latencies and counters, safe to use from any thread.
+
+    Recording a sample costs a few microseconds. Usage:
+
+        with metrics.timer('save'):
+            data_manager.save()
+        metrics.count('focus_switches')
+    """
+
+    def __init__(self, window_seconds=300, slice_count=10):
+        self.window_seconds = window_seconds
+        self.slice_count = slice_count
+        self.slice_seconds = window_seconds / slice_count
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self.last_error = None  # (time, stage, message)
+            self.started = time.monotonic()
+            self.started_at = datetime.now()
+
+    def timer(self, stage):
+        return _Timer(self, stage)
+
+    def record(self, stage, seconds):
+        """Add one latency sample for a stage"""
+        epoch = int(time.monotonic() / self.slice_seconds)
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = Stage(self.slice_count)
+            entry.add(seconds, epoch)
+
+    def count(self, name, n=1):
+        """Add n to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def error(self, stage, exc):
+        """Count an error in a stage and remember it as the last error"""
+        with self._lock:
+            name = f"{stage}.errors"
+            self.counters[name] = self.counters.get(name, 0) + 1
+            self.last_error = (datetime.now(), stage, f"{type(exc).__name__}: {exc}")
+
+    def snapshot(self):
+        """Every stage and counter as a JSON-ready dict"""
+        now = time.monotonic()
+        epoch = int(now / self.slice_seconds)
+        uptime = now - self.started
+        with self._lock:
+            stages = {}
+            for name, entry in self.stages.items():
+                stages[name] = {
+                    'recent': entry.recent(epoch).summary(min(uptime, self.window_seconds)),
+                    'all': entry.all.summary(uptime)
+                }
+            counters = dict(self.counters)
+            last_error = self.last_error
+
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'uptime_seconds': round(uptime, 1),
+            'window_seconds': self.window_seconds,
+            'stages': stages,
+            'counters': counters,
+            'last_error': {
+                'time': last_error[0].isoformat(timespec='seconds'),
+                'stage': last_error[1],
+                'message': last_error[2]
+            } if last_error else None
+        }
+
+    def write(self, path):
+        """Write a snapshot to a JSON file, replacing it atomically"""
+        try:
+            tmp_file = f"{path}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_file, path)
+            return True
+        except Exception as e:
+            print(f"Error writing metrics: {e}")
+            return False
+
+
+# Shared by every module of the process
+metrics = Metrics()
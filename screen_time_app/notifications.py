@@ -0,0 +1,226 @@
+"""
+Notifications Module
+Desktop notifications sent from a background thread, with repeats merged
+"""
+
+import platform
+import subprocess
+import threading
+import time
+
+from metrics import metrics
+
+APP_NAME = "Take Time Back"
+
+
+class DBusNotifier:
+    """org.freedesktop.Notifications on the session bus, through jeepney.
+
+    Talks to the notification daemon directly instead of starting a
+    notify-send process per notification, and can replace a toast it
+    showed earlier rather than stacking a new one.
+    """
+
+    def __init__(self):
+        from jeepney import DBusAddress, new_method_call
+        from jeepney.io.blocking import open_dbus_connection
+        from jeepney.wrappers import unwrap_msg
+
+        self._new_method_call = new_method_call
+        self._unwrap = unwrap_msg
+        self._address = DBusAddress('/org/freedesktop/Notifications',
+                                    bus_name='org.freedesktop.Notifications',
+                                    interface='org.freedesktop.Notifications')
+        self._connection = open_dbus_connection(bus='SESSION')
+
+    def show(self, title, message, replaces_id=0):
+        """Show a notification, returns its id"""
+        call = self._new_method_call(self._address, 'Notify', 'susssasa{sv}i',
+                                     (APP_NAME, replaces_id, '', title, message, [], {}, 5000))
+        reply = self._connection.send_and_get_reply(call, timeout=2)
+        return self._unwrap(reply)[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class CommandNotifier:
+    """notify-send, osascript or win10toast, whichever the platform has"""
+
+    def __init__(self, system=None):
+        self.system = system or platform.system()
+
+    def show(self, title, message, replaces_id=0):
+        if self.system == "Windows":
+            from win10toast import ToastNotifier
+            toaster = ToastNotifier()
+            toaster.show_toast(title, message, duration=5, threaded=True)
+        elif self.system == "Linux":
+            subprocess.run(['notify-send', '-a', APP_NAME, title, message], timeout=5)
+        elif self.system == "Darwin":
+            # Passed as arguments, never pasted into the script: titles
+            # come from window and app names
+            subprocess.run(['osascript', '-e', 'on run argv',
+                            '-e', 'display notification (item 2 of argv) with title (item 1 of argv)',
+                            '-e', 'end run', title, message], timeout=5)
+        return 0
+
+    def close(self):
+        pass
+
+
+class _Pending:
+    __slots__ = ('title', 'message', 'count', 'due')
+
+    def __init__(self, title, message, due):
+        self.title = title
+        self.message = message
+        self.count = 1
+        self.due = due
+
+
+class NotificationDispatcher:
+    """Queues notifications and shows them on a background thread.
+
+    notify() only takes a lock, so the tracking loop never waits on a
+    notification service. Notifications with the same key (by default
+    the same title and message, e.g. one per process of a blocked app)
+    are merged while waiting: the first waits gather_seconds for
+    repeats, and repeats within coalesce_seconds of it being shown go
+    out together once that window is over, replacing the earlier toast
+    where the notification service allows. Across keys, at most one
+    notification is shown every min_interval seconds, and beyond
+    max_pending waiting keys new ones are dropped.
+
+    On Linux the freedesktop notification service is called over
+    D-Bus when jeepney is installed, with notify-send as the fallback.
+    """
+
+    def __init__(self, system=None, enabled=None, gather_seconds=0.5, coalesce_seconds=10,
+                 min_interval=1.0, max_pending=32):
+        self.system = system or platform.system()
+        self.enabled = enabled  # Called before queuing, e.g. to honour a setting
+        self.gather_seconds = gather_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self.min_interval = min_interval
+        self.max_pending = max_pending
+
+        self._cond = threading.Condition()
+        self._pending = {}  # {key: _Pending}
+        self._shown = {}  # {key: (monotonic time, notification id)}
+        self._last_shown = float('-inf')
+        self._backend = None
+        self._thread = None
+        self._closing = False
+
+    def notify(self, title, message, key=None):
+        """Queue a notification; returns at once"""
+        if self.enabled is not None and not self.enabled():
+            return
+        key = key if key is not None else (title, message)
+        now = time.monotonic()
+        metrics.count('notifications')
+        with self._cond:
+            if self._closing:
+                return
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry.title, entry.message = title, message
+                entry.count += 1
+                metrics.count('notifications.coalesced')
+                return
+            if len(self._pending) >= self.max_pending:
+                metrics.count('notifications.dropped')
+                return
+
+            # A repeat of something just shown waits for its window to end
+            shown = self._shown.get(key)
+            due = now + self.gather_seconds
+            if shown is not None and now - shown[0] < self.coalesce_seconds:
+                due = shown[0] + self.coalesce_seconds
+            self._pending[key] = _Pending(title, message, due)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _next(self):
+        """Wait for the next notification that is due, None once closed and drained"""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    if self._closing:
+                        return None
+                    self._cond.wait()
+                    continue
+                key, entry = min(self._pending.items(), key=lambda item: item[1].due)
+                # While closing, whatever is left goes out right away
+                ready_at = time.monotonic() if self._closing else max(entry.due, self._last_shown + self.min_interval)
+                wait = ready_at - time.monotonic()
+                if wait <= 0:
+                    del self._pending[key]
+                    self._last_shown = time.monotonic()
+                    shown = self._shown.get(key)
+                    replaces_id = shown[1] if shown and self._last_shown - shown[0] < 2 * self.coalesce_seconds else 0
+                    return key, entry, replaces_id
+                self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                break
+            key, entry, replaces_id = item
+            message = entry.message if entry.count == 1 else f"{entry.message} ({entry.count}x)"
+            notification_id = self._show(entry.title, message, replaces_id)
+            with self._cond:
+                self._shown[key] = (time.monotonic(), notification_id)
+                # Keys not seen for a while cannot be coalesced with any more
+                cutoff = time.monotonic() - 2 * self.coalesce_seconds
+                for old_key in [k for k, (shown_at, _) in self._shown.items() if shown_at < cutoff]:
+                    del self._shown[old_key]
+
+        if self._backend is not None:
+            self._backend.close()
+
+    def _show(self, title, message, replaces_id):
+        """Show one notification through the best backend available"""
+        with metrics.timer('notification'):
+            if self._backend is None:
+                self._backend = self._create_backend()
+            try:
+                notification_id = self._backend.show(title, message, replaces_id)
+                metrics.count('notifications.shown')
+                return notification_id
+            except Exception as e:
+                if isinstance(self._backend, CommandNotifier):
+                    print(f"Notification error: {e}")
+                    return 0
+                # The D-Bus connection failed: use the command this time
+                # and connect again for the next notification
+                print(f"D-Bus notification failed, falling back: {e}")
+                self._backend = None
+            try:
+                CommandNotifier(self.system).show(title, message)
+                metrics.count('notifications.shown')
+            except Exception as e:
+                print(f"Notification error: {e}")
+            return 0
+
+    def _create_backend(self):
+        if self.system == "Linux":
+            try:
+                return DBusNotifier()
+            except Exception:
+                pass  # No jeepney or no session bus
+        return CommandNotifier(self.system)
+
+    def close(self, timeout=2):
+        """Show what is still queued and stop the thread"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
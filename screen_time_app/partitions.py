@@ -0,0 +1,203 @@
+"""
+Partitions Module
+Month-partitioned usage storage with lazy loading of history
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime
+from pathlib import Path
+
+from records import compact_day, date_to_ordinal, ordinal_to_date
+
+
+class PartitionedUsage(MutableMapping):
+    """{date: {app: app_data}} mapping backed by one JSON file per month.
+
+    Partitions are loaded the first time one of their dates is touched.
+    The current month and any partition with unsaved changes stay
+    resident; other ("cold") partitions are kept in an LRU of at most
+    max_cold partitions. Only dirty partitions are rewritten on save.
+
+    In memory, partitions are keyed by day ordinal and hold compact
+    UsageRecords (see records.py); the mapping itself still takes and
+    yields YYYY-MM-DD strings.
+    """
+
+    def __init__(self, partition_dir, max_cold=3):
+        self.partition_dir = Path(partition_dir)
+        self.partition_dir.mkdir(exist_ok=True)
+        self.index_file = self.partition_dir / "index.json"
+        self.max_cold = max_cold
+
+        self._lock = threading.RLock()
+        self._partitions = OrderedDict()  # {month: {ordinal: daily_data}}, LRU order
+        self._dirty = set()
+        self._index = self._load_index()  # {month: set(ordinals)}
+
+    def _load_index(self):
+        """Load the month -> dates index, rebuilding it if missing"""
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r') as f:
+                    return {month: set(map(date_to_ordinal, dates))
+                            for month, dates in json.load(f).items()}
+            except Exception as e:
+                print(f"Error loading partition index: {e}")
+
+        index = {}
+        for path in self.partition_dir.glob("????-??.json"):
+            index[path.stem] = set(self._read_partition(path.stem))  # ordinal keys
+        return index
+
+    def _partition_file(self, month):
+        return self.partition_dir / f"{month}.json"
+
+    def _read_partition(self, month):
+        path = self._partition_file(month)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return {date_to_ordinal(date): compact_day(daily_data)
+                        for date, daily_data in json.load(f).items()}
+        except Exception as e:
+            print(f"Error loading partition {month}: {e}")
+            return {}
+
+    def _partition(self, month, create=False):
+        """Get a resident partition, loading it from disk if needed"""
+        with self._lock:
+            partition = self._partitions.get(month)
+            if partition is not None:
+                self._partitions.move_to_end(month)
+                return partition
+            if month not in self._index and not create:
+                return None
+
+            partition = self._read_partition(month)
+            self._partitions[month] = partition
+            self._evict()
+            return partition
+
+    def _evict(self):
+        """Drop least recently used cold partitions beyond max_cold"""
+        current_month = datetime.now().strftime("%Y-%m")
+        cold = [month for month in self._partitions
+                if month not in self._dirty and month != current_month]
+        for month in cold[:max(0, len(cold) - self.max_cold)]:
+            del self._partitions[month]
+
+    # Mapping interface
+
+    def __getitem__(self, date):
+        if date not in self:
+            raise KeyError(date)
+        partition = self._partition(date[:7])
+        try:
+            return partition[date_to_ordinal(date)]
+        except (KeyError, TypeError):
+            raise KeyError(date)
+
+    def __setitem__(self, date, daily_data):
+        month = date[:7]
+        ordinal = date_to_ordinal(date)
+        with self._lock:
+            partition = self._partition(month, create=True)
+            partition[ordinal] = compact_day(daily_data)
+            self._index.setdefault(month, set()).add(ordinal)
+            self._dirty.add(month)
+
+    def __delitem__(self, date):
+        month = date[:7]
+        ordinal = date_to_ordinal(date)
+        with self._lock:
+            partition = self._partition(month)
+            if partition is None or ordinal not in partition:
+                raise KeyError(date)
+            del partition[ordinal]
+            self._index[month].discard(ordinal)
+            self._dirty.add(month)
+
+    def __contains__(self, date):
+        try:
+            return date_to_ordinal(date) in self._index.get(date[:7], ())
+        except (TypeError, ValueError):
+            return False
+
+    def __iter__(self):
+        with self._lock:
+            ordinals = [ordinal for month in sorted(self._index) for ordinal in sorted(self._index[month])]
+        return map(ordinal_to_date, ordinals)
+
+    def __len__(self):
+        return sum(len(dates) for dates in self._index.values())
+
+    # Persistence
+
+    def mark_dirty(self, date):
+        """Mark the partition holding date as changed in place"""
+        with self._lock:
+            # Saving a dirty month that is not resident would write it out empty
+            if self._partition(date[:7]) is not None:
+                self._dirty.add(date[:7])
+
+    def has_changes(self):
+        """Check whether any partition needs saving"""
+        return bool(self._dirty)
+
+    def take_dirty(self):
+        """Copy and clear the dirty partitions so they can be written unlocked"""
+        with self._lock:
+            changed = {
+                month: {ordinal_to_date(ordinal): {app: dict(app_data) for app, app_data in daily_data.items()}
+                        for ordinal, daily_data in sorted(self._partitions.get(month, {}).items())}
+                for month in self._dirty
+            }
+            self._dirty.clear()
+            return changed
+
+    def write(self, changed):
+        """Write copied partitions and the index to disk"""
+        try:
+            for month, partition in changed.items():
+                path = self._partition_file(month)
+                if not partition:
+                    if path.exists():
+                        path.unlink()
+                    continue
+                tmp_file = path.with_name(path.name + ".tmp")
+                with open(tmp_file, 'w') as f:
+                    json.dump(partition, f, indent=2)
+                os.replace(tmp_file, path)
+
+            with self._lock:
+                for month in [month for month, dates in self._index.items() if not dates]:
+                    del self._index[month]
+                index = {month: [ordinal_to_date(ordinal) for ordinal in sorted(ordinals)]
+                         for month, ordinals in self._index.items()}
+            tmp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_file, self.index_file)
+            return True
+        except Exception as e:
+            print(f"Error saving partitions: {e}")
+            with self._lock:
+                for month, partition in changed.items():
+                    self._partitions.setdefault(month, {date_to_ordinal(date): compact_day(daily_data)
+                                                        for date, daily_data in partition.items()})
+                self._dirty.update(changed)
+            return False
+
+    def save(self):
+        """Write every dirty partition"""
+        return self.write(self.take_dirty())
+
+    def resident_months(self):
+        """Months currently loaded in memory"""
+        with self._lock:
+            return list(self._partitions)
@@ -0,0 +1,62 @@
+"""
+Process Cache Module
+Bounded pid -> process name cache shared by the tracker and the blocker
+"""
+
+import threading
+from collections import OrderedDict
+
+import psutil
+
+
+class ProcessNameCache:
+    """LRU of {pid: (create_time, name)}.
+
+    An entry only matches while the process still has the same
+    create_time, so a reused PID can never return the previous owner's
+    name. Entries are dropped when a process is seen to exit, or when
+    the LRU is full.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def name_of(self, process):
+        """Name of a psutil.Process, resolved once per process lifetime"""
+        pid = process.pid
+        create_time = process.create_time()
+        with self._lock:
+            entry = self._entries.get(pid)
+            if entry is not None and entry[0] == create_time:
+                self._entries.move_to_end(pid)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        name = process.name()
+        self.remember(pid, create_time, name)
+        return name
+
+    def get_name(self, pid):
+        """Name of a running pid, raises psutil.NoSuchProcess if it is gone"""
+        return self.name_of(psutil.Process(pid))
+
+    def remember(self, pid, create_time, name):
+        """Store a resolved name"""
+        with self._lock:
+            self._entries[pid] = (create_time, name)
+            self._entries.move_to_end(pid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, pid):
+        """Forget a process that has exited"""
+        with self._lock:
+            self._entries.pop(pid, None)
+
+    def __len__(self):
+        return len(self._entries)
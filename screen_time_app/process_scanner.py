@@ -0,0 +1,191 @@
+"""
+Process Scanner Module
+Incremental view of the process table for the app blocker
+"""
+
+import time
+
+import psutil
+
+from process_cache import ProcessNameCache
+
+# A process can exec() another program right after it starts (snap run,
+# wrapper scripts, a fork caught before its exec), keeping its pid and
+# create_time. Processes younger than this are resolved again every scan.
+YOUNG_SECONDS = 10
+
+# Every cached pid is checked once per this many scans, see ProcessScanner
+VERIFY_SCANS = 30
+
+
+class ProcessScanner:
+    """Keeps {pid: (create_time, name)} up to date between scans.
+
+    Each scan lists PIDs (cheap) and only opens processes whose PID was
+    not present in the previous scan; PIDs that vanish are dropped.
+    Processes started less than YOUNG_SECONDS ago are resolved on every
+    scan until they are older, in case they exec()ed. A PID can still
+    be reused between two scans, or a process exec() later on, so each
+    scan also checks the create_time and name of a rotating
+    1/VERIFY_SCANS of the table and resolves changed entries afresh.
+    A name -> pids index lets callers look up rule matches without
+    walking the table.
+
+    With a RuleMatcher set, each process is also matched against the
+    pattern rules whenever it is resolved, and the result is kept for
+    as long as the (pid, create_time) entry is.
+    """
+
+    def __init__(self, process_cache=None):
+        self.process_cache = process_cache if process_cache is not None else ProcessNameCache()
+        self._processes = {}  # {pid: (create_time, name)}
+        self._by_name = {}  # {name: set(pids)}
+        self._by_rule = {}  # {rule_id: set(pids)}
+        self._matches = {}  # {pid: rule_ids}, only for processes that matched
+        self._young = set()  # Pids to resolve again, see YOUNG_SECONDS
+        self._scans = 0
+        self.matcher = None
+        self.resolved_last_scan = 0
+
+    def set_matcher(self, matcher):
+        """Match new processes against a RuleMatcher (None for none)"""
+        self.matcher = matcher
+        # Everything is resolved and matched again on the next scan
+        self.clear()
+
+    def scan(self):
+        """Refresh the table, returns the number of live processes"""
+        pids = set(psutil.pids())
+
+        for pid in self._processes.keys() - pids:
+            self._forget(pid)
+
+        now = time.time()
+        young = list(self._young)
+        resolved = 0
+        for pid in pids - self._processes.keys():
+            resolved += self._resolve(pid, now)
+
+        # Resolved once more after they stop being young, so an exec()
+        # up to YOUNG_SECONDS after the start is always picked up
+        for pid in young:
+            if pid in self._processes:
+                self._forget(pid)
+                resolved += self._resolve(pid, now)
+
+        self._scans += 1
+        slot = self._scans % VERIFY_SCANS
+        for pid in [pid for pid in self._processes if pid % VERIFY_SCANS == slot]:
+            if pid not in self._young:
+                resolved += self._verify(pid, now)
+
+        self.resolved_last_scan = resolved
+        return len(self._processes)
+
+    def _resolve(self, pid, now):
+        """Read a pid's name and rule matches into the table, False if it cannot be read"""
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                entry = (process.create_time(), self.process_cache.name_of(process))
+                matches = self._match(process, entry[1]) if self.matcher else None
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+        self._processes[pid] = entry
+        self._by_name.setdefault(entry[1], set()).add(pid)
+        if matches:
+            self._matches[pid] = matches
+            for rule_id in matches:
+                self._by_rule.setdefault(rule_id, set()).add(pid)
+        if now - entry[0] < YOUNG_SECONDS:
+            self._young.add(pid)
+        return True
+
+    def _verify(self, pid, now):
+        """Resolve a cached pid again if it is now another process or program, True if it was"""
+        create_time, name = self._processes[pid]
+        # Rules on exe or cmdline can change their match without the name
+        if self.matcher is None or self.matcher.fields == {'name'}:
+            try:
+                process = psutil.Process(pid)
+                with process.oneshot():
+                    if process.create_time() == create_time and process.name() == name:
+                        return False
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        self._forget(pid)
+        return self._resolve(pid, now)
+
+    def _match(self, process, name):
+        """Rule ids matching a process, reading exe and cmdline only if some rule needs them"""
+        values = {'name': name}
+        fields = self.matcher.fields
+        try:
+            if 'exe' in fields:
+                values['exe'] = process.exe()
+            if 'cmdline' in fields:
+                values['cmdline'] = ' '.join(process.cmdline())
+        except psutil.AccessDenied:
+            pass  # Other users' processes, matched on what could be read
+        return self.matcher.match(values)
+
+    def _forget(self, pid):
+        _, name = self._processes.pop(pid)
+        self._young.discard(pid)
+        self.process_cache.invalidate(pid)
+        pids = self._by_name.get(name)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._by_name[name]
+        for rule_id in self._matches.pop(pid, ()):
+            pids = self._by_rule[rule_id]
+            pids.discard(pid)
+            if not pids:
+                del self._by_rule[rule_id]
+
+    def pids_for(self, name):
+        """PIDs from the last scan whose process name is name"""
+        return list(self._by_name.get(name, ()))
+
+    def name_of(self, pid):
+        """Process name of a scanned pid, None if it is not in the table"""
+        entry = self._processes.get(pid)
+        return entry[1] if entry else None
+
+    def create_time_of(self, pid):
+        """create_time of a scanned pid, None if it is not in the table"""
+        entry = self._processes.get(pid)
+        return entry[0] if entry else None
+
+    def matched_rules(self):
+        """{rule_id: pids} of the pattern rules matching any process of the last scan"""
+        return {rule_id: list(pids) for rule_id, pids in self._by_rule.items()}
+
+    def names(self):
+        """Distinct process names from the last scan"""
+        return self._by_name.keys()
+
+    def get_process(self, pid):
+        """psutil.Process for a scanned pid, None if it exited or the pid was reused"""
+        entry = self._processes.get(pid)
+        if entry is None:
+            return None
+        try:
+            process = psutil.Process(pid)
+            if process.create_time() != entry[0]:
+                self._forget(pid)
+                return None
+            return process
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self._forget(pid)
+            return None
+
+    def clear(self):
+        """Drop all cached processes"""
+        self._processes.clear()
+        self._by_name.clear()
+        self._by_rule.clear()
+        self._matches.clear()
+        self._young.clear()
+        self._scans = 0
@@ -0,0 +1,242 @@
+"""
+Query Module
+One aggregation engine behind every statistics view
+"""
+
+from datetime import date as date_cls
+
+from records import date_to_ordinal, ordinal_to_date
+from rollups import week_key
+
+try:
+    import numpy as np
+except ImportError:  # Plain Python reductions are used instead
+    np = None
+
+GROUP_BY = ('day', 'week', 'app')
+
+
+class QueryCancelled(Exception):
+    """Raised inside a query whose cancel event was set"""
+
+
+def check_cancel(cancel):
+    """Stop a query between days once its cancel event is set"""
+    if cancel is not None and cancel.is_set():
+        raise QueryCancelled()
+
+
+def week_totals(daily_totals):
+    """Fold {date: seconds} into {ISO week key: seconds}"""
+    totals = {}
+    for date, seconds in daily_totals.items():
+        key = week_key(date_cls.fromisoformat(date))
+        totals[key] = totals.get(key, 0) + seconds
+    return totals
+
+
+class UsageFrame:
+    """Usage for a run of calendar days as a day x app matrix.
+
+    Row i is the day start_ordinal + i and column j is apps[j]. With
+    NumPy the matrix is a float64 array and every reduction is a single
+    array operation; without it the matrix is a list of row lists.
+    """
+
+    def __init__(self, start_ordinal, apps, matrix):
+        self.start_ordinal = start_ordinal
+        self.apps = apps
+        self.matrix = matrix
+
+    def select(self, apps=None, exclude=None):
+        """Frame restricted to the given apps and without the excluded ones"""
+        if apps is None and not exclude:
+            return self
+        keep = [j for j, app_name in enumerate(self.apps)
+                if (apps is None or app_name in apps) and not (exclude and app_name in exclude)]
+        if np is not None:
+            matrix = self.matrix[:, keep]
+        else:
+            matrix = [[row[j] for j in keep] for row in self.matrix]
+        return UsageFrame(self.start_ordinal, [self.apps[j] for j in keep], matrix)
+
+    def daily_totals(self):
+        """Get {date: seconds} for days with any usage"""
+        if np is not None:
+            totals = self.matrix.sum(axis=1)
+            return {ordinal_to_date(self.start_ordinal + int(i)): float(totals[i])
+                    for i in np.flatnonzero(totals)}
+        return {ordinal_to_date(self.start_ordinal + i): total
+                for i, total in enumerate(sum(row) for row in self.matrix) if total}
+
+    def app_totals(self):
+        """Get {app: seconds} for apps with any usage"""
+        if np is not None:
+            totals = self.matrix.sum(axis=0)
+            return {self.apps[j]: float(totals[j]) for j in np.flatnonzero(totals)}
+        return {self.apps[j]: total
+                for j, total in enumerate(sum(column) for column in zip(*self.matrix)) if total}
+
+
+class QueryEngine:
+    """Range queries over whichever store holds the usage data.
+
+    SQLite answers them with GROUP BY queries. On the JSON backend,
+    unfiltered queries are served from the rollups; everything else is
+    reduced over a UsageFrame built from archived rows plus the raw days
+    the archive does not cover yet.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+
+    def query(self, start_date=None, end_date=None, group_by='app', top_n=None, apps=None, exclude=None,
+              cancel=None):
+        """Get [(day, week or app, seconds)] for a date range.
+
+        A missing start_date or end_date means the first or last stored
+        day. Days and weeks come oldest first and apps busiest first;
+        with top_n only the top_n largest groups are returned. Setting
+        the cancel event (a threading.Event) stops the query with
+        QueryCancelled.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"Cannot group usage by {group_by}")
+        daily_totals, app_totals = self._totals(start_date, end_date, apps, exclude, cancel)
+
+        if group_by == 'app':
+            totals = app_totals
+        elif group_by == 'week':
+            totals = week_totals(daily_totals)
+        else:
+            totals = daily_totals
+
+        if top_n is None and group_by != 'app':
+            return sorted(totals.items())
+        ranked = sorted(totals.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:top_n] if top_n is not None else ranked
+
+    def summary(self, start_date=None, end_date=None, top_n=10, cancel=None):
+        """Total, daily average, top apps and per-day totals, newest day first.
+
+        With a start_date every day of the range is listed; for all
+        history (no start_date) only days with usage are. cancel works
+        as in query().
+        """
+        daily_totals, app_totals = self._totals(start_date, end_date, cancel=cancel)
+        total_seconds = sum(daily_totals.values())
+
+        if start_date is None:
+            dates = sorted(daily_totals, reverse=True)
+        else:
+            end_date = end_date or date_cls.today().isoformat()
+            dates = [ordinal_to_date(ordinal) for ordinal in
+                     range(date_to_ordinal(end_date), date_to_ordinal(start_date) - 1, -1)]
+
+        return {
+            'total_seconds': total_seconds,
+            'daily_average': total_seconds / (len(dates) or 1),
+            'top_apps': sorted(app_totals.items(), key=lambda x: x[1], reverse=True)[:top_n],
+            'days': [{'date': date, 'total_seconds': daily_totals.get(date, 0)} for date in dates]
+        }
+
+    def _totals(self, start_date, end_date, apps=None, exclude=None, cancel=None):
+        """({date: seconds}, {app: seconds}) over a range from the best source"""
+        data_manager = self.data_manager
+        if data_manager.db:
+            db = data_manager.db
+            return (db.get_grouped_totals(start_date, end_date, 'date', apps, exclude),
+                    db.get_grouped_totals(start_date, end_date, 'app', apps, exclude))
+        if data_manager.rollups and apps is None and not exclude:
+            return self._rollup_totals(start_date, end_date, cancel)
+        frame = self.frame(start_date, end_date, cancel).select(apps, exclude)
+        return frame.daily_totals(), frame.app_totals()
+
+    def _rollup_totals(self, start_date, end_date, cancel=None):
+        """Totals from the rollups for finished days plus today's live totals"""
+        data_manager = self.data_manager
+        rollups = data_manager.rollups
+        today = date_cls.today().isoformat()
+        end_date = min(end_date or today, today)
+        data_manager.refresh_rollups(cancel)
+        check_cancel(cancel)
+
+        with data_manager._rollup_lock:
+            if start_date is None and end_date >= rollups.through:
+                daily_totals = dict(rollups.days)
+                app_totals = dict(rollups.all_time)
+            else:
+                start = start_date or min(rollups.days, default=end_date)
+                daily_totals, app_totals = rollups.range_totals(start, end_date, data_manager.get_daily_data)
+
+        # Today is still open, so it comes from the live totals
+        if (start_date or '') <= today <= end_date:
+            snapshot = data_manager.snapshot
+            if snapshot and snapshot.date == today:
+                today_apps = dict(snapshot.seconds)
+            else:
+                today_apps = {app_name: app_data.get('total_seconds', 0)
+                              for app_name, app_data in data_manager.get_daily_data(today).items()}
+            if today_apps:
+                daily_totals[today] = sum(today_apps.values())
+            for app_name, seconds in today_apps.items():
+                app_totals[app_name] = app_totals.get(app_name, 0) + seconds
+
+        return daily_totals, app_totals
+
+    def frame(self, start_date=None, end_date=None, cancel=None):
+        """Load a date range of the JSON backend as a UsageFrame"""
+        data_manager = self.data_manager
+        data = data_manager.data
+        if start_date is None or end_date is None:
+            stored = list(data)
+            if not stored:
+                return UsageFrame(0, [], np.zeros((0, 0)) if np is not None else [])
+            start_date = start_date or stored[0]
+            end_date = end_date or stored[-1]
+        start_ordinal = date_to_ordinal(start_date)
+        end_ordinal = date_to_ordinal(end_date)
+        num_days = max(end_ordinal - start_ordinal + 1, 0)
+
+        # Finished days come straight from the archive matrix, only the
+        # days after it are read from the partitions
+        archive = data_manager.archive
+        archived_rows = None
+        raw_start = start_ordinal
+        if archive:
+            archive.export(data, date_cls.today().isoformat(), cancel)
+            check_cancel(cancel)
+            if archive.last_date:
+                raw_start = max(raw_start, date_to_ordinal(archive.last_date) + 1)
+            archived_rows, first_ordinal = archive.rows(start_date, end_date)
+            archived_offset = first_ordinal - start_ordinal
+
+        apps = list(archive.apps) if archive else []
+        app_ids = {app_name: j for j, app_name in enumerate(apps)}
+        rows, columns, values = [], [], []
+        for ordinal in range(raw_start, end_ordinal + 1):
+            date = ordinal_to_date(ordinal)
+            if date not in data:
+                continue
+            check_cancel(cancel)  # Each day may load a partition
+            row = ordinal - start_ordinal
+            for app_name, app_data in data_manager.get_daily_data(date).items():
+                column = app_ids.get(app_name)
+                if column is None:
+                    column = app_ids[app_name] = len(apps)
+                    apps.append(app_name)
+                rows.append(row)
+                columns.append(column)
+                values.append(app_data.get('total_seconds', 0))
+
+        if np is None:
+            matrix = [[0] * len(apps) for _ in range(num_days)]
+            for row, column, seconds in zip(rows, columns, values):
+                matrix[row][column] = seconds
+            return UsageFrame(start_ordinal, apps, matrix)
+
+        matrix = np.zeros((num_days, len(apps)))
+        if archived_rows is not None and len(archived_rows):
+            matrix[archived_offset:archived_offset + archived_rows.shape[0], :archived_rows.shape[1]] = archived_rows
+        matrix[rows, columns] = values
+        return UsageFrame(start_ordinal, apps, matrix)
@@ -0,0 +1,123 @@
+"""
+Records Module
+Compact in-memory representation of per-app usage entries
+"""
+
+import sys
+from datetime import date as date_cls, datetime
+
+
+def date_to_ordinal(date):
+    """Convert YYYY-MM-DD to a day ordinal"""
+    return date_cls.fromisoformat(date).toordinal()
+
+
+def ordinal_to_date(ordinal):
+    """Convert a day ordinal to YYYY-MM-DD"""
+    return date_cls.fromordinal(ordinal).isoformat()
+
+
+def intern_name(name):
+    """Share one string object per distinct app name or title"""
+    return sys.intern(name) if name else ''
+
+
+class UsageRecord:
+    """Usage for one (date, app): seconds, last activity and window title.
+
+    Stores last_active as an epoch float and the title as an interned
+    string. Behaves like the {'total_seconds', 'last_active', 'title'}
+    dict it replaces (get, [], keys, dict(record)), with last_active
+    converted back to an ISO string on access.
+    """
+
+    __slots__ = ('total_seconds', 'last_active_ts', 'title')
+
+    KEYS = ('total_seconds', 'last_active', 'title')
+
+    def __init__(self, total_seconds=0, last_active=None, title=''):
+        self.total_seconds = total_seconds
+        self.last_active_ts = None
+        self.title = intern_name(title)
+        if last_active is not None:
+            self['last_active'] = last_active
+
+    @classmethod
+    def from_dict(cls, app_data):
+        """Build a record from a stored app data dict"""
+        if isinstance(app_data, cls):
+            return app_data
+        return cls(
+            app_data.get('total_seconds', 0),
+            app_data.get('last_active'),
+            app_data.get('title', '')
+        )
+
+    def __getitem__(self, key):
+        if key == 'total_seconds':
+            return self.total_seconds
+        if key == 'last_active':
+            if self.last_active_ts is None:
+                return None
+            return datetime.fromtimestamp(self.last_active_ts).isoformat()
+        if key == 'title':
+            return self.title
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'total_seconds':
+            self.total_seconds = value
+        elif key == 'last_active':
+            if value is None:
+                self.last_active_ts = None
+            elif isinstance(value, str):
+                self.last_active_ts = datetime.fromisoformat(value).timestamp()
+            else:
+                self.last_active_ts = float(value)
+        elif key == 'title':
+            self.title = intern_name(value)
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.KEYS
+
+    def values(self):
+        return [self[key] for key in self.KEYS]
+
+    def items(self):
+        return [(key, self[key]) for key in self.KEYS]
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def __eq__(self, other):
+        try:
+            return dict(self) == dict(other)
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    def __repr__(self):
+        return f"UsageRecord({dict(self)!r})"
+
+    def to_dict(self):
+        """Plain dict for JSON serialization"""
+        return dict(self)
+
+
+def compact_day(daily_data):
+    """Convert a {app: app_data} dict to interned names and UsageRecords"""
+    return {intern_name(app_name): UsageRecord.from_dict(app_data)
+            for app_name, app_data in daily_data.items()}
@@ -0,0 +1,160 @@
+"""
+Rollups Module
+Materialized per-day, per-week, per-month and all-time usage sums
+"""
+
+import json
+import os
+from datetime import date as date_cls, timedelta
+from pathlib import Path
+
+
+def week_key(day):
+    """ISO week key like 2026-W42 for a date object"""
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class UsageRollups:
+    """Sums over closed days, persisted to rollups.json.
+
+    A day is folded in once it is over (through = last folded date).
+    Range queries use whole-month and whole-week rows where the range
+    covers them and only read raw per-app data for the ragged edges, so
+    their cost no longer depends on how much history there is. Like the
+    archive, the sums are derived from the per-day usage data, which
+    stays authoritative; edits and cleanup of folded days are applied
+    with replace_day.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.through = ''
+        self.days = {}  # {date: total_seconds}
+        self.weeks = {}  # {week_key: {app: seconds}}
+        self.months = {}  # {YYYY-MM: {app: seconds}}
+        self.all_time = {}  # {app: seconds}
+        self.load()
+
+    def load(self):
+        """Load rollups from file"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            self.through = stored.get('through', '')
+            self.days = stored.get('days', {})
+            self.weeks = stored.get('weeks', {})
+            self.months = stored.get('months', {})
+            self.all_time = stored.get('all_time', {})
+        except Exception as e:
+            print(f"Error loading rollups: {e}")
+
+    def save(self):
+        """Save rollups to file"""
+        tmp_file = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({
+                    'through': self.through,
+                    'days': self.days,
+                    'weeks': self.weeks,
+                    'months': self.months,
+                    'all_time': self.all_time
+                }, f)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"Error saving rollups: {e}")
+
+    def _apply(self, date, daily_data, sign):
+        """Add (sign=1) or subtract (sign=-1) one day's usage"""
+        day = date_cls.fromisoformat(date)
+        buckets = (
+            self.weeks.setdefault(week_key(day), {}),
+            self.months.setdefault(date[:7], {}),
+            self.all_time
+        )
+
+        day_total = 0
+        for app_name, app_data in daily_data.items():
+            seconds = app_data.get('total_seconds', 0) * sign
+            day_total += seconds
+            for bucket in buckets:
+                remaining = bucket.get(app_name, 0) + seconds
+                if remaining > 1e-6:
+                    bucket[app_name] = remaining
+                else:
+                    bucket.pop(app_name, None)
+
+        remaining = self.days.get(date, 0) + day_total
+        if remaining > 1e-6:
+            self.days[date] = remaining
+        else:
+            self.days.pop(date, None)
+
+    def refresh(self, data, before_date, cancel=None):
+        """Fold every day in data after through and before before_date
+
+        Once the cancel event is set the days folded so far are saved
+        and the rest is left for the next refresh.
+        """
+        yesterday = (date_cls.fromisoformat(before_date) - timedelta(days=1)).isoformat()
+        if yesterday <= self.through:
+            return 0
+        dates = sorted(date for date in data if self.through < date < before_date)
+        for i, date in enumerate(dates):
+            if cancel is not None and cancel.is_set():
+                self.through = (date_cls.fromisoformat(date) - timedelta(days=1)).isoformat()
+                self.save()
+                return i
+            self._apply(date, data[date], 1)
+        self.through = yesterday
+        self.save()
+        return len(dates)
+
+    def replace_day(self, date, old_daily_data, new_daily_data):
+        """Account for a closed day whose data changed or was deleted"""
+        if date > self.through:
+            return
+        self._apply(date, old_daily_data, -1)
+        if new_daily_data:
+            self._apply(date, new_daily_data, 1)
+
+    def range_totals(self, start_date, end_date, get_daily_data):
+        """Get ({date: total}, {app: seconds}) for closed days in a range.
+
+        end_date is clamped to through. Whole months and ISO weeks come
+        from their rollup rows; remaining edge days use get_daily_data.
+        """
+        end_date = min(end_date, self.through)
+        daily_totals = {date: total for date, total in self.days.items()
+                        if start_date <= date <= end_date}
+        app_totals = {}
+
+        def add(apps):
+            for app_name, seconds in apps.items():
+                app_totals[app_name] = app_totals.get(app_name, 0) + seconds
+
+        if start_date > end_date:
+            return daily_totals, app_totals
+
+        day = date_cls.fromisoformat(start_date)
+        end = date_cls.fromisoformat(end_date)
+        while day <= end:
+            next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+            week_end = day + timedelta(days=6)
+            if day.day == 1 and next_month - timedelta(days=1) <= end:
+                add(self.months.get(day.isoformat()[:7], {}))
+                day = next_month
+            elif day.weekday() == 0 and week_end <= end:
+                add(self.weeks.get(week_key(day), {}))
+                day = week_end + timedelta(days=1)
+            else:
+                date = day.isoformat()
+                if date in daily_totals:
+                    add({app_name: app_data.get('total_seconds', 0)
+                         for app_name, app_data in get_daily_data(date).items()})
+                day += timedelta(days=1)
+
+        return daily_totals, app_totals
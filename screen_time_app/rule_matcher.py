@@ -0,0 +1,321 @@
+"""
+Rule Matcher Module
+Glob, regex and literal blocker rules compiled into one matcher
+"""
+
+import fnmatch
+import re
+from collections import deque
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+FIELDS = ('name', 'exe', 'cmdline')
+SYNTAXES = ('glob', 'regex', 'literal')
+ACTIONS = ('block', 'limit')
+
+_GLOB_SPECIAL = re.compile(r'[*?\[]')
+
+
+class PatternRule:
+    """One pattern rule as read from a rules file.
+
+    pattern is matched against a process's name, executable path or
+    command line (field) as a glob (the default), a regex (searched,
+    so anchor it with ^ and $ to match the whole value) or a literal
+    (the whole value). Matching ignores case unless case_sensitive is
+    set. action is "block", or "limit" with limit_seconds of use per
+    day across every app the rule matches; label names the rule in
+    notifications.
+    """
+
+    __slots__ = ('pattern', 'syntax', 'field', 'action', 'limit_seconds', 'label', 'case_sensitive')
+
+    def __init__(self, pattern, syntax='glob', field='name', action='block', limit_seconds=None,
+                 label=None, case_sensitive=False):
+        if not isinstance(pattern, str) or not pattern:
+            raise ValueError("pattern must be a non-empty string")
+        if syntax not in SYNTAXES:
+            raise ValueError(f"unknown syntax {syntax!r}")
+        if field not in FIELDS:
+            raise ValueError(f"unknown field {field!r}")
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action {action!r}")
+        if action == 'limit' and not isinstance(limit_seconds, (int, float)):
+            raise ValueError("a limit rule needs limit_seconds")
+        self.pattern = pattern
+        self.syntax = syntax
+        self.field = field
+        self.action = action
+        self.limit_seconds = limit_seconds
+        self.label = label or pattern
+        self.case_sensitive = case_sensitive
+
+    @classmethod
+    def from_dict(cls, rule):
+        return cls(rule.get('pattern'), rule.get('syntax', 'glob'), rule.get('field', 'name'),
+                   rule.get('action', 'block'), rule.get('limit_seconds'), rule.get('label'),
+                   rule.get('case_sensitive', False))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"PatternRule({self.pattern!r}, syntax={self.syntax!r}, field={self.field!r})"
+
+
+class LiteralAutomaton:
+    """Aho-Corasick automaton: every occurrence of any literal in one pass.
+
+    search() walks the text once whatever the number of literals, and
+    yields (literal index, end offset) for each occurrence, overlapping
+    ones included.
+    """
+
+    def __init__(self, literals):
+        self.literals = list(literals)
+        goto = [{}]
+        out = [[]]
+        for index, literal in enumerate(self.literals):
+            state = 0
+            for char in literal:
+                following = goto[state].get(char)
+                if following is None:
+                    following = goto[state][char] = len(goto)
+                    goto.append({})
+                    out.append([])
+                state = following
+            out[state].append(index)
+
+        # Failure links, breadth first: the longest proper suffix of a
+        # state that is also a prefix of some literal
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in goto[state].items():
+                queue.append(following)
+                back = fail[state]
+                while back and char not in goto[back]:
+                    back = fail[back]
+                fail[following] = goto[back].get(char, 0)
+                out[following] = out[following] + out[fail[following]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for position, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                yield index, position
+
+
+def _glob_shape(pattern):
+    """(kind, literal) for globs made of one literal and leading/trailing *, else None"""
+    core = pattern.strip('*')
+    if not core or _GLOB_SPECIAL.search(core):
+        return None
+    starts, ends = pattern.startswith('*'), pattern.endswith('*')
+    if pattern.count('*') != starts + ends:
+        return None  # Runs of stars, e.g. "**x"
+    if starts and ends:
+        return 'contains', core
+    if starts:
+        return 'suffix', core
+    if ends:
+        return 'prefix', core
+    return 'exact', core
+
+
+def _glob_literals(pattern):
+    """Literal fragments every match of a glob contains"""
+    fragments = []
+    current = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char in '*?':
+            fragments.append(''.join(current))
+            current = []
+        elif char == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                current.append(char)  # fnmatch treats a lone [ literally
+            else:
+                fragments.append(''.join(current))
+                current = []
+                i = end
+        else:
+            current.append(char)
+        i += 1
+    fragments.append(''.join(current))
+    return [fragment for fragment in fragments if fragment]
+
+
+def _regex_requirement(parsed):
+    """Literals one of which occurs in every match of a parsed regex, or None"""
+    options = []
+    run = []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if run:
+            options.append({''.join(run)})
+            run = []
+        if op is sre_parse.SUBPATTERN:
+            requirement = _regex_requirement(value[-1])
+            if requirement:
+                options.append(requirement)
+        elif op is sre_parse.BRANCH:
+            branches = [_regex_requirement(branch) for branch in value[1]]
+            if all(branches):
+                options.append(set().union(*branches))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+            requirement = _regex_requirement(value[2])
+            if requirement:
+                options.append(requirement)
+    if run:
+        options.append({''.join(run)})
+    if not options:
+        return None
+    # The most selective requirement: the one whose shortest literal is longest
+    return max(options, key=lambda literals: min(map(len, literals)))
+
+
+class RuleMatcher:
+    """Every rule compiled into one automaton per field.
+
+    Each rule contributes the literal(s) one of which must occur in any
+    value it matches: the text of a simple glob ("steam*", "*steam*"),
+    the longest fixed fragment of other globs, or what a regex cannot
+    match without. A value is scanned once by the automaton; only rules
+    whose literal turned up are looked at, and only those that are not
+    decided by the literal's position alone run their own regex. Rules
+    without any literal (".*") are checked against every value.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        self.fields = set()
+        literals = {field: {} for field in FIELDS}  # {field: {literal: [(rule_id, kind)]}}
+        self._always = {field: [] for field in FIELDS}  # Rule ids without a literal
+        self._verify = {}  # {rule_id: compiled regex}, for rules the literal does not decide
+
+        for rule in rules:
+            try:
+                if not isinstance(rule, PatternRule):
+                    rule = PatternRule.from_dict(rule)
+                compiled = self._compile(rule)
+            except (ValueError, TypeError, AttributeError, re.error) as e:
+                print(f"Skipping blocker rule {rule!r}: {e}")
+                continue
+            rule_id = len(self.rules)
+            self.rules.append(rule)
+            self.fields.add(rule.field)
+
+            kind, rule_literals, regex = compiled
+            if regex is not None:
+                self._verify[rule_id] = regex
+            if rule_literals:
+                for literal in rule_literals:
+                    literals[rule.field].setdefault(literal, []).append((rule_id, kind))
+            else:
+                print(f"Blocker rule {rule!r} has no fixed text: it is checked against every "
+                      f"process and may match far more than intended")
+                self._always[rule.field].append(rule_id)
+
+        self._automata = {}
+        self._entries = {}
+        for field, by_literal in literals.items():
+            if by_literal:
+                self._automata[field] = LiteralAutomaton(by_literal)
+                self._entries[field] = [(len(literal), entries) for literal, entries in by_literal.items()]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _compile(self, rule):
+        """(kind, literals, verifying regex or None) for a rule"""
+        flags = 0 if rule.case_sensitive else re.IGNORECASE
+        pattern = rule.pattern
+
+        if rule.syntax == 'literal':
+            shape = ('exact', pattern)
+        elif rule.syntax == 'glob':
+            shape = _glob_shape(pattern)
+        else:
+            shape = None
+
+        if shape is not None:
+            kind, literal = shape
+            # Positions are found on lowercased text; a case-sensitive
+            # rule confirms the exact text with a regex
+            regex = None
+            if rule.case_sensitive:
+                regex = re.compile(fnmatch.translate(pattern) if rule.syntax == 'glob' else re.escape(pattern) + r'\Z')
+            return kind, [literal.lower()], regex
+
+        if rule.syntax == 'glob':
+            regex = re.compile(fnmatch.translate(pattern), flags)
+            fragments = _glob_literals(pattern)
+            literals = [max(fragments, key=len).lower()] if fragments else []
+        else:
+            regex = re.compile(pattern, flags)
+            try:
+                requirement = _regex_requirement(sre_parse.parse(pattern, flags))
+            except Exception:
+                requirement = None  # Unusual syntax, fall back to checking every value
+            # Case folding only holds for the literal when it is lowercased
+            # the same way the text is
+            literals = sorted({literal.lower() for literal in requirement}) if requirement else []
+        return 'regex', literals, regex
+
+    def match(self, values, fields=None):
+        """Ids of the rules matching {field: text}, e.g. a process's name, exe and cmdline
+
+        fields limits matching to rules on those fields, e.g. ('name',)
+        when only a name is known.
+        """
+        matched = set()
+        for field in self.fields if fields is None else self.fields.intersection(fields):
+            text = values.get(field) or ''
+            lowered = text.lower()
+            automaton = self._automata.get(field)
+            if automaton is not None:
+                entries = self._entries[field]
+                for index, end in automaton.search(lowered):
+                    length, candidates = entries[index]
+                    start = end - length
+                    for rule_id, kind in candidates:
+                        if rule_id in matched:
+                            continue
+                        if kind == 'exact':
+                            if start or end != len(lowered):
+                                continue
+                        elif kind == 'prefix':
+                            if start:
+                                continue
+                        elif kind == 'suffix':
+                            if end != len(lowered):
+                                continue
+                        regex = self._verify.get(rule_id)
+                        if regex is None or self._search(regex, rule_id, text):
+                            matched.add(rule_id)
+            for rule_id in self._always[field]:
+                if rule_id not in matched and self._search(self._verify[rule_id], rule_id, text):
+                    matched.add(rule_id)
+        return matched
+
+    def _search(self, regex, rule_id, text):
+        if self.rules[rule_id].syntax == 'regex':
+            return regex.search(text) is not None
+        return regex.match(text) is not None
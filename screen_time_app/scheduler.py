@@ -0,0 +1,71 @@
+"""
+Scheduler Module
+Decides how long the tracking loop sleeps between ticks
+"""
+
+import threading
+import time
+
+
+class TrackingScheduler:
+    """Adaptive tick interval for the tracking loop.
+
+    After a focus switch the loop ticks every interval seconds. Each
+    tick with focus unchanged stretches the next sleep by backoff, up
+    to max_interval. While the focused app has a time limit, the sleep
+    is capped by the seconds it has left so the limit is enforced on
+    time. wake() cuts the current wait() short; stop() also makes every
+    later wait() return at once.
+    """
+
+    def __init__(self, interval=5, max_interval=30, backoff=1.5):
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.backoff = backoff
+        self.current = interval
+        self.wakeups = 0
+        self.started = time.monotonic()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+    def next_interval(self, focus_changed, seconds_to_limit=None):
+        """Seconds to sleep before the next tick"""
+        if focus_changed:
+            self.current = self.interval
+        else:
+            self.current = min(self.current * self.backoff, self.max_interval)
+
+        interval = self.current
+        if seconds_to_limit is not None:  # 0: the limit is reached now
+            interval = min(interval, max(seconds_to_limit, 1))
+        return interval
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds, returns False once stopped"""
+        self._wakeup.wait(timeout)
+        if not self._stopped:
+            self._wakeup.clear()
+        self.wakeups += 1
+        return not self._stopped
+
+    def count_wakeup(self):
+        """Record a wakeup that happened outside wait() (e.g. a focus event)"""
+        self.wakeups += 1
+
+    def wake(self):
+        """End the current wait() early"""
+        self._wakeup.set()
+
+    def stop(self):
+        """Wake the loop and make every later wait() return at once"""
+        self._stopped = True
+        self._wakeup.set()
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def wakeups_per_hour(self):
+        """Average wakeups per hour since the scheduler was created"""
+        elapsed = time.monotonic() - self.started
+        return self.wakeups * 3600 / elapsed if elapsed > 0 else 0
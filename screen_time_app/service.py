@@ -0,0 +1,173 @@
+"""
+Service Module
+The tracking loop shared by the GUI and the headless daemon
+"""
+
+import threading
+import time
+
+from api_server import ApiServer
+from blocker import AppBlocker
+from data_manager import DataManager
+from focus_events import create_focus_source
+from metrics import metrics
+from process_cache import ProcessNameCache
+from scheduler import TrackingScheduler
+from tracker import TimeTracker
+
+
+class TrackingService:
+    """Owns the DataManager, TimeTracker and AppBlocker and runs the loop.
+
+    Nothing here imports a GUI toolkit. Both the GUI and the daemon run
+    the loop on a background thread with start(); the daemon keeps its
+    main thread for waiting on signals. on_tick, if given, is called
+    after every tick.
+    """
+
+    def __init__(self, data_manager=None, on_tick=None):
+        self.data_manager = data_manager or DataManager()
+        self.process_cache = ProcessNameCache()
+        self.tracker = TimeTracker(self.data_manager, self.process_cache)
+        self.blocker = AppBlocker(self.data_manager, self.process_cache)
+        self.on_tick = on_tick
+
+        # Local socket API for status bars and other tools; the tracker
+        # wakes it after every update to push live usage to subscribers
+        self.api = None
+        if self.data_manager.config.get('api_enabled', True) and ApiServer.supported():
+            self.api = ApiServer(self.data_manager.data_dir / "api.sock", self.data_manager, self.blocker)
+            self.tracker.on_update = self.api.notify
+
+        # Created by run(): connecting to X (and importing python-xlib)
+        # is the slowest part of starting up, so it stays off the caller
+        self.focus_source = None
+        self.scheduler = self._create_scheduler()
+        self.is_tracking = True
+        self.thread = None
+
+    def _create_scheduler(self):
+        """Tick scheduler for the tracking loop"""
+        interval = self.data_manager.config.get('tracking_interval', 5)
+        if self.focus_source:
+            # Focus events timestamp every switch, so ticks can stretch
+            # out while focus stays put without losing accuracy
+            max_interval = self.data_manager.config.get('focus_heartbeat_interval', 30)
+        else:
+            # Polling only notices a switch at the next tick
+            max_interval = interval
+        return TrackingScheduler(interval, max_interval)
+
+    def start(self):
+        """Start the API server and run the tracking loop on a daemon thread"""
+        if self.api and not self.api.start():
+            self.api = self.tracker.on_update = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Run the tracking loop until stop() is called"""
+        self._start_focus_source()
+        scheduler = self.scheduler
+        # Without a journal, usage is only on disk after a save
+        save_interval = self.data_manager.config.get('save_interval', 300)
+        next_save = time.monotonic() + save_interval
+        next_metrics_write = 0
+        switches = []
+
+        while self.is_tracking:
+            previous_app = self.tracker.current_app
+            tick_start = time.perf_counter()
+            try:
+                # Charge each focus switch at its exact timestamp
+                for switch_time, window in switches:
+                    self.tracker.update(switch_time, window)
+                self.tracker.update()
+                if not self.tracker.is_away:
+                    self.blocker.check_and_block()
+
+                if self.on_tick:
+                    self.on_tick()
+
+                if self.data_manager.journal is None and time.monotonic() >= next_save:
+                    next_save = time.monotonic() + save_interval
+                    self.data_manager.save()
+
+            except Exception as e:
+                metrics.error('tick', e)
+                print(f"Tracking error: {e}")
+            metrics.record('tick', time.perf_counter() - tick_start)
+
+            metrics_file = self.data_manager.metrics_file
+            if metrics_file and time.monotonic() >= next_metrics_write:
+                next_metrics_write = time.monotonic() + self.data_manager.config.get('metrics_write_interval', 60)
+                metrics.write(metrics_file)
+
+            if not self.is_tracking:
+                break
+
+            focus_changed = bool(switches) or self.tracker.current_app != previous_app
+            if self.tracker.is_away:
+                # Nobody is here: skip the blocker, but keep asking for
+                # the (cheap) input idle time, since the interval in which
+                # the user comes back is not counted
+                interval = self.data_manager.config.get('idle_heartbeat_interval', 5)
+            else:
+                interval = scheduler.next_interval(
+                    focus_changed, self.blocker.seconds_until_limit(self.tracker.current_app))
+
+            if self.focus_source and self.focus_source.running:
+                # Sleep until the next focus switch or tick
+                switches = self.focus_source.wait(interval)
+                scheduler.count_wakeup()
+            else:
+                switches = []
+                if not self.tracker.is_away:
+                    interval = min(interval, scheduler.interval)
+                scheduler.wait(interval)
+
+    def _start_focus_source(self):
+        """Subscribe to focus events and let ticks stretch out accordingly"""
+        if self.focus_source is not None or not self.is_tracking:
+            return
+        self.focus_source = create_focus_source(self.tracker)
+        if self.focus_source:
+            self.scheduler.max_interval = self._create_scheduler().max_interval
+            if not self.is_tracking:  # stop() came in while connecting
+                self.focus_source.stop()
+
+    def reload(self):
+        """Re-read config.json, the idle threshold and the blocker rules"""
+        self.data_manager.config = self.data_manager.load_config()
+        self.tracker.set_idle_threshold(self.data_manager.config.get('idle_threshold_seconds', 300))
+        self.blocker.load_rules()
+        scheduler = self._create_scheduler()
+        self.scheduler.interval = scheduler.interval
+        self.scheduler.max_interval = scheduler.max_interval
+        self.scheduler.current = scheduler.interval
+        self.wake()
+
+    def wake(self):
+        """Run the next tick now instead of at the end of the current sleep"""
+        self.scheduler.wake()
+        if self.focus_source:
+            self.focus_source.wake.set()
+
+    def stop(self):
+        """Stop the loop, waking it if it is asleep"""
+        self.is_tracking = False
+        self.scheduler.stop()
+        if self.focus_source:
+            self.focus_source.stop()
+        if self.api:
+            self.api.stop()
+
+    def close(self):
+        """Stop tracking and flush everything to disk"""
+        self.stop()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        self.blocker.close()
+        self.data_manager.close()
+        if self.data_manager.metrics_file:
+            metrics.write(self.data_manager.metrics_file)
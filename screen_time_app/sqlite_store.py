@@ -0,0 +1,307 @@
+"""
+SQLite Store Module
+Optional SQLite storage backend for usage data, config and blocker rules
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from journal import UsageJournal
+from partitions import PartitionedUsage
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    date TEXT NOT NULL,
+    app TEXT NOT NULL,
+    total_seconds REAL NOT NULL DEFAULT 0,
+    last_active TEXT,
+    title TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (date, app)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_usage_date_seconds ON usage (date, total_seconds DESC);
+CREATE INDEX IF NOT EXISTS idx_usage_app_date ON usage (app, date);
+
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS blocker_rules (
+    app TEXT PRIMARY KEY,
+    blocked INTEGER NOT NULL DEFAULT 0,
+    limit_seconds REAL
+);
+"""
+
+
+class SqliteStore:
+    """Usage, config and blocker rule storage in a single SQLite database"""
+
+    def __init__(self, db_file):
+        self.db_file = Path(db_file)
+        self._lock = threading.Lock()
+
+        # Shared by the tracking thread and the Tk thread, guarded by _lock
+        self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def _row_to_app_data(self, row):
+        return {
+            'total_seconds': row[0],
+            'last_active': row[1],
+            'title': row[2]
+        }
+
+    # Usage data
+
+    def get_app_data(self, date, app_name):
+        """Get data for a specific app on a specific date"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT total_seconds, last_active, title FROM usage WHERE date = ? AND app = ?",
+                (date, app_name)
+            ).fetchone()
+        if row is None:
+            return {'total_seconds': 0, 'last_active': None, 'title': ''}
+        return self._row_to_app_data(row)
+
+    def update_app_data(self, date, app_name, app_data):
+        """Insert or replace data for a specific app"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO usage (date, app, total_seconds, last_active, title) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (date, app_name, app_data.get('total_seconds', 0),
+                 app_data.get('last_active'), app_data.get('title', ''))
+            )
+
+    def add_usage(self, date, app_name, seconds, last_active, title):
+        """Add tracked time to an app in a single upsert"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO usage (date, app, total_seconds, last_active, title) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (date, app) DO UPDATE SET "
+                "total_seconds = total_seconds + excluded.total_seconds, "
+                "last_active = excluded.last_active, title = excluded.title",
+                (date, app_name, seconds, last_active, title)
+            )
+            row = self.conn.execute(
+                "SELECT total_seconds, last_active, title FROM usage WHERE date = ? AND app = ?",
+                (date, app_name)
+            ).fetchone()
+        return self._row_to_app_data(row)
+
+    def get_daily_data(self, date):
+        """Get all data for a specific date"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT app, total_seconds, last_active, title FROM usage WHERE date = ?",
+                (date,)
+            ).fetchall()
+        return {row[0]: self._row_to_app_data(row[1:]) for row in rows}
+
+    def get_date_range_data(self, start_date, end_date):
+        """Get all rows for a date range, grouped by date"""
+        result = {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT date, app, total_seconds, last_active, title FROM usage "
+                "WHERE date BETWEEN ? AND ?",
+                (start_date, end_date)
+            ).fetchall()
+        for row in rows:
+            result.setdefault(row[0], {})[row[1]] = self._row_to_app_data(row[2:])
+        return result
+
+    def get_dates(self, start_date=None, end_date=None):
+        """Get the sorted dates with data in a range"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT date FROM usage WHERE date BETWEEN ? AND ? ORDER BY date",
+                (start_date or '', end_date or '9999-12-31')
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_top_apps(self, date, limit=10):
+        """Get top apps by usage for a specific date"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT app, total_seconds FROM usage WHERE date = ? "
+                "ORDER BY total_seconds DESC LIMIT ?",
+                (date, limit)
+            ).fetchall()
+
+    def get_daily_totals(self, start_date=None, end_date=None):
+        """Get {date: total_seconds} for every date with data in a range"""
+        start_date = start_date or ''
+        end_date = end_date or '9999-12-31'
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT date, SUM(total_seconds) FROM usage WHERE date BETWEEN ? AND ? GROUP BY date",
+                (start_date, end_date)
+            ).fetchall()
+        return dict(rows)
+
+    def get_range_top_apps(self, start_date=None, end_date=None, limit=10):
+        """Get top apps summed over a date range"""
+        start_date = start_date or ''
+        end_date = end_date or '9999-12-31'
+        with self._lock:
+            return self.conn.execute(
+                "SELECT app, SUM(total_seconds) AS seconds FROM usage "
+                "WHERE date BETWEEN ? AND ? GROUP BY app ORDER BY seconds DESC LIMIT ?",
+                (start_date, end_date, limit)
+            ).fetchall()
+
+    def get_grouped_totals(self, start_date=None, end_date=None, group_by='date', apps=None, exclude=None):
+        """Get {date or app: total_seconds} for a range, optionally limited to some apps"""
+        if group_by not in ('date', 'app'):
+            raise ValueError(f"Cannot group usage by {group_by}")
+        sql = f"SELECT {group_by}, SUM(total_seconds) FROM usage WHERE date BETWEEN ? AND ?"
+        params = [start_date or '', end_date or '9999-12-31']
+        if apps is not None:
+            sql += f" AND app IN ({', '.join('?' * len(apps))})"
+            params.extend(apps)
+        if exclude:
+            sql += f" AND app NOT IN ({', '.join('?' * len(exclude))})"
+            params.extend(exclude)
+        with self._lock:
+            rows = self.conn.execute(sql + f" GROUP BY {group_by}", params).fetchall()
+        return dict(rows)
+
+    def delete_before(self, cutoff_date):
+        """Delete usage rows older than a date, returns the number of rows removed"""
+        with self._lock, self.conn:
+            return self.conn.execute("DELETE FROM usage WHERE date < ?", (cutoff_date,)).rowcount
+
+    def import_usage(self, data):
+        """Bulk import a {date: {app: app_data}} mapping"""
+        rows = [
+            (date, app_name, app_data.get('total_seconds', 0),
+             app_data.get('last_active'), app_data.get('title', ''))
+            for date, daily_data in data.items()
+            for app_name, app_data in daily_data.items()
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO usage (date, app, total_seconds, last_active, title) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    # Config
+
+    def load_config(self):
+        """Load configuration, returns None if nothing is stored yet"""
+        with self._lock:
+            rows = self.conn.execute("SELECT key, value FROM config").fetchall()
+        if not rows:
+            return None
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_config(self, config):
+        """Save configuration"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM config")
+            self.conn.executemany(
+                "INSERT INTO config (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in config.items()]
+            )
+
+    # Blocker rules
+
+    def get_blocker_rules(self):
+        """Load blocker rules"""
+        with self._lock:
+            rows = self.conn.execute("SELECT app, blocked, limit_seconds FROM blocker_rules").fetchall()
+        return {
+            'blocked': [app for app, blocked, _ in rows if blocked],
+            'limited': {app: limit for app, _, limit in rows if limit is not None}
+        }
+
+    def save_blocker_rules(self, rules):
+        """Save blocker rules"""
+        merged = {}
+        for app_name in rules.get('blocked', []):
+            merged[app_name] = [1, None]
+        for app_name, limit_seconds in rules.get('limited', {}).items():
+            merged.setdefault(app_name, [0, None])[1] = limit_seconds
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM blocker_rules")
+            self.conn.executemany(
+                "INSERT INTO blocker_rules (app, blocked, limit_seconds) VALUES (?, ?, ?)",
+                [(app_name, blocked, limit) for app_name, (blocked, limit) in merged.items()]
+            )
+
+
+def migrate_json_to_sqlite(data_dir):
+    """One-shot migration of the JSON files in data_dir into screen_time.db"""
+    data_dir = Path(data_dir)
+    db_file = data_dir / "screen_time.db"
+    if db_file.exists():
+        raise FileExistsError(f"{db_file} already exists")
+
+    def read_json(path, default):
+        if path.exists():
+            with open(path, 'r') as f:
+                return json.load(f)
+        return default
+
+    data = read_json(data_dir / "usage_data.json", {})
+    if (data_dir / "usage").exists():
+        for date, daily_data in PartitionedUsage(data_dir / "usage").items():
+            data[date] = daily_data
+    journal = UsageJournal(data_dir / "usage_journal.log")
+    journal.replay(data)
+
+    config = read_json(data_dir / "config.json", None)
+    rules = read_json(data_dir / "blocker_rules.json", None)
+
+    tmp_file = data_dir / "screen_time.db.tmp"
+    if tmp_file.exists():
+        tmp_file.unlink()
+    store = SqliteStore(tmp_file)
+    rows = store.import_usage(data)
+    if config is not None:
+        store.save_config(config)
+    if rules is not None:
+        store.save_blocker_rules(rules)
+    store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    store.conn.execute("PRAGMA journal_mode=DELETE")
+    store.close()
+    os.replace(tmp_file, db_file)
+
+    # Keep the old files around, renamed so they are not picked up again
+    for name in ("usage_data.json", "usage", "usage_journal.log", "usage_journal.log.compacting",
+                 "config.json", "blocker_rules.json"):
+        path = data_dir / name
+        if path.exists():
+            os.replace(path, path.with_name(name + ".migrated"))
+
+    return rows
+
+
+if __name__ == "__main__":
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.home() / ".screen_time_tracker"
+    try:
+        count = migrate_json_to_sqlite(data_dir)
+        print(f"Migrated {count} usage rows into {data_dir / 'screen_time.db'}")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
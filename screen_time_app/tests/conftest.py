@@ -0,0 +1,92 @@
+"""
+Shared test fixtures
+The app modules import each other by bare name, as when run from screen_time_app/
+"""
+
+import sys
+from pathlib import Path
+
+import psutil
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import process_scanner  # noqa: E402
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """A fresh home directory, so a DataManager keeps its files under tmp_path"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
+
+
+class FakeProcesses:
+    """Stands in for psutil and time in process_scanner"""
+
+    NoSuchProcess = psutil.NoSuchProcess
+    AccessDenied = psutil.AccessDenied
+    ZombieProcess = psutil.ZombieProcess
+
+    def __init__(self):
+        self.clock = 1000000.0
+        self.table = {}  # {pid: (create_time, name)}
+        self.reads = 0
+        self.terminated = []
+
+    def start(self, pid, name, age=3600):
+        self.table[pid] = (self.clock - age, name)
+
+    def time(self):
+        return self.clock
+
+    def pids(self):
+        return list(self.table)
+
+    def Process(self, pid):
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        return FakeProcess(self, pid)
+
+
+class FakeProcess:
+    def __init__(self, processes, pid):
+        self.processes = processes
+        self.pid = pid
+
+    def oneshot(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _entry(self):
+        self.processes.reads += 1
+        try:
+            return self.processes.table[self.pid]
+        except KeyError:
+            raise psutil.NoSuchProcess(self.pid)
+
+    def create_time(self):
+        return self._entry()[0]
+
+    def name(self):
+        return self._entry()[1]
+
+    def ppid(self):
+        return 1
+
+    def terminate(self):
+        self.processes.table.pop(self.pid, None)
+        self.processes.terminated.append(self.pid)
+
+
+@pytest.fixture
+def processes(monkeypatch):
+    processes = FakeProcesses()
+    monkeypatch.setattr(process_scanner, 'psutil', processes)
+    monkeypatch.setattr(process_scanner, 'time', processes)
+    return processes
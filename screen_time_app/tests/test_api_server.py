@@ -0,0 +1,83 @@
+"""ApiServer: pipelined requests and usage subscriptions over the socket"""
+
+import json
+import socket
+from datetime import datetime
+
+import pytest
+
+from api_server import ApiServer
+from data_manager import DataManager
+
+pytestmark = pytest.mark.skipif(not ApiServer.supported(), reason="needs Unix sockets")
+
+
+@pytest.fixture
+def server(home):
+    data_manager = DataManager()
+    server = ApiServer(home / "api.sock", data_manager)
+    assert server.start()
+    yield server
+    server.stop()
+    data_manager.close()
+
+
+def connect(server):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(str(server.path))
+    return sock, sock.makefile('rb')
+
+
+def add_usage(server, app_name, seconds):
+    today = datetime.now().strftime("%Y-%m-%d")
+    server.data_manager.add_usage(today, app_name, seconds, datetime.now().isoformat(), '')
+    server.notify()
+
+
+def test_pipelined_requests_are_answered_in_order(server):
+    add_usage(server, 'editor', 30)
+    sock, replies = connect(server)
+    requests = [
+        {'id': 1, 'method': 'today'},
+        {'id': 2, 'method': 'summary', 'params': {'days': 7}},  # Runs on the worker thread
+        {'id': 3, 'method': 'top', 'params': {'limit': 1}},
+        {'id': 4, 'method': 'no_such_method'},
+        {'id': 5, 'method': 'today'},
+    ]
+    sock.sendall(b''.join(json.dumps(request).encode() + b'\n' for request in requests) + b'not json\n')
+
+    results = [json.loads(replies.readline()) for _ in range(len(requests) + 1)]
+    assert [result.get('id') for result in results] == [1, 2, 3, 4, 5, None]
+    assert results[0]['result']['total_seconds'] == 30
+    assert results[1]['result']['total_seconds'] == 30
+    assert results[2]['result']['apps'] == [['editor', 30]]
+    assert 'error' in results[3] and 'error' in results[5]
+    sock.close()
+
+
+def test_subscribers_get_the_apps_that_changed(server):
+    add_usage(server, 'editor', 30)
+    sock, replies = connect(server)
+    sock.sendall(b'{"id": 1, "method": "subscribe"}\n')
+    state = json.loads(replies.readline())['result']
+    assert state['apps'] == {'editor': 30}
+
+    add_usage(server, 'browser', 10)
+    event = json.loads(replies.readline())
+    assert event['event'] == 'usage'
+    assert event['apps'] == {'browser': 10}
+    assert event['total_seconds'] == 40
+    assert not event['reset']
+
+    add_usage(server, 'editor', 5)
+    event = json.loads(replies.readline())
+    assert event['apps'] == {'editor': 35}
+
+    # Unsubscribed clients get replies only
+    sock.sendall(b'{"id": 2, "method": "unsubscribe"}\n')
+    assert json.loads(replies.readline()) == {'id': 2, 'result': True}
+    add_usage(server, 'editor', 5)
+    sock.sendall(b'{"id": 3, "method": "today"}\n')
+    assert json.loads(replies.readline())['id'] == 3
+    sock.close()
@@ -0,0 +1,67 @@
+"""The archive against the per-day usage data it copies"""
+
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from data_manager import DataManager
+
+
+def raw_totals(data_manager, start_date, end_date):
+    """({date: seconds}, {app: seconds}) summed straight from the per-day data"""
+    daily_totals, app_totals = {}, {}
+    for day in list(data_manager.data):
+        if start_date <= day <= end_date:
+            for app_name, app_data in data_manager.get_daily_data(day).items():
+                seconds = app_data.get('total_seconds', 0)
+                daily_totals[day] = daily_totals.get(day, 0) + seconds
+                app_totals[app_name] = app_totals.get(app_name, 0) + seconds
+    return daily_totals, app_totals
+
+
+def history(data_manager, days=40):
+    today = date.today()
+    for offset in range(1, days + 1):
+        day = (today - timedelta(days=offset)).isoformat()
+        data_manager.data[day] = {
+            f"app-{(offset + i) % 7}": {'total_seconds': offset * 10 + i * 1.5,
+                                        'last_active': f"{day}T12:00:00", 'title': ''}
+            for i in range(3)
+        }
+    return (today - timedelta(days=days)).isoformat(), (today - timedelta(days=1)).isoformat()
+
+
+def assert_matches(archive, data_manager, start_date, end_date):
+    daily_totals, app_totals = raw_totals(data_manager, start_date, end_date)
+    assert archive.daily_totals(start_date, end_date) == pytest.approx(daily_totals)
+    assert archive.app_totals(start_date, end_date) == pytest.approx(app_totals)
+
+
+def test_archive_matches_the_usage_data(home):
+    data_manager = DataManager()
+    first, last = history(data_manager)
+    archive = data_manager.archive
+    assert archive.export(data_manager.data, date.today().isoformat()) == 40
+
+    assert_matches(archive, data_manager, first, last)
+    middle = (date.fromisoformat(first) + timedelta(days=10)).isoformat()
+    assert_matches(archive, data_manager, middle, last)
+    data_manager.close()
+
+
+def test_edits_to_archived_days_are_written_through(home):
+    data_manager = DataManager()
+    first, last = history(data_manager)
+    archive = data_manager.archive
+    archive.export(data_manager.data, date.today().isoformat())
+
+    data_manager.update_app_data(last, 'app-1', {'total_seconds': 4000, 'last_active': None, 'title': ''})
+    data_manager.update_app_data(last, 'new-app', {'total_seconds': 25, 'last_active': None, 'title': ''})
+    assert_matches(archive, data_manager, first, last)
+
+    data_manager.cleanup_old_data(days=20)
+    assert_matches(archive, data_manager, first, last)
+    assert archive.daily_totals(first, last)
+    data_manager.close()
@@ -0,0 +1,65 @@
+"""AppBlocker enforcement of explicit and pattern rules"""
+
+import json
+
+import pytest
+
+from blocker import AppBlocker
+from data_manager import DataManager
+
+# Above any real pid_max, so never the test runner or one of its parents
+GAME = 10_000_001
+SHELL = 10_000_002
+
+
+@pytest.fixture
+def data_manager(home):
+    data_manager = DataManager()
+    data_manager.config['notifications_enabled'] = False
+    yield data_manager
+    data_manager.close()
+
+
+def blocker_with(data_manager, blocked=(), patterns=()):
+    data_manager.save_blocker_rules({'blocked': list(blocked), 'limited': {}})
+    with open(data_manager.patterns_file, 'w') as f:
+        json.dump(list(patterns), f)
+    return AppBlocker(data_manager)
+
+
+def test_pattern_rules_block_matching_processes(data_manager, processes):
+    processes.start(GAME, 'steam-runtime')
+    processes.start(SHELL, 'bash')
+    blocker = blocker_with(data_manager, patterns=[{'pattern': 'steam*'}])
+    blocker.check_and_block()
+    assert processes.terminated == [GAME]
+
+
+def test_protected_names_are_spared_by_pattern_rules_only(data_manager, processes, capsys):
+    processes.start(SHELL, 'explorer.exe')
+    blocker = blocker_with(data_manager, patterns=[{'pattern': '*.exe'}])
+    blocker.check_and_block()
+    blocker.check_and_block()
+    assert processes.terminated == []
+    assert capsys.readouterr().out.count("Not blocking explorer.exe") == 1
+
+    # Blocking the app by name is an explicit choice and is enforced
+    blocker = blocker_with(data_manager, blocked=['explorer.exe'])
+    blocker.check_and_block()
+    assert processes.terminated == [SHELL]
+
+
+def test_spared_processes_are_forgotten_once_they_exit(data_manager, processes, capsys):
+    processes.start(SHELL, 'explorer.exe')
+    blocker = blocker_with(data_manager, patterns=[{'pattern': 'explorer*'}])
+    blocker.check_and_block()
+    assert len(blocker._spared) == 1
+
+    del processes.table[SHELL]
+    blocker.check_and_block()
+    assert blocker._spared == set()
+
+    # A new process reusing the pid is reported again
+    processes.start(SHELL, 'explorer.exe', age=0)
+    blocker.check_and_block()
+    assert capsys.readouterr().out.count("Not blocking explorer.exe") == 2
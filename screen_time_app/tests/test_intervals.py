@@ -0,0 +1,88 @@
+"""IntervalStore: round trip, torn records and clock changes"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import intervals
+from intervals import IntervalStore
+
+
+def test_spans_round_trip(tmp_path):
+    store = IntervalStore(tmp_path)
+    base = datetime(2026, 3, 2, 9, 0)
+    # Consecutive ticks on one window merge into a single span
+    for tick in range(1, 4):
+        store.add('2026-03-02', base + timedelta(seconds=5 * tick), 5, 'editor', 'notes.txt')
+    store.add('2026-03-02', base + timedelta(seconds=25), 5, 'browser', 'news')
+    store.add('2026-03-02', base + timedelta(seconds=30), 5, 'editor', 'notes.txt')
+    store.add('2026-03-03', datetime(2026, 3, 3, 0, 0, 10), 20, 'editor', '')  # Began the day before
+    store.close()
+
+    expected = [
+        (base, 15.0, 'editor', 'notes.txt'),
+        (base + timedelta(seconds=20), 5.0, 'browser', 'news'),
+        (base + timedelta(seconds=25), 5.0, 'editor', 'notes.txt'),
+        (datetime(2026, 3, 2, 23, 59, 50), 20.0, 'editor', ''),
+    ]
+    reopened = IntervalStore(tmp_path)
+    assert list(reopened.spans()) == expected
+    assert reopened.totals('2026-03-02') == {'editor': 20.0, 'browser': 5.0}
+    assert reopened.switches() == {'2026-03-02': 2, '2026-03-03': 0}
+    assert reopened.longest_session(max_gap=0)[1] == 20.0
+
+
+def test_span_in_progress_is_visible_before_it_is_written(tmp_path):
+    store = IntervalStore(tmp_path)
+    store.add('2026-03-02', datetime(2026, 3, 2, 9, 0, 5), 5, 'editor')
+    assert list(store.spans()) == [(datetime(2026, 3, 2, 9, 0), 5.0, 'editor', '')]
+    assert list(IntervalStore(tmp_path).spans()) == []
+    store.close()
+
+
+def test_torn_record_is_dropped_and_appending_resumes(tmp_path):
+    store = IntervalStore(tmp_path)
+    store.add('2026-03-02', datetime(2026, 3, 2, 9, 0, 5), 5, 'editor')
+    store.add('2026-03-02', datetime(2026, 3, 2, 9, 0, 10), 5, 'browser')
+    store.close()
+    path = tmp_path / "2026-03-02.seg"
+    intact = path.read_bytes()
+    # A crash mid-write: a new string's length and half of its bytes
+    path.write_bytes(intact + bytes([(20 << 1) | 1]) + b'half-writ')
+
+    torn = IntervalStore(tmp_path)
+    assert [span[2] for span in torn.spans()] == ['editor', 'browser']
+    torn.add('2026-03-02', datetime(2026, 3, 2, 9, 1, 0), 5, 'terminal')
+    torn.close()
+    assert path.read_bytes().startswith(intact)
+    assert [span[2] for span in IntervalStore(tmp_path).spans()] == ['editor', 'browser', 'terminal']
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip("needs time.tzset")
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    intervals._day_start.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    intervals._day_start.cache_clear()
+
+
+def test_hours_are_bucketed_by_the_wall_clock_on_clock_change_days(tmp_path, new_york):
+    store = IntervalStore(tmp_path)
+    # 2026-03-08 skips 02:00-03:00: midnight to 04:00 is three hours
+    store.add('2026-03-08', datetime(2026, 3, 8, 4, 0), 3 * 3600, 'editor')
+    # 2026-11-01 repeats 01:00-02:00: midnight to 02:00 is three hours
+    store.add('2026-11-01', datetime(2026, 11, 1, 2, 0), 3 * 3600, 'browser')
+    store.close()
+
+    spring = store.hourly('2026-03-08', '2026-03-08')
+    assert spring[:4] == [3600, 3600, 0, 3600] and sum(spring) == 3 * 3600
+    autumn = store.hourly('2026-11-01', '2026-11-01')
+    assert autumn[:2] == [3600, 7200] and sum(autumn) == 3 * 3600
+    assert store.heatmap('2026-11-01', '2026-11-01')[6][1] == 7200  # A Sunday
+    assert list(store.spans('2026-11-01'))[0][0] == datetime(2026, 11, 1)
@@ -0,0 +1,102 @@
+"""Journal replay, compaction and crash recovery"""
+
+from datetime import datetime
+
+from data_manager import DataManager
+from journal import UsageJournal
+
+
+def record(total):
+    return {'total_seconds': total, 'last_active': '2026-01-05T10:00:00', 'title': 't'}
+
+
+def test_replay_applies_running_totals(tmp_path):
+    journal = UsageJournal(tmp_path / "usage_journal.log")
+    journal.append('2026-01-05', 'editor', 5, record(5))
+    journal.append('2026-01-05', 'editor', 5, record(10))
+    journal.append('2026-01-05', 'browser', 3, record(3))
+    journal.close()
+
+    data = {}
+    assert journal.replay(data) == 3
+    assert data['2026-01-05']['editor']['total_seconds'] == 10
+    assert data['2026-01-05']['browser']['total_seconds'] == 3
+
+    # Replaying again (a segment already folded into the snapshot) cannot double count
+    journal.replay(data)
+    assert data['2026-01-05']['editor']['total_seconds'] == 10
+
+
+def test_replay_skips_a_torn_last_line(tmp_path):
+    journal = UsageJournal(tmp_path / "usage_journal.log")
+    journal.append('2026-01-05', 'editor', 5, record(5))
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"date":"2026-01-05","app":"edi')
+
+    data = {}
+    assert journal.replay(data) == 1
+    assert data['2026-01-05']['editor']['total_seconds'] == 5
+
+
+def test_rotate_after_an_interrupted_compaction_keeps_both_segments(tmp_path):
+    journal = UsageJournal(tmp_path / "usage_journal.log")
+    journal.append('2026-01-05', 'editor', 5, record(5))
+    journal.rotate()
+    journal.append('2026-01-05', 'editor', 5, record(10))
+    journal.rotate()  # The first rotated segment was never discarded
+    journal.append('2026-01-05', 'browser', 3, record(3))
+    journal.close()
+
+    data = {}
+    journal.replay(data)
+    assert data['2026-01-05']['editor']['total_seconds'] == 10
+    assert data['2026-01-05']['browser']['total_seconds'] == 3
+
+    journal.discard_rotated()
+    data = {}
+    journal.replay(data)
+    assert list(data['2026-01-05']) == ['browser']
+
+
+def crash(data_manager):
+    """Stop a DataManager's background work without saving anything"""
+    if data_manager.compactor_thread:
+        data_manager._compactor_stop.set()
+        data_manager.compactor_thread.join()
+    data_manager.journal.close()
+
+
+def test_unsaved_ticks_survive_a_crash(home):
+    today = datetime.now().strftime("%Y-%m-%d")
+    data_manager = DataManager()
+    for _ in range(3):
+        data_manager.add_usage(today, 'editor', 5, datetime.now().isoformat(), 'notes.txt')
+    crash(data_manager)
+
+    recovered = DataManager()
+    assert recovered.get_daily_data(today)['editor']['total_seconds'] == 15
+    recovered.close()
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(home):
+    today = datetime.now().strftime("%Y-%m-%d")
+    data_manager = DataManager()
+    data_manager.add_usage(today, 'editor', 5, datetime.now().isoformat(), 'notes.txt')
+    data_manager.compact()
+    assert not data_manager.journal.rotated_path.exists()
+    data_manager.add_usage(today, 'editor', 5, datetime.now().isoformat(), 'notes.txt')
+    crash(data_manager)
+
+    # The snapshot holds the first tick and the journal only the second
+    assert data_manager.journal.path.read_text().count('\n') == 1
+    recovered = DataManager()
+    assert recovered.get_daily_data(today)['editor']['total_seconds'] == 10
+    recovered.close()
+
+    data_manager = DataManager()
+    data_manager.close()
+    assert data_manager.journal.path.stat().st_size == 0
+    reopened = DataManager()
+    assert reopened.get_daily_data(today)['editor']['total_seconds'] == 10
+    reopened.close()
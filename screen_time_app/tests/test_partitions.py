@@ -0,0 +1,70 @@
+"""Month partitions: lazy loading, eviction and reload"""
+
+from partitions import PartitionedUsage
+
+
+def day(seconds, title='t'):
+    return {'editor': {'total_seconds': seconds, 'last_active': '2024-01-01T10:00:00', 'title': title}}
+
+
+def fill(path, max_cold=1):
+    data = PartitionedUsage(path, max_cold)
+    for month in ('2024-01', '2024-02', '2024-03'):
+        for number in (1, 15):
+            data[f"{month}-{number:02d}"] = day(number * 60)
+    assert data.save()
+    return data
+
+
+def test_history_loads_only_the_months_read(tmp_path):
+    fill(tmp_path)
+    data = PartitionedUsage(tmp_path, max_cold=1)
+    assert data.resident_months() == []
+    assert len(data) == 6
+    assert '2024-02-15' in data
+    assert data.resident_months() == []  # Membership comes from the index
+
+    assert data['2024-02-15']['editor']['total_seconds'] == 900
+    assert data.resident_months() == ['2024-02']
+    assert list(data) == sorted(data)
+
+
+def test_evicted_months_reload_from_disk(tmp_path):
+    fill(tmp_path)
+    data = PartitionedUsage(tmp_path, max_cold=1)
+    first = dict(data['2024-01-01']['editor'])
+    data['2024-02-01']
+    data['2024-03-01']
+    assert data.resident_months() == ['2024-03']
+
+    assert dict(data['2024-01-01']['editor']) == first
+    assert data.resident_months() == ['2024-01']
+
+
+def test_unsaved_months_stay_resident_until_saved(tmp_path):
+    fill(tmp_path)
+    data = PartitionedUsage(tmp_path, max_cold=1)
+    data['2024-01-01'] = day(1, 'edited')
+    data['2024-02-01']
+    data['2024-03-01']
+    assert '2024-01' in data.resident_months()
+
+    assert data.save()
+    data['2024-02-01']
+    data['2024-03-01']
+    assert '2024-01' not in data.resident_months()
+    assert data['2024-01-01']['editor']['title'] == 'edited'
+    assert PartitionedUsage(tmp_path)['2024-01-01']['editor']['total_seconds'] == 1
+
+
+def test_deleted_days_leave_the_index(tmp_path):
+    fill(tmp_path)
+    data = PartitionedUsage(tmp_path)
+    del data['2024-03-01']
+    del data['2024-03-15']
+    assert data.save()
+
+    reloaded = PartitionedUsage(tmp_path)
+    assert len(reloaded) == 4
+    assert '2024-03-01' not in reloaded
+    assert not (tmp_path / "2024-03.json").exists()
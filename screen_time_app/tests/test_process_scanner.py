@@ -0,0 +1,89 @@
+"""ProcessScanner against a process table whose pids get reused"""
+
+from process_scanner import VERIFY_SCANS, YOUNG_SECONDS, ProcessScanner
+
+
+def test_only_new_pids_are_read(processes):
+    for pid in range(100, 110):
+        processes.start(pid, f"proc-{pid}")
+    scanner = ProcessScanner()
+    assert scanner.scan() == 10
+    assert scanner.resolved_last_scan == 10
+
+    processes.start(200, 'editor')
+    del processes.table[100]
+    scanner.scan()
+    assert scanner.pids_for('editor') == [200]
+    assert scanner.pids_for('proc-100') == []
+    assert scanner.resolved_last_scan == 1
+
+
+def test_pid_reused_between_two_scans_is_picked_up(processes):
+    for pid in range(100, 100 + 3 * VERIFY_SCANS):
+        processes.start(pid, 'idle')
+    scanner = ProcessScanner()
+    scanner.scan()
+
+    # The old owner exited and a new process got its pid before the next scan
+    processes.table[117] = (processes.clock - 60, 'game')
+    for _ in range(VERIFY_SCANS):
+        scanner.scan()
+    assert scanner.pids_for('game') == [117]
+    assert 117 not in scanner.pids_for('idle')
+    assert scanner.create_time_of(117) == processes.clock - 60
+
+
+def test_verification_reads_a_slice_of_the_table_per_scan(processes):
+    size = 10 * VERIFY_SCANS
+    for pid in range(1000, 1000 + size):
+        processes.start(pid, 'idle')
+    scanner = ProcessScanner()
+    scanner.scan()
+
+    processes.reads = 0
+    for _ in range(VERIFY_SCANS):
+        scanner.scan()
+    # Every cached pid was checked once, nothing was resolved again
+    assert processes.reads == 2 * size
+    assert scanner.resolved_last_scan == 0
+
+
+def test_young_process_exec_is_picked_up(processes):
+    processes.start(300, 'sh', age=0)
+    scanner = ProcessScanner()
+    scanner.scan()
+    assert scanner.pids_for('sh') == [300]
+
+    # exec() keeps the pid and create_time
+    processes.table[300] = (processes.table[300][0], 'game')
+    processes.clock += 1
+    scanner.scan()
+    assert scanner.pids_for('game') == [300]
+
+    # Resolved once more after it is no longer young, then left alone
+    processes.clock += YOUNG_SECONDS
+    scanner.scan()
+    assert scanner.resolved_last_scan == 1
+    scanner.scan()
+    assert scanner.resolved_last_scan == 0
+
+
+def test_exec_after_the_young_window_is_picked_up(processes):
+    processes.start(300, 'launcher')
+    scanner = ProcessScanner()
+    scanner.scan()
+
+    processes.table[300] = (processes.table[300][0], 'game')
+    for _ in range(VERIFY_SCANS):
+        scanner.scan()
+    assert scanner.pids_for('game') == [300]
+    assert scanner.pids_for('launcher') == []
+
+
+def test_get_process_refuses_a_reused_pid(processes):
+    processes.start(400, 'editor')
+    scanner = ProcessScanner()
+    scanner.scan()
+    processes.table[400] = (processes.clock, 'game')
+    assert scanner.get_process(400) is None
+    assert scanner.pids_for('editor') == []
@@ -0,0 +1,99 @@
+"""Rollups against raw per-day sums, and against the archive"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from data_manager import DataManager
+
+
+def raw_totals(data_manager, start_date, end_date):
+    """({date: seconds}, {app: seconds}) summed straight from the per-day data"""
+    daily_totals, app_totals = {}, {}
+    for day in list(data_manager.data):
+        if start_date <= day <= end_date:
+            for app_name, app_data in data_manager.get_daily_data(day).items():
+                seconds = app_data.get('total_seconds', 0)
+                daily_totals[day] = daily_totals.get(day, 0) + seconds
+                app_totals[app_name] = app_totals.get(app_name, 0) + seconds
+    return daily_totals, app_totals
+
+
+def history(data_manager, days=120):
+    """Finished days of usage, every third one empty, returns (first, last) date"""
+    today = date.today()
+    for offset in range(1, days + 1):
+        if offset % 3 == 0:
+            continue
+        day = (today - timedelta(days=offset)).isoformat()
+        data_manager.data[day] = {
+            f"app-{(offset + i) % 11}": {'total_seconds': offset * 7 + i * 0.5,
+                                         'last_active': f"{day}T12:00:00", 'title': ''}
+            for i in range(4)
+        }
+    return (today - timedelta(days=days)).isoformat(), (today - timedelta(days=1)).isoformat()
+
+
+def ranges(first, last):
+    """Ranges with and without whole weeks and months, and ragged edges"""
+    first_day, last_day = date.fromisoformat(first), date.fromisoformat(last)
+    month_start = (first_day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    week_start = first_day + timedelta(days=7 - first_day.weekday())
+    yield first, last
+    yield month_start.isoformat(), last
+    yield week_start.isoformat(), (week_start + timedelta(days=13)).isoformat()
+    yield (first_day + timedelta(days=5)).isoformat(), (last_day - timedelta(days=5)).isoformat()
+    yield last, last
+
+
+def assert_matches(data_manager, first, last):
+    rollups = data_manager.rollups
+    for start_date, end_date in ranges(first, last):
+        daily_totals, app_totals = rollups.range_totals(start_date, end_date, data_manager.get_daily_data)
+        raw_daily, raw_apps = raw_totals(data_manager, start_date, end_date)
+        assert daily_totals == pytest.approx(raw_daily), (start_date, end_date)
+        assert app_totals == pytest.approx(raw_apps), (start_date, end_date)
+    assert rollups.all_time == pytest.approx(raw_totals(data_manager, '', last)[1])
+
+
+def test_rollups_match_raw_sums(home):
+    data_manager = DataManager()
+    first, last = history(data_manager)
+    data_manager.refresh_rollups()
+    assert data_manager.rollups.through == last
+    assert_matches(data_manager, first, last)
+
+    # Folded once, saved and loaded back
+    data_manager.close()
+    reopened = DataManager()
+    assert_matches(reopened, first, last)
+    reopened.close()
+
+
+def test_edits_and_cleanup_of_folded_days_keep_rollups_exact(home):
+    data_manager = DataManager()
+    first, last = history(data_manager)
+    data_manager.refresh_rollups()
+
+    data_manager.update_app_data(last, 'app-1', {'total_seconds': 5000, 'last_active': None, 'title': ''})
+    data_manager.update_app_data(first, 'new-app', {'total_seconds': 30, 'last_active': None, 'title': ''})
+    assert_matches(data_manager, first, last)
+
+    data_manager.cleanup_old_data(days=45)
+    assert_matches(data_manager, first, last)
+    data_manager.close()
+
+
+def test_rollups_and_archive_agree(home):
+    pytest.importorskip('numpy')
+    data_manager = DataManager()
+    first, last = history(data_manager)
+    data_manager.refresh_rollups()
+    archive = data_manager.archive
+    archive.export(data_manager.data, date.today().isoformat())
+    data_manager.update_app_data(last, 'app-2', {'total_seconds': 99, 'last_active': None, 'title': ''})
+
+    rollups = data_manager.rollups
+    assert archive.app_totals(first, last) == pytest.approx(rollups.all_time)
+    assert archive.daily_totals(first, last) == pytest.approx(rollups.days)
+    data_manager.close()
@@ -0,0 +1,87 @@
+"""RuleMatcher against matching every rule on its own"""
+
+import fnmatch
+import random
+import re
+
+import pytest
+
+from rule_matcher import PatternRule, RuleMatcher
+
+ALPHABET = 'abcAB.-_ '
+
+
+def naive_match(rule, text):
+    """What one rule means, matched with its own regex"""
+    flags = 0 if rule.case_sensitive else re.IGNORECASE
+    if rule.syntax == 'glob':
+        return re.match(fnmatch.translate(rule.pattern), text, flags) is not None
+    if rule.syntax == 'literal':
+        return re.fullmatch(re.escape(rule.pattern), text, flags) is not None
+    return re.search(rule.pattern, text, flags) is not None
+
+
+def random_glob(rng):
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        kind = rng.random()
+        if kind < 0.2:
+            parts.append('*')
+        elif kind < 0.3:
+            parts.append('?')
+        elif kind < 0.35:
+            parts.append('[ab]')
+        else:
+            parts.append(''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 3))))
+    return ''.join(parts)
+
+
+def random_regex(rng):
+    pieces = ['a', 'b', 'ab', 'c+', '(a|bc)', '[AB]', '.', 'b?', '^', '$', '.*', 'a{2}', r'\.']
+    return ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 4)))
+
+
+def random_rules(rng, count):
+    rules = []
+    for _ in range(count):
+        syntax = rng.choice(('glob', 'glob', 'regex', 'literal'))
+        if syntax == 'glob':
+            pattern = random_glob(rng)
+        elif syntax == 'regex':
+            pattern = random_regex(rng)
+        else:
+            pattern = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+        rules.append(PatternRule(pattern, syntax, case_sensitive=rng.random() < 0.3))
+    return rules
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_equal_per_rule_matching(seed):
+    rng = random.Random(seed)
+    rules = random_rules(rng, 300)
+    matcher = RuleMatcher(rules)
+    assert len(matcher) == len(rules)
+    texts = [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12))) for _ in range(400)]
+    texts += [rule.pattern for rule in rules]  # Literals matched exactly
+    for text in texts:
+        expected = {rule_id for rule_id, rule in enumerate(rules) if naive_match(rule, text)}
+        assert matcher.match({'name': text}) == expected, text
+
+
+def test_fields_are_matched_separately():
+    matcher = RuleMatcher([
+        {'pattern': 'steam*'},
+        {'pattern': '*/games/*', 'field': 'exe'},
+        {'pattern': r'--profile=work\b', 'syntax': 'regex', 'field': 'cmdline'},
+    ])
+    assert matcher.fields == {'name', 'exe', 'cmdline'}
+    assert matcher.match({'name': 'Steam', 'exe': '/usr/bin/steam'}) == {0}
+    assert matcher.match({'name': 'x', 'exe': '/opt/games/x', 'cmdline': 'x --profile=work'}) == {1, 2}
+    assert matcher.match({'name': 'x', 'exe': '/opt/games/x'}, fields=('name',)) == set()
+
+
+def test_invalid_rules_are_skipped(capsys):
+    matcher = RuleMatcher([{'pattern': 'ok'}, {'pattern': '(', 'syntax': 'regex'}, {'pattern': ''},
+                           {'pattern': 'x', 'action': 'limit'}, {'pattern': 'y', 'field': 'pid'}])
+    assert [rule.pattern for rule in matcher.rules] == ['ok']
+    assert capsys.readouterr().out.count("Skipping blocker rule") == 4
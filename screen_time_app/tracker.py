@@ -5,27 +5,69 @@ Tracks active window/application usage time
 
 import psutil
 import platform
+import subprocess
+import threading
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from idle import IdleDetector, macos_idle_seconds, windows_idle_seconds
+from metrics import metrics
+from process_cache import ProcessNameCache
+
 
 class TimeTracker:
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, process_cache=None):
         self.data_manager = data_manager
+        self.process_cache = process_cache if process_cache is not None else ProcessNameCache()
         self.current_app = None
+        self.current_window = None
         self.last_update = datetime.now()
+        self._lock = threading.Lock()
         self.system = platform.system()
+        self.on_update = None  # Called after every update(), e.g. to push live usage
 
         # Get active window function based on OS
         if self.system == "Windows":
             self.get_active_window = self._get_active_window_windows
         elif self.system == "Linux":
+            self.x11 = None
+            self.x11_retry_at = 0
             self.get_active_window = self._get_active_window_linux
         elif self.system == "Darwin":  # macOS
             self.get_active_window = self._get_active_window_macos
         else:
             self.get_active_window = self._get_active_window_fallback
 
+        # Time away from the machine is not counted (0 turns this off)
+        self.idle = None
+        self.set_idle_threshold(data_manager.config.get('idle_threshold_seconds', 300) if data_manager else 300)
+
+    def set_idle_threshold(self, threshold):
+        """Seconds without input before the user counts as away, 0 to count all time"""
+        with self._lock:
+            if not threshold:
+                self.idle = None
+            elif self.idle is None:
+                self.idle = IdleDetector(threshold, self._get_input_idle)
+            else:
+                self.idle.threshold = threshold
+
+    @property
+    def is_away(self):
+        """True while the user is idle or the session is locked"""
+        return self.idle is not None and self.idle.away
+
+    def _get_input_idle(self):
+        """Seconds since the last keyboard or mouse input, None if unknown"""
+        if self.system == "Windows":
+            return windows_idle_seconds()
+        if self.system == "Darwin":
+            return macos_idle_seconds()
+        if self.system == "Linux" and self.x11 is not None:
+            return self.x11.get_idle_seconds()
+        return None
+
     def _get_active_window_windows(self):
         """Get active window on Windows"""
         try:
@@ -34,30 +76,63 @@ class TimeTracker:
 
             hwnd = win32gui.GetForegroundWindow()
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
 
             return {
-                'name': process.name(),
+                'name': self.process_cache.get_name(pid),
                 'title': win32gui.GetWindowText(hwnd),
                 'pid': pid
             }
         except Exception as e:
             return None
 
+    def _connect_x11(self):
+        """Open a persistent X connection, None if python-xlib or X is unavailable"""
+        try:
+            from x11_window import X11ActiveWindow
+            return X11ActiveWindow()
+        except Exception:
+            return None
+
     def _get_active_window_linux(self):
         """Get active window on Linux"""
+        # Prefer the persistent X connection, retrying it once a minute
+        if self.x11 is None and time.monotonic() >= self.x11_retry_at:
+            self.x11 = self._connect_x11()
+            if self.x11 is None:
+                self.x11_retry_at = time.monotonic() + 60
+
+        if self.x11 is not None:
+            try:
+                window = self.x11.get_active_window()
+                return self.window_from_x11(window) if window else None
+            except Exception:
+                # Connection lost, fall back to xdotool until it comes back
+                self.x11 = None
+                self.x11_retry_at = time.monotonic() + 60
+
+        return self._get_active_window_xdotool()
+
+    def window_from_x11(self, window):
+        """Resolve an X11 {'pid', 'title'} window to the tracked window dict"""
         try:
-            import subprocess
+            return {
+                'name': self.process_cache.get_name(window['pid']),
+                'title': window['title'],
+                'pid': window['pid']
+            }
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
 
+    def _get_active_window_xdotool(self):
+        """Get active window on Linux through xdotool"""
+        try:
             # Try using xdotool
             window_id = subprocess.check_output(['xdotool', 'getactivewindow']).decode().strip()
             window_pid = subprocess.check_output(['xdotool', 'getwindowpid', window_id]).decode().strip()
             window_name = subprocess.check_output(['xdotool', 'getwindowname', window_id]).decode().strip()
 
-            process = psutil.Process(int(window_pid))
-
             return {
-                'name': process.name(),
+                'name': self.process_cache.get_name(int(window_pid)),
                 'title': window_name,
                 'pid': int(window_pid)
             }
@@ -97,29 +172,60 @@ class TimeTracker:
         except Exception as e:
             return None
 
-    def update(self):
-        """Update tracking data"""
-        now = datetime.now()
-        time_delta = (now - self.last_update).total_seconds()
-
-        # Get current active window
-        active_window = self.get_active_window()
-
-        if active_window and time_delta < 60:  # Only count if less than 60 seconds passed
-            app_name = active_window['name']
-
-            # Update today's data
-            today = now.strftime("%Y-%m-%d")
-            app_data = self.data_manager.get_app_data(today, app_name)
-
-            app_data['total_seconds'] = app_data.get('total_seconds', 0) + time_delta
-            app_data['last_active'] = now.isoformat()
-            app_data['title'] = active_window.get('title', '')
-
-            self.data_manager.update_app_data(today, app_name, app_data)
-            self.current_app = app_name
-
-        self.last_update = now
+    def update(self, now=None, active_window=None):
+        """Update tracking data
+
+        Time since the last update is charged to the window that was
+        focused during it. The focused window is then refreshed, either
+        from a focus event (now/active_window) or by polling.
+        """
+        with metrics.timer('tracker.update'):
+            self._update(now, active_window)
+
+        if self.on_update:
+            self.on_update()
+
+    def _update(self, now, active_window):
+        """update() without the timing and the on_update callback"""
+        with self._lock:
+            now = now or datetime.now()
+            time_delta = (now - self.last_update).total_seconds()
+
+            # Drop the part of a polled interval spent away from the machine
+            away_seconds = 0
+            if active_window is None and self.idle is not None:
+                with metrics.timer('idle_check'):
+                    away_seconds = self.idle.check()
+            counted = min(time_delta, time_delta - away_seconds)
+
+            # Only count if less than 60 seconds passed
+            if self.current_window and 0 < time_delta < 60 and counted > 0:
+                today = now.strftime("%Y-%m-%d")
+                # Idle time is trimmed off the end of the interval, so the
+                # counted span starts at the previous update
+                with metrics.timer('add_usage'):
+                    self.data_manager.add_usage(
+                        today,
+                        self.current_window['name'],
+                        counted,
+                        now.isoformat(),
+                        self.current_window.get('title', ''),
+                        span_end=self.last_update + timedelta(seconds=counted)
+                    )
+
+            # Get current active window
+            if active_window is None:
+                with metrics.timer('window_lookup'):
+                    active_window = self.get_active_window()
+            else:
+                metrics.count('focus_events')
+            if active_window and self.current_app and active_window['name'] != self.current_app:
+                metrics.count('app_switches')
+            self.current_window = active_window
+            self.current_app = active_window['name'] if active_window else None
+
+            if now > self.last_update:
+                self.last_update = now
 
     def get_today_usage(self):
         """Get today's usage statistics"""
@@ -131,18 +237,16 @@ class TimeTracker:
         usage = []
         for i in range(days):
             date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            app_data = self.data_manager.get_app_data(date, app_name)
             usage.append({
                 'date': date,
-                'seconds': app_data.get('total_seconds', 0)
+                'seconds': self.data_manager.get_app_seconds(date, app_name)
             })
         return usage
 
     def get_total_today(self):
         """Get total screen time today"""
-        today_data = self.get_today_usage()
-        total = sum(app.get('total_seconds', 0) for app in today_data.values())
-        return total
+        today = datetime.now().strftime("%Y-%m-%d")
+        return self.data_manager.get_total_seconds(today)
 
     def save_data(self):
         """Save all data"""
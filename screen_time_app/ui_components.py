@@ -7,15 +7,17 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, simpledialog
 from datetime import datetime, timedelta
 import math
+import threading
+
+from metrics import metrics
 
 
 class DashboardFrame(ttk.Frame):
     """Main dashboard showing today's usage"""
 
-    def __init__(self, parent, data_manager, tracker):
+    def __init__(self, parent, data_manager):
         super().__init__(parent)
         self.data_manager = data_manager
-        self.tracker = tracker
 
         self.setup_ui()
         self.update_display()
@@ -89,7 +91,8 @@ class DashboardFrame(ttk.Frame):
         """Update dashboard display with current data"""
         try:
             # Get today's total
-            total_seconds = self.tracker.get_total_today()
+            today = datetime.now().strftime("%Y-%m-%d")
+            total_seconds = self.data_manager.get_total_seconds(today)
             hours = int(total_seconds // 3600)
             minutes = int((total_seconds % 3600) // 60)
 
@@ -113,7 +116,6 @@ class DashboardFrame(ttk.Frame):
                 )
 
             # Update top apps
-            today = datetime.now().strftime("%Y-%m-%d")
             top_apps = self.data_manager.get_top_apps(today, 20)
 
             # Clear existing items
@@ -142,9 +144,14 @@ class DashboardFrame(ttk.Frame):
 class StatisticsFrame(ttk.Frame):
     """Statistics and reports frame"""
 
+    LOCAL_SOURCE = "This computer"
+    MERGED_SOURCE = "All hosts (merged)"
+
     def __init__(self, parent, data_manager):
         super().__init__(parent)
         self.data_manager = data_manager
+        self._query_cancel = None  # Event of the query in flight
+        self._sources = {}  # Source label -> host_id (None merges all hosts)
 
         self.setup_ui()
 
@@ -172,6 +179,12 @@ class StatisticsFrame(ttk.Frame):
                 command=self.update_stats
             ).pack(side=tk.LEFT, padx=5)
 
+        # Reports over other machines, once their exports were merged
+        # with fleet.py
+        self.source_var = tk.StringVar(value=self.LOCAL_SOURCE)
+        self.source_box = ttk.Combobox(period_frame, textvariable=self.source_var, state="readonly", width=24)
+        self.source_box.bind("<<ComboboxSelected>>", lambda event: self.update_stats())
+
         # Stats display
         stats_frame = tk.Frame(self, bg="#ecf0f1")
         stats_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -185,6 +198,9 @@ class StatisticsFrame(ttk.Frame):
         )
         self.stats_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # Shown while a query runs
+        self.busy_bar = ttk.Progressbar(self, mode='indeterminate', length=200)
+
         # Refresh button
         tk.Button(
             self,
@@ -200,83 +216,93 @@ class StatisticsFrame(ttk.Frame):
 
     def update_stats(self):
         """Update statistics display"""
+        # Only the latest request matters, a query still running is dropped
+        if self._query_cancel:
+            self._query_cancel.set()
+        cancel = self._query_cancel = threading.Event()
+
         self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(1.0, "\n  Loading statistics...\n")
+        self.busy_bar.pack(pady=5, before=self.stats_text.master)
+        self.busy_bar.start(10)
+        self.config(cursor="watch")
 
         period = self.period_var.get()
+        source = self.source_var.get()
+        threading.Thread(target=self._run_query, args=(period, cancel, source), daemon=True).start()
+
+    def _refresh_sources(self, hosts):
+        """Tk thread: offer merged and per-host views of the fleet hosts"""
+        self._sources = {self.MERGED_SOURCE: None}
+        names = [host_name for _, host_name, _ in hosts]
+        for host_id, host_name, _ in hosts:
+            # Hostnames can repeat across a fleet
+            label = host_name if names.count(host_name) == 1 else f"{host_name} ({host_id[:8]})"
+            self._sources[label] = host_id
+        self.source_box['values'] = [self.LOCAL_SOURCE] + list(self._sources)
+        if self.source_var.get() not in self.source_box['values']:
+            self.source_var.set(self.LOCAL_SOURCE)
+        self.source_box.pack(side=tk.LEFT, padx=10)
+
+    def _run_query(self, period, cancel, source=LOCAL_SOURCE):
+        """Worker thread: compute a summary and build its report text"""
+        sources = self._sources
+        hosts = None
+        try:
+            if source in sources:
+                text = self._build_report(self._get_fleet_summary(period, sources[source]),
+                                          f"{'All Time' if period == 'all' else period + ' Days'} - {source}")
+            elif period == "7":
+                text = self._build_report(self.data_manager.get_weekly_summary(cancel), "7 Days")
+            elif period == "30":
+                text = self._build_report(self._get_period_summary(30, cancel), "30 Days")
+            else:
+                text = self._build_report(self._get_all_time_summary(cancel), "All Time")
+            if source not in sources and not cancel.is_set():
+                text += self._build_activity_report(period)
+            if self.data_manager.fleet is not None and not cancel.is_set():
+                hosts = self.data_manager.fleet.hosts()
+        except Exception as e:
+            text = f"\n  Error loading statistics: {e}\n"
 
-        # Get weekly summary
-        if period == "7":
-            summary = self.data_manager.get_weekly_summary()
-            self._display_summary(summary, "7 Days")
-        elif period == "30":
-            summary = self._get_period_summary(30)
-            self._display_summary(summary, "30 Days")
-        else:
-            summary = self._get_all_time_summary()
-            self._display_summary(summary, "All Time")
+        if cancel.is_set():
+            return  # Superseded, a cancelled query ends in QueryCancelled
+        try:
+            self.after(0, self._show_report, text, cancel, hosts)
+        except (RuntimeError, tk.TclError):
+            pass  # Window closed while the query ran
+
+    def _show_report(self, text, cancel, hosts=None):
+        """Tk thread: show a finished report unless it was superseded"""
+        if cancel.is_set():
+            return
+        if hosts is not None:
+            self._refresh_sources(hosts)
+        self._query_cancel = None
+        self.busy_bar.stop()
+        self.busy_bar.pack_forget()
+        self.config(cursor="")
+        self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(1.0, text)
 
-    def _get_period_summary(self, days):
+    def _get_period_summary(self, days, cancel=None):
         """Get summary for a specific number of days"""
-        from collections import defaultdict
-
-        summary = {
-            'total_seconds': 0,
-            'daily_average': 0,
-            'top_apps': defaultdict(int),
-            'days': []
-        }
-
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            daily_data = self.data_manager.get_daily_data(date)
-
-            daily_total = sum(app.get('total_seconds', 0) for app in daily_data.values())
-            summary['days'].append({
-                'date': date,
-                'total_seconds': daily_total
-            })
+        return self.data_manager.get_period_summary(days, cancel=cancel)
 
-            for app_name, app_data in daily_data.items():
-                summary['top_apps'][app_name] += app_data.get('total_seconds', 0)
-
-            summary['total_seconds'] += daily_total
-
-        summary['daily_average'] = summary['total_seconds'] / days if days > 0 else 0
-        summary['top_apps'] = sorted(summary['top_apps'].items(), key=lambda x: x[1], reverse=True)[:10]
-
-        return summary
-
-    def _get_all_time_summary(self):
+    def _get_all_time_summary(self, cancel=None):
         """Get all-time summary"""
-        from collections import defaultdict
-
-        summary = {
-            'total_seconds': 0,
-            'daily_average': 0,
-            'top_apps': defaultdict(int),
-            'days': []
-        }
-
-        for date, daily_data in self.data_manager.data.items():
-            daily_total = sum(app.get('total_seconds', 0) for app in daily_data.values())
-            summary['days'].append({
-                'date': date,
-                'total_seconds': daily_total
-            })
-
-            for app_name, app_data in daily_data.items():
-                summary['top_apps'][app_name] += app_data.get('total_seconds', 0)
-
-            summary['total_seconds'] += daily_total
-
-        num_days = len(summary['days']) if summary['days'] else 1
-        summary['daily_average'] = summary['total_seconds'] / num_days
-        summary['top_apps'] = sorted(summary['top_apps'].items(), key=lambda x: x[1], reverse=True)[:10]
-
-        return summary
-
-    def _display_summary(self, summary, period_name):
-        """Display summary in text widget"""
+        return self.data_manager.get_all_time_summary(cancel=cancel)
+
+    def _get_fleet_summary(self, period, host_id):
+        """Get a summary of merged fleet data, all hosts or one"""
+        if period == "all":
+            return self.data_manager.fleet.summary(host_id=host_id)
+        today = datetime.now().date()
+        start_date = (today - timedelta(days=int(period) - 1)).isoformat()
+        return self.data_manager.fleet.summary(start_date, today.isoformat(), host_id=host_id)
+
+    def _build_report(self, summary, period_name):
+        """Format a summary as report text"""
         text = f"\n{'='*60}\n"
         text += f"  SCREEN TIME REPORT - {period_name}\n"
         text += f"{'='*60}\n\n"
@@ -305,7 +331,36 @@ class StatisticsFrame(ttk.Frame):
             time_str = self._format_time(day['total_seconds'])
             text += f"{date_str:25s} {time_str:>12s}\n"
 
-        self.stats_text.insert(1.0, text)
+        return text
+
+    def _build_activity_report(self, period):
+        """Format when this computer was used, from the recorded focus spans"""
+        intervals = self.data_manager.intervals
+        if intervals is None:
+            return ""
+        start_date = None
+        if period != "all":
+            start_date = (datetime.now() - timedelta(days=int(period) - 1)).strftime("%Y-%m-%d")
+        hourly = intervals.hourly(start_date)
+        if not any(hourly):
+            return ""
+
+        text = f"\n{'='*60}\n"
+        text += f"Activity by Hour:\n"
+        text += f"{'='*60}\n\n"
+
+        peak = max(hourly)
+        for hour, seconds in enumerate(hourly):
+            if seconds:
+                bar = "#" * max(round(seconds / peak * 30), 1)
+                text += f"{hour:02d}:00  {bar:30s} {self._format_time(seconds):>12s}\n"
+
+        longest = intervals.longest_session(start_date)
+        switches = intervals.switches(start_date)
+        text += f"\nLongest Focus Session: {longest[2]}, {self._format_time(longest[1])} "
+        text += f"on {longest[0].strftime('%a, %b %d at %H:%M')}\n"
+        text += f"App Switches per Day: {sum(switches.values()) / len(switches):.0f}\n"
+        return text
 
     def _format_time(self, seconds):
         """Format seconds to readable time"""
@@ -400,6 +455,10 @@ class BlockerFrame(ttk.Frame):
             command=self.remove_limited_app
         ).pack(side=tk.LEFT)
 
+        # Pattern rules live in files (see README), only counted here
+        self.patterns_label = tk.Label(self, text="", font=("Arial", 9), fg="gray")
+        self.patterns_label.pack()
+
         # Refresh button
         tk.Button(
             self,
@@ -422,8 +481,7 @@ class BlockerFrame(ttk.Frame):
 
         today = datetime.now().strftime("%Y-%m-%d")
         for app_name, limit_seconds in self.blocker.limited_apps.items():
-            app_data = self.data_manager.get_app_data(today, app_name)
-            used_seconds = app_data.get('total_seconds', 0)
+            used_seconds = self.data_manager.get_app_seconds(today, app_name)
 
             limit_str = self._format_time(limit_seconds)
             used_str = self._format_time(used_seconds)
@@ -437,6 +495,14 @@ class BlockerFrame(ttk.Frame):
 
             self.limited_tree.insert("", tk.END, values=(app_name, limit_str, used_str, status))
 
+        matcher = self.blocker.matcher
+        if matcher:
+            blocking = sum(1 for rule in matcher.rules if rule.action == 'block')
+            self.patterns_label.config(
+                text=f"Pattern rules: {blocking} blocking, {len(matcher) - blocking} time limits")
+        else:
+            self.patterns_label.config(text="No pattern rules")
+
     def add_blocked_app(self):
         """Add an app to block list"""
         app_name = simpledialog.askstring("Block App", "Enter application name to block:")
@@ -577,3 +643,152 @@ class SettingsFrame(ttk.Frame):
         if tk.messagebox.askyesno("Confirm", "Delete data older than 30 days?"):
             self.data_manager.cleanup_old_data(30)
             tk.messagebox.showinfo("Success", "Old data cleaned up successfully!")
+
+
+class DiagnosticsFrame(ttk.Frame):
+    """Where the tracking loop spends its time"""
+
+    REFRESH_MS = 2000
+
+    def __init__(self, parent, data_manager):
+        super().__init__(parent)
+        self.data_manager = data_manager
+
+        self.setup_ui()
+        self.bind("<Map>", lambda event: self.update_display())
+        self.after(self.REFRESH_MS, self._refresh)
+
+    def setup_ui(self):
+        """Set up diagnostics UI"""
+        # Title
+        title = tk.Label(self, text="Diagnostics", font=("Arial", 16, "bold"))
+        title.pack(pady=10)
+
+        # Window selector
+        window_frame = tk.Frame(self)
+        window_frame.pack(pady=5)
+
+        tk.Label(window_frame, text="Show:", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
+
+        self.window_var = tk.StringVar(value="recent")
+        minutes = int(metrics.window_seconds // 60)
+        for text, value in ((f"Last {minutes} minutes", "recent"), ("Since start", "all")):
+            tk.Radiobutton(
+                window_frame,
+                text=text,
+                variable=self.window_var,
+                value=value,
+                command=self.update_display,
+                font=("Arial", 10)
+            ).pack(side=tk.LEFT, padx=5)
+
+        # Stage latencies
+        stages_frame = tk.LabelFrame(self, text="Stage Latency (ms)", font=("Arial", 11, "bold"), padx=10, pady=10)
+        stages_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
+
+        columns = ("Stage", "Count", "Rate", "p50", "p95", "p99", "Max", "Total")
+        self.stages_tree = ttk.Treeview(stages_frame, columns=columns, show="headings", height=10)
+        headings = {"Rate": "Per Minute", "Total": "Total"}
+        for column in columns:
+            self.stages_tree.heading(column, text=headings.get(column, column))
+            self.stages_tree.column(column, width=180 if column == "Stage" else 75,
+                                    anchor=tk.W if column == "Stage" else tk.E)
+        self.stages_tree.pack(fill=tk.BOTH, expand=True)
+
+        # Counters and errors
+        counters_frame = tk.LabelFrame(self, text="Counters", font=("Arial", 11, "bold"), padx=10, pady=10)
+        counters_frame.pack(fill=tk.X, padx=20, pady=5)
+
+        self.counters_label = tk.Label(counters_frame, text="", font=("Courier", 9), justify=tk.LEFT, anchor=tk.W)
+        self.counters_label.pack(fill=tk.X)
+
+        self.error_label = tk.Label(counters_frame, text="", font=("Arial", 9), fg="red",
+                                    justify=tk.LEFT, anchor=tk.W, wraplength=700)
+        self.error_label.pack(fill=tk.X, pady=(5, 0))
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=10)
+
+        tk.Button(
+            button_frame,
+            text="Write Metrics File",
+            command=self.write_file,
+            bg="#3498db",
+            fg="white"
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            button_frame,
+            text="Reset",
+            command=self.reset,
+            bg="#95a5a6",
+            fg="white"
+        ).pack(side=tk.LEFT, padx=5)
+
+    def _refresh(self):
+        """Redraw every few seconds while the tab is showing"""
+        if self.winfo_ismapped():
+            self.update_display()
+        self.after(self.REFRESH_MS, self._refresh)
+
+    def update_display(self):
+        """Update the tables from the current metrics"""
+        try:
+            snapshot = metrics.snapshot()
+            window = self.window_var.get()
+
+            for item in self.stages_tree.get_children():
+                self.stages_tree.delete(item)
+
+            # Slowest stages (by time spent) first
+            stages = sorted(snapshot['stages'].items(), key=lambda item: -item[1][window]['total_ms'])
+            for name, stage in stages:
+                summary = stage[window]
+                if not summary['count']:
+                    continue
+                self.stages_tree.insert("", tk.END, values=(
+                    name,
+                    summary['count'],
+                    f"{summary['per_minute']:.1f}" if summary['per_minute'] is not None else "",
+                    f"{summary['p50_ms']:.2f}",
+                    f"{summary['p95_ms']:.2f}",
+                    f"{summary['p99_ms']:.2f}",
+                    f"{summary['max_ms']:.2f}",
+                    f"{summary['total_ms']:.1f}"
+                ))
+
+            uptime = self._format_uptime(snapshot['uptime_seconds'])
+            lines = [f"{'uptime':24s} {uptime}"]
+            lines += [f"{name:24s} {value}" for name, value in sorted(snapshot['counters'].items())]
+            self.counters_label.config(text="\n".join(lines))
+
+            last_error = snapshot['last_error']
+            if last_error:
+                self.error_label.config(
+                    text=f"Last error at {last_error['time']} in {last_error['stage']}: {last_error['message']}")
+            else:
+                self.error_label.config(text="No errors")
+
+        except Exception as e:
+            print(f"Diagnostics update error: {e}")
+
+    def write_file(self):
+        """Write the metrics to the configured file, or metrics.json in the data directory"""
+        path = self.data_manager.metrics_file or self.data_manager.data_dir / "metrics.json"
+        if metrics.write(path):
+            tk.messagebox.showinfo("Metrics", f"Metrics written to {path}")
+        else:
+            tk.messagebox.showerror("Error", f"Could not write {path}")
+
+    def reset(self):
+        """Start counting afresh"""
+        metrics.reset()
+        self.update_display()
+
+    def _format_uptime(self, seconds):
+        """Format seconds to readable time"""
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        if hours > 0:
+            return f"{hours}h {minutes}m"
+        return f"{minutes}m {int(seconds % 60)}s"